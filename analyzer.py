@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+"""
+Query analysis for MySQL MCP Server
+Tokenizes a statement once, skipping comments and literals, to find its type,
+the tables it references, its IN (%s) placeholders and a normalized fingerprint.
+Results are memoized per query text, so repeated statements are never re-parsed.
+"""
+import re
+import functools
+
+import config
+
+# One alternative per token kind; comments, literals and quoted identifiers are
+# consumed whole so nothing inside them is mistaken for SQL
+_TOKEN_TEMPLATE = (
+    r"(?P<space>\s+)"
+    r"|(?P<comment>/\*(?!!).*?(?:\*/|\Z)|--(?=\s|\Z)[^\n]*|#[^\n]*)"
+    r"|(?P<vopen>/\*!\d*)"  # MySQL executable comment: its content is SQL
+    r"|(?P<vclose>\*/)"
+    r"|(?P<string>{strings})"
+    r"|(?P<ident>`(?:[^`]|``)*(?:`|\Z))"
+    r"|(?P<placeholder>%s)"
+    r"|(?P<percent>%%)"
+    r"|(?P<variable>@@?(?:[\w$.]+|`(?:[^`]|``)*`|'(?:[^'\\]|\\.)*')?)"
+    r"|(?P<number>0x[0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?(?![\w$]))"
+    r"|(?P<word>[\w$]+)"
+    r"|(?P<punct>.)"
+)
+_TOKEN_PATTERN = re.compile(
+    _TOKEN_TEMPLATE.replace("{strings}", r"'(?:[^'\\]|\\.|'')*(?:'|\Z)|\"(?:[^\"\\]|\\.|\"\")*(?:\"|\Z)"),
+    re.DOTALL,
+)
+# Strings as read with sql_mode NO_BACKSLASH_ESCAPES, where a backslash is an ordinary character
+_PLAIN_STRING_TOKEN_PATTERN = re.compile(
+    _TOKEN_TEMPLATE.replace("{strings}", r"'(?:[^']|'')*(?:'|\Z)|\"(?:[^\"]|\"\")*(?:\"|\Z)"),
+    re.DOTALL,
+)
+
+# Statement keyword -> permission class used by the MYSQL_ENABLE_* settings
+_OPERATIONS = {
+    "SELECT": "SELECT",
+    "SHOW": "SELECT",
+    "DESCRIBE": "SELECT",
+    "DESC": "SELECT",
+    "TABLE": "SELECT",
+    "VALUES": "SELECT",
+    "INSERT": "INSERT",
+    "REPLACE": "INSERT",
+    "UPDATE": "UPDATE",
+    "DELETE": "DELETE",
+}
+
+# Keywords that start the main statement after a WITH clause
+_CTE_BODIES = {"SELECT", "TABLE", "VALUES", "INSERT", "REPLACE", "UPDATE", "DELETE"}
+
+# Keywords followed by a table name or a comma separated table list
+_TABLE_CLAUSES = {"FROM", "JOIN", "INTO", "UPDATE", "INSERT", "REPLACE", "STRAIGHT_JOIN"}
+
+# Keywords that may sit between a table clause keyword and the table name
+_TABLE_MODIFIERS = {"LOW_PRIORITY", "DELAYED", "HIGH_PRIORITY", "IGNORE", "QUICK", "LATERAL", "INTO", "ONLY"}
+
+# Keywords ending a table list
+_CLAUSE_KEYWORDS = {
+    "WHERE", "SET", "ON", "USING", "GROUP", "ORDER", "HAVING", "LIMIT", "UNION", "EXCEPT", "INTERSECT",
+    "VALUES", "VALUE", "SELECT", "PARTITION", "WINDOW", "FOR", "LOCK", "INNER", "LEFT", "RIGHT", "CROSS",
+    "NATURAL", "OUTER", "DUPLICATE", "WITH", "OUTFILE", "DUMPFILE", "AS", "USE", "FORCE", "DEFAULT",
+}
+
+# Keywords that can follow a table name, so they are not read as its alias
+_ALIAS_STOP_WORDS = _CLAUSE_KEYWORDS | _TABLE_CLAUSES | _TABLE_MODIFIERS
+
+# Pseudo tables that are not worth tracking
+_NOT_TABLES = {"dual"}
+
+# Functions whose result changes between calls; statements using them are never cached
+_NON_DETERMINISTIC_CALLS = {
+    "NOW", "SYSDATE", "CURDATE", "CURTIME", "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP",
+    "LOCALTIME", "LOCALTIMESTAMP", "UTC_DATE", "UTC_TIME", "UTC_TIMESTAMP", "UNIX_TIMESTAMP", "RAND",
+    "UUID", "UUID_SHORT", "CONNECTION_ID", "LAST_INSERT_ID", "FOUND_ROWS", "ROW_COUNT", "SLEEP",
+    "GET_LOCK", "RELEASE_LOCK",
+}
+# User-level lock functions
+_LOCK_CALLS = {"GET_LOCK", "RELEASE_LOCK", "RELEASE_ALL_LOCKS", "IS_FREE_LOCK", "IS_USED_LOCK"}
+# Of the non-deterministic functions, the ones that can also be written without parentheses
+_NON_DETERMINISTIC_WORDS = {
+    "CURRENT_DATE", "CURRENT_TIME", "CURRENT_TIMESTAMP", "LOCALTIME", "LOCALTIMESTAMP",
+}
+
+# IN lists and repeated VALUES rows, collapsed so their length does not change the fingerprint
+_IN_LIST_PATTERN = re.compile(r"\bin \(\?(?:, \?)*\)")
+_REPEATED_ROWS_PATTERN = re.compile(r"(\([^()]*\))(?:, \1)+")
+
+
+class QueryInfo:
+    """
+    What the analyzer found out about one query text
+
+    Attributes:
+        statement: Main statement keyword ("SELECT", "INSERT", "CREATE", ...), looking
+                   through leading comments, parentheses and WITH clauses; None if empty
+        statement_offset: Position of that keyword in the query text (None if empty)
+        operation: Permission class ("SELECT", "INSERT", "UPDATE", "DELETE") or None
+                   for statements without a dedicated permission (DDL and others)
+        tables: Frozenset of lowercase table names, without database qualifier
+        aliases: Dict mapping lowercase table aliases to the table names they stand for
+        in_placeholders: Tuple of (start, end, placeholder_index) for every "IN (%s)"
+                         outside comments and literals; start/end delimit the text from
+                         IN to the closing parenthesis, placeholder_index is the position
+                         of its %s among all placeholders
+        placeholder_count: Number of %s placeholders outside comments and literals
+        cacheable: Whether the statement returns the same rows for the same data on every
+                   call (no non-deterministic functions, user variables or locking reads)
+        locking: Whether the statement takes locks (SELECT ... FOR UPDATE / FOR SHARE /
+                 LOCK IN SHARE MODE, GET_LOCK() and friends), so it must run on the primary
+        fingerprint: Statement with comments removed, literals and placeholders replaced by
+                     "?" and IN lists collapsed, for grouping executions in metrics
+    """
+    __slots__ = ("statement", "statement_offset", "operation", "tables", "aliases", "in_placeholders",
+                 "placeholder_count", "cacheable", "locking", "fingerprint")
+
+    def __init__(self, statement, statement_offset, operation, tables, aliases, in_placeholders, placeholder_count,
+                 cacheable, locking, fingerprint):
+        self.statement = statement
+        self.statement_offset = statement_offset
+        self.operation = operation
+        self.tables = tables
+        self.aliases = aliases
+        self.in_placeholders = in_placeholders
+        self.placeholder_count = placeholder_count
+        self.cacheable = cacheable
+        self.locking = locking
+        self.fingerprint = fingerprint
+
+
+def tokenize(query, backslash_escapes=True):
+    """
+    Split a query into (kind, value, start, end, spaced) tuples
+
+    Whitespace and comments are dropped; spaced tells whether any preceded the token.
+    Words carry their uppercased text as value, quoted identifiers their unquoted name.
+    With backslash_escapes off, strings are read as under sql_mode NO_BACKSLASH_ESCAPES.
+    """
+    tokens = []
+    spaced = False
+    in_versioned_comment = False
+    pattern = _TOKEN_PATTERN if backslash_escapes else _PLAIN_STRING_TOKEN_PATTERN
+    for match in pattern.finditer(query):
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            spaced = True
+            continue
+        if kind == "vopen":
+            in_versioned_comment = True
+            spaced = True
+            continue
+        if kind == "vclose":
+            if in_versioned_comment:
+                in_versioned_comment = False
+                spaced = True
+                continue
+            tokens.append(("punct", "*", match.start(), match.start() + 1, spaced))
+            tokens.append(("punct", "/", match.start() + 1, match.end(), False))
+            spaced = False
+            continue
+
+        text = match.group()
+        if kind == "word":
+            value = text.upper()
+        elif kind == "ident":
+            value = text[1:-1].replace("``", "`") if text.endswith("`") and len(text) > 1 else text[1:]
+        elif kind == "percent":
+            kind, value = "punct", text
+        else:
+            value = text
+        tokens.append((kind, value, match.start(), match.end(), spaced))
+        spaced = False
+    return tokens
+
+
+def _classify(tokens):
+    """Return the main statement keyword of a token list and its offset in the query text"""
+    index = 0
+    while index < len(tokens) and tokens[index][1] == "(":
+        index += 1
+    if index == len(tokens) or tokens[index][0] != "word":
+        return None, None
+    keyword, offset = tokens[index][1], tokens[index][2]
+    if keyword != "WITH":
+        return keyword, offset
+
+    # WITH [RECURSIVE] name [(columns)] AS (...) [, ...] followed by the main statement
+    depth = 0
+    for kind, value, start, _, _ in tokens[index + 1:]:
+        if value == "(" and kind == "punct":
+            depth += 1
+        elif value == ")" and kind == "punct":
+            depth -= 1
+        elif depth == 0 and kind == "word" and value in _CTE_BODIES:
+            return value, start
+    return keyword, offset
+
+
+def _reads_differently_without_escapes(tokens, statement_offset):
+    """Whether the main statement was found past a WITH clause holding a string with a backslash"""
+    if statement_offset is None:
+        return False
+    return any(kind == "word" and value == "WITH" for kind, value, *_ in tokens[:3]) and any(
+        kind == "string" and "\\" in value for kind, value, start, *_ in tokens if start < statement_offset)
+
+
+def _fingerprint(tokens):
+    parts = []
+    previous = None
+    for kind, value, _, _, spaced in tokens:
+        if kind in ("string", "number", "placeholder"):
+            value = "?"
+        elif kind == "ident":
+            value = f"`{value}`"
+        else:
+            value = value.lower()
+        # Spacing is normalized around list punctuation so "IN (1,2)" and "IN ( 1, 2 )" match
+        if previous is not None and previous != "(" and value not in (")", ",") and (spaced or previous == ","):
+            parts.append(" ")
+        parts.append(value)
+        previous = value
+    text = _IN_LIST_PATTERN.sub("in (?+)", "".join(parts))
+    return _REPEATED_ROWS_PATTERN.sub(r"\1", text)
+
+
+@functools.lru_cache(maxsize=config.QUERY_ANALYSIS_CACHE_SIZE)
+def analyze(query):
+    """
+    Analyze a query; results are memoized per query text in a bounded LRU
+
+    Args:
+        query: SQL text with %s placeholders
+
+    Returns:
+        QueryInfo, shared between callers and never modified
+    """
+    tokens = tokenize(query)
+    statement, statement_offset = _classify(tokens)
+    if _reads_differently_without_escapes(tokens, statement_offset):
+        # Under sql_mode NO_BACKSLASH_ESCAPES the CTE may end elsewhere and hide another
+        # main statement; take that reading when it needs a write permission
+        other, other_offset = _classify(tokenize(query, backslash_escapes=False))
+        if other != statement and other in _OPERATIONS and _OPERATIONS[other] != "SELECT":
+            statement, statement_offset = other, other_offset
+
+    tables = set()
+    aliases = {}
+    in_placeholders = []
+    placeholder_count = 0
+    cacheable = True
+    locking = False
+    expecting_table = False  # the next name is a table
+    list_depths = []  # parenthesis depths of the table lists being read, innermost last
+    depth = 0
+    previous_word = None
+    count = len(tokens)
+    index = 0
+    while index < count:
+        kind, value, start, _, _ = tokens[index]
+        following = tokens[index + 1][1] if index + 1 < count else None
+
+        if kind == "punct":
+            if value == "(":
+                # Derived table or subquery: its own FROM clause names the tables
+                expecting_table = False
+                depth += 1
+            elif value == ")":
+                depth -= 1
+                while list_depths and list_depths[-1] > depth:
+                    list_depths.pop()
+                expecting_table = False
+            elif value == "," and list_depths and list_depths[-1] == depth:
+                expecting_table = True
+            elif value == ";":
+                expecting_table = False
+                list_depths.clear()
+        elif kind == "placeholder":
+            placeholder_count += 1
+        elif kind == "variable":
+            cacheable = False
+        elif kind == "word":
+            if value == "IN" and following == "(" and index + 3 < count \
+                    and tokens[index + 2][0] == "placeholder" and tokens[index + 3][:2] == ("punct", ")"):
+                in_placeholders.append((start, tokens[index + 3][3], placeholder_count))
+            if value in _NON_DETERMINISTIC_CALLS and (following == "(" or value in _NON_DETERMINISTIC_WORDS):
+                cacheable = False
+            if (value in _LOCK_CALLS and following == "(") or (value in ("UPDATE", "SHARE") and previous_word == "FOR") \
+                    or (value == "IN" and previous_word == "LOCK"):
+                cacheable = False
+                locking = True
+
+            if value in _TABLE_CLAUSES and not (value == "UPDATE" and previous_word in ("KEY", "FOR")) \
+                    and not (value in ("INSERT", "REPLACE") and following == "("):  # INSERT() and REPLACE() functions
+                expecting_table = True
+                while list_depths and list_depths[-1] >= depth:
+                    list_depths.pop()
+                list_depths.append(depth)
+            elif expecting_table and value in _TABLE_MODIFIERS:
+                pass
+            elif value in _CLAUSE_KEYWORDS:
+                expecting_table = False
+                while list_depths and list_depths[-1] >= depth:
+                    list_depths.pop()
+            elif expecting_table:
+                index = _read_table(tokens, index, tables, aliases)
+                expecting_table = False
+            previous_word = value
+        elif kind == "ident" and expecting_table:
+            index = _read_table(tokens, index, tables, aliases)
+            expecting_table = False
+        index += 1
+
+    return QueryInfo(
+        statement=statement,
+        statement_offset=statement_offset,
+        operation=_OPERATIONS.get(statement),
+        tables=frozenset(tables - _NOT_TABLES),
+        aliases=aliases,
+        in_placeholders=tuple(in_placeholders),
+        placeholder_count=placeholder_count,
+        cacheable=cacheable,
+        locking=locking,
+        fingerprint=_fingerprint(tokens),
+    )
+
+
+def _read_table(tokens, index, tables, aliases):
+    """
+    Add the (possibly database qualified) name starting at index, and its alias if it
+    has one; returns the index of the last token read
+    """
+    name = tokens[index]
+    while index + 2 < len(tokens) and tokens[index + 1][1] == "." and tokens[index + 2][0] in ("word", "ident"):
+        index += 2
+        name = tokens[index]
+    table = name[1].lower()
+    tables.add(table)
+
+    # [AS] alias
+    following = index + 2 if index + 1 < len(tokens) and tokens[index + 1][:2] == ("word", "AS") else index + 1
+    if following < len(tokens):
+        kind, value = tokens[following][:2]
+        if kind == "ident" or (kind == "word" and value not in _ALIAS_STOP_WORDS):
+            aliases[value.lower()] = table
+            index = following
+    return index
+
+
+def cache_stats():
+    """Hit and miss counters of the analysis cache"""
+    info = analyze.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+    }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Benchmark of the MySQL MCP Server request path
+
+Runs the tool functions against the in-process fake driver from fake_mysql.py,
+so the numbers cover only what the server adds on top of MySQL: query
+classification, IN list expansion, row building and JSON serialization.
+
+Usage:
+    python benchmarks/bench_request_path.py --rows 1000 --columns 12 --types int,varchar,datetime,blob
+    python benchmarks/bench_request_path.py --json > bench_output.txt
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+import io
+import statistics
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fake_mysql  # noqa: E402
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a sorted list"""
+    if not samples:
+        return 0.0
+    index = max(0, min(len(samples) - 1, int(round(pct / 100 * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def load_server():
+    """Import server.py with write tools enabled and its startup output silenced"""
+    os.environ.setdefault("MYSQL_ENABLE_INSERT", "true")
+    os.environ.setdefault("MYSQL_ENABLE_UPDATE", "true")
+    os.environ.setdefault("MYSQL_ENABLE_DELETE", "true")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import server
+    return server
+
+
+def build_cases(server, shape):
+    """Tool calls to measure, as (name, tool function, kwargs)"""
+    in_list = list(range(50))
+    bulk_rows = [[index, f"name-{index}", index * 1.5] for index in range(shape.rows)]
+    return [
+        ("mysql_select", server.mysql_select, {"query": "SELECT * FROM bench WHERE id > %s", "params": [0]}),
+        ("mysql_select columnar", server.mysql_select,
+         {"query": "SELECT * FROM bench WHERE id > %s", "params": [0], "format": "columnar"}),
+        ("mysql_select IN list", server.mysql_select,
+         {"query": "SELECT * FROM bench WHERE id IN (%s) AND status = %s", "params": [in_list, "active"]}),
+        ("mysql_execute_query", server.mysql_execute_query, {"query": "SELECT * FROM bench", "params": []}),
+        ("mysql_insert", server.mysql_insert,
+         {"query": "INSERT INTO bench (id, name) VALUES (%s, %s)", "params": [1, "name"]}),
+        ("mysql_bulk_insert", server.mysql_bulk_insert,
+         {"query": "INSERT INTO bench (id, name, score) VALUES (%s, %s, %s)", "rows": bulk_rows}),
+    ]
+
+
+def run_case(tool, kwargs, iterations, warmup, through_mcp, server):
+    """
+    Measure one tool call
+
+    Returns:
+        Dict with latency percentiles (ms), throughput, response size and peak memory
+    """
+    if through_mcp:
+        # Full path: argument validation, worker offload and event loop hop
+        name = tool.__name__
+        loop = asyncio.new_event_loop()
+
+        def call():
+            return loop.run_until_complete(server.mcp.call_tool(name, kwargs))[0].text
+    else:
+        # Only the blocking tool body that runs on the worker pool
+        body = tool.__wrapped__
+
+        def call():
+            return body(**kwargs)
+
+    for _ in range(warmup):
+        call()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        response = call()
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+
+    # Peak memory in a separate pass, since tracing slows every allocation down
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if through_mcp:
+        loop.close()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p95_ms": round(percentile(latencies, 95), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(statistics.fmean(latencies), 4),
+        "throughput_per_s": round(iterations / elapsed, 1) if elapsed else 0.0,
+        "response_bytes": len(response.encode("utf-8")),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the MySQL MCP Server request path without a database")
+    parser.add_argument("--rows", type=int, default=100, help="Rows in every SELECT result")
+    parser.add_argument("--columns", type=int, default=8, help="Columns in every SELECT result")
+    parser.add_argument("--types", default="int,varchar,decimal,datetime",
+                        help=f"Comma separated column types ({', '.join(fake_mysql.COLUMN_TYPES)})")
+    parser.add_argument("--blob-size", type=int, default=256, help="Size in bytes of blob values")
+    parser.add_argument("--iterations", type=int, default=200, help="Measured calls per tool")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured calls per tool before measuring")
+    parser.add_argument("--through-mcp", action="store_true",
+                        help="Call tools through FastMCP (includes argument validation and worker offload)")
+    parser.add_argument("--only", help="Run only the cases whose name contains this text")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    shape = fake_mysql.ResultShape(
+        rows=args.rows,
+        columns=args.columns,
+        types=tuple(kind.strip() for kind in args.types.split(",") if kind.strip()),
+        blob_size=args.blob_size,
+    )
+    # Raise the row cap so the configured result size is what gets measured
+    os.environ.setdefault("MYSQL_MAX_ROWS", str(max(args.rows, 1000)))
+    fake_server = fake_mysql.install(shape)
+    server = load_server()
+
+    results = {}
+    for name, tool, kwargs in build_cases(server, shape):
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(tool, kwargs, args.iterations, args.warmup, args.through_mcp, server)
+
+    report = {
+        "shape": {"rows": shape.rows, "columns": shape.columns, "types": shape.types, "blob_size": shape.blob_size},
+        "through_mcp": args.through_mcp,
+        "connections_opened": fake_server.connections,
+        "results": results,
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Result shape: {shape.rows} rows x {shape.columns} columns ({', '.join(sorted(set(shape.types)))})")
+    print(f"{'tool':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'calls/s':>11}{'resp KB':>10}{'peak KB':>10}")
+    for name, result in results.items():
+        print(f"{name:<24}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result['throughput_per_s']:>11.1f}{result['response_bytes'] / 1024:>10.1f}"
+              f"{result['peak_memory_kb']:>10.1f}")
+    print(f"Connections opened: {fake_server.connections}")
+
+
+if __name__ == "__main__":
+    main()
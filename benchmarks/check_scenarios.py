@@ -0,0 +1,629 @@
+#!/usr/bin/env python
+"""
+Behaviour checks of the MySQL MCP Server against the fake driver
+
+Exercises the failure handling that benchmark numbers never show (replica lag and
+error ejection, failover to the primary, statement timeouts, the EXPLAIN cost guard,
+index advice and export previews) through the hooks of fake_mysql.py, so no database is needed. Exits with status 1 when a check fails.
+
+Usage:
+    python benchmarks/check_scenarios.py
+    python benchmarks/check_scenarios.py --only replicas
+"""
+import sys
+import time
+import argparse
+import contextlib
+import io
+import json
+import base64
+import tempfile
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import fake_mysql  # noqa: E402
+
+PRIMARY = {"host": "primary", "port": 3306, "user": "root", "password": "", "database": "shop"}
+
+
+def replica_config(host):
+    return {**PRIMARY, "host": host}
+
+
+def load_server():
+    """Import server.py with its startup output silenced (a fake driver must be installed first)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import server
+    return server
+
+
+def make_client(server, replicas=(), options=None, pool=None, **routing):
+    """A MySQLClient on the fake primary with the given replica hosts, routing settings and other options"""
+    return server.MySQLClient(
+        PRIMARY,
+        {"max_size": 4, "checkout_timeout": 2, **(pool or {})},
+        replica_configs=[replica_config(host) for host in replicas] or None,
+        replica_routing={"max_lag": 30, "lag_check_interval": 0, "error_threshold": 1, "eject_seconds": 60,
+                         **routing},
+        **(options or {}),
+    )
+
+
+def replica_state(client, host):
+    return next(replica for replica in client.replicas.stats()["replicas"] if replica["host"].startswith(host))
+
+
+def read(client, times=1):
+    for _ in range(times):
+        result = client.execute_select("SELECT * FROM orders WHERE id > %s", [0], use_cache=False)
+        assert not (isinstance(result, dict) and result.get("error")), result
+
+
+def check_replicas(server):
+    # A replica lagging past max_lag gets no reads until it catches up
+    fake = fake_mysql.install(replica_lag={"r1": 120, "r2": 0})
+    client = make_client(server, ["r1", "r2"])
+    read(client, 4)
+    assert fake.statements_by_host["r1"] == 0, fake.statements_by_host
+    assert fake.statements_by_host["r2"] == 4, fake.statements_by_host
+    assert not replica_state(client, "r1")["available"]
+    fake.replica_lag["r1"] = 1
+    read(client, 4)
+    assert fake.statements_by_host["r1"] == 2, fake.statements_by_host
+
+    # Stopped replication (NULL lag) counts as lagging
+    fake = fake_mysql.install(replica_lag={"r1": None})
+    client = make_client(server, ["r1"])
+    read(client, 2)
+    assert fake.statements_by_host == {"primary": 2}, fake.statements_by_host
+    assert client.replicas.stats()["primary_fallbacks"] == 2
+
+    # An unreachable replica is ejected and its read is retried on the primary
+    fake = fake_mysql.install(down_hosts={"r1"})
+    client = make_client(server, ["r1", "r2"], max_lag=0)
+    read(client, 4)
+    state = replica_state(client, "r1")
+    assert state["ejections"] == 1 and state["errors"] == 1 and not state["available"], state
+    assert fake.statements_by_host["primary"] == 1, fake.statements_by_host
+    assert fake.statements_by_host["r2"] == 3, fake.statements_by_host
+
+    # Ejection only after error_threshold consecutive failures
+    fake = fake_mysql.install(down_hosts={"r1"})
+    client = make_client(server, ["r1"], max_lag=0, error_threshold=3)
+    read(client, 2)
+    assert replica_state(client, "r1")["ejections"] == 0
+    read(client)
+    assert replica_state(client, "r1")["ejections"] == 1
+    assert fake.statements_by_host == {"primary": 3}, fake.statements_by_host
+
+    # Writes and locking reads stay on the primary
+    fake = fake_mysql.install()
+    client = make_client(server, ["r1"])
+    client.execute_select("SELECT * FROM orders WHERE id = %s FOR UPDATE", [1], use_cache=False)
+    assert fake.statements_by_host == {"primary": 1}, fake.statements_by_host
+
+    # The EXPLAIN cost guard runs on the replica chosen for the read
+    plan = {"query_block": {"table": {"table_name": "orders", "access_type": "ref", "rows_examined_per_scan": 1}}}
+    fake = fake_mysql.install(explain_plan=plan)
+    client = make_client(server, ["r1"])
+    with guard_mode(server, "warn"):
+        read(client)
+    assert fake.explains_by_host == {"r1": 1}, fake.explains_by_host
+    assert fake.statements_by_host == {"r1": 1}, fake.statements_by_host
+
+
+def assert_timeout(result, timeout, errno):
+    """The structured error of a statement cancelled by its timeout"""
+    assert isinstance(result, dict) and result.get("error"), result
+    assert result["timeout"] is True and result["code"] == 408, result
+    assert result["mysql_errno"] == errno and result["timeout_seconds"] == timeout, result
+    assert result["elapsed_ms"] >= timeout * 1000 * 0.9, result
+
+
+@contextlib.contextmanager
+def writes_enabled(server):
+    previous = server.config.ENABLE_INSERT, server.config.ENABLE_UPDATE
+    server.config.ENABLE_INSERT = server.config.ENABLE_UPDATE = True
+    try:
+        yield
+    finally:
+        server.config.ENABLE_INSERT, server.config.ENABLE_UPDATE = previous
+
+
+def check_timeouts(server):
+    # SELECTs carry a MAX_EXECUTION_TIME hint; the server stops them (errno 3024), no KILL needed
+    fake = fake_mysql.install(statement_delay=2)
+    client = make_client(server)
+    result = client.execute_select("SELECT * FROM orders", use_cache=False, timeout=0.2)
+    assert_timeout(result, 0.2, 3024)
+    assert fake.kills == 0
+
+    # Other statements are cancelled by the watchdog with KILL QUERY (errno 1317) and
+    # the interrupted connection is discarded instead of going back to the pool
+    fake = fake_mysql.install(statement_delay=2)
+    client = make_client(server)
+    with writes_enabled(server):
+        result = client.execute_update("UPDATE orders SET status = %s", ["done"], timeout=0.2)
+    assert_timeout(result, 0.2, 1317)
+    assert fake.kills == 1
+    pool = client.pool_stats()
+    assert pool["size"] == 0 and pool["closed"] == 1, pool
+
+    # A timed out transaction is rolled back as a whole
+    fake = fake_mysql.install(statement_delay=0.15)
+    client = make_client(server)
+    with writes_enabled(server):
+        result = client.execute_transaction([
+            {"query": "INSERT INTO orders (id) VALUES (%s)", "params": [1]},
+            {"query": "UPDATE orders SET status = %s", "params": ["done"]},
+        ], timeout=0.2)
+    assert_timeout(result, 0.2, 1317)
+    assert result["rolled_back"] is True and result["failed_step"] == 1, result
+    assert client.pool_stats()["size"] == 0
+
+    # Late fire: the KILL lands after the statement finished but before the watchdog is
+    # stopped. It could interrupt the next statement, so the connection is discarded too.
+    fake = fake_mysql.install()
+    client = make_client(server)
+    conn = client.get_connection()
+    with server.Watchdog(conn, PRIMARY, 0.05) as watchdog:
+        time.sleep(0.2)
+    conn.close()
+    assert watchdog.fired and fake.kills == 1
+    pool = client.pool_stats()
+    assert pool["size"] == 0 and pool["closed"] == 1, pool
+    client.execute_select("SELECT 1", use_cache=False)
+    assert fake.connections == 3, fake.connections  # first connection, KILL side connection, new one
+
+    # A watchdog stopped in time never fires and the connection is reused
+    fake = fake_mysql.install()
+    client = make_client(server)
+    client.execute_select("SELECT 1", use_cache=False, timeout=5)
+    client.execute_select("SELECT 1", use_cache=False, timeout=5)
+    assert fake.kills == 0 and fake.connections == 1 and client.pool_stats()["reused"] == 1
+
+
+@contextlib.contextmanager
+def guard_mode(server, mode, max_rows=0, max_full_scan_rows=0):
+    names = ("EXPLAIN_GUARD", "EXPLAIN_MAX_ROWS", "EXPLAIN_MAX_FULL_SCAN_ROWS")
+    previous = [getattr(server.config, name) for name in names]
+    for name, value in zip(names, (mode, max_rows, max_full_scan_rows)):
+        setattr(server.config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in zip(names, previous):
+            setattr(server.config, name, value)
+
+
+# Orders scanned in full, filtered on status and created, each joined to its customer by primary key
+SCAN_PLAN = {"query_block": {"cost_info": {"query_cost": "5210.40"}, "nested_loop": [
+    {"table": {"table_name": "o", "access_type": "ALL", "rows_examined_per_scan": 50000,
+               "rows_produced_per_join": 500, "filtered": "1.00",
+               "attached_condition": "((`shop`.`o`.`status` = 'open') and (`shop`.`o`.`created` > '2024-01-01'))"}},
+    {"table": {"table_name": "c", "access_type": "eq_ref", "key": "PRIMARY", "rows_examined_per_scan": 1,
+               "rows_produced_per_join": 500, "filtered": "100.00"}},
+]}}
+SCAN_QUERY = ("SELECT * FROM orders o JOIN customers c ON c.id = o.customer_id "
+              "WHERE o.status = %s AND o.created > %s")
+
+
+def check_explain_guard(server):
+    summary = server.summarize_plan(SCAN_PLAN)
+    assert summary["query_cost"] == 5210.4 and summary["rows_examined"] == 50500, summary
+    assert summary["full_scans"] == [{"table": "o", "rows": 50000}], summary
+    assert server.check_plan(summary) == []
+    assert server.check_plan(summary, max_rows_examined=100000, max_full_scan_rows=50000) == []
+    assert len(server.check_plan(summary, max_rows_examined=1000, max_full_scan_rows=10000)) == 2
+
+    # Reject: the statement never reaches the server and the plan comes back for inspection
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN)
+    client = make_client(server)
+    with guard_mode(server, "reject", max_full_scan_rows=10000):
+        result = client.execute_select(SCAN_QUERY, ["open", "2024-01-01"], use_cache=False)
+        assert result["error"] and result["code"] == 400, result
+        assert result["violations"] == ["full table scan of o over an estimated 50000 rows (limit 10000)"], result
+        assert result["plan"]["full_scans"] == summary["full_scans"], result
+        with writes_enabled(server):
+            result = client.execute_update("UPDATE orders SET status = %s WHERE note = %s", ["done", "x"])
+        assert result["code"] == 400, result
+    assert fake.explains == 2 and not fake.statements_by_host, fake.statements_by_host
+
+    # Warn: the statement runs and the violations come with its rows
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN)
+    client = make_client(server, options={"explain_cache": server.ResultCache(16, 60)})
+    with guard_mode(server, "warn", max_rows=1000):
+        result = client.execute_select(SCAN_QUERY, ["open", "2024-01-01"], use_cache=False)
+        assert result["warnings"] == ["an estimated 50500 rows are examined (limit 1000)"], result
+        assert result["row_count"] == len(result["rows"]) == len(fake.rows), result
+        # Plans are cached by fingerprint: other literals reuse the EXPLAIN
+        client.execute_select(SCAN_QUERY, ["closed", "2023-01-01"], use_cache=False)
+    assert fake.explains == 1 and fake.statements_by_host == {"primary": 2}, fake.statements_by_host
+
+    # Within the limits, or with the guard off, results are unchanged
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN)
+    client = make_client(server)
+    for mode, max_rows in (("reject", 100000), ("off", 1000)):
+        with guard_mode(server, mode, max_rows=max_rows, max_full_scan_rows=50000):
+            result = client.execute_select(SCAN_QUERY, ["open", "2024-01-01"], use_cache=False)
+        assert "rows" in result and "warnings" not in result, result
+    assert fake.explains == 1 and fake.statements_by_host == {"primary": 2}, fake.statements_by_host
+
+    # Index advice: equality columns first, then the range column
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN, indexes={"orders": {"PRIMARY": ["id"]}, "customers": {}})
+    client = make_client(server)
+    with guard_mode(server, "off", max_full_scan_rows=10000):
+        advice = client.advise_indexes(SCAN_QUERY, ["open", "2024-01-01"])
+    assert advice["violations"] == ["full table scan of o over an estimated 50000 rows (limit 10000)"], advice
+    assert advice["suggestions"] == [{
+        "table": "orders",
+        "columns": ["status", "created"],
+        "rows_examined": 50000,
+        "statement": "CREATE INDEX `idx_orders_status_created` ON `orders` (`status`, `created`)",
+        "reason": "Full table scan filtered on status, created",
+    }], advice["suggestions"]
+
+    # An existing index on those columns is pointed out instead of suggesting a duplicate
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN, indexes={"orders": {"by_status": ["status", "created", "id"]}})
+    client = make_client(server)
+    suggestion, = client.advise_indexes(SCAN_QUERY, ["open", "2024-01-01"])["suggestions"]
+    assert suggestion["existing_index"] == "by_status" and "statement" not in suggestion, suggestion
+
+    # Tables missing from the catalog still get a suggestion, flagged as such
+    fake = fake_mysql.install(explain_plan=SCAN_PLAN, indexes={})
+    client = make_client(server)
+    suggestion, = client.advise_indexes(SCAN_QUERY, ["open", "2024-01-01"])["suggestions"]
+    assert "statement" in suggestion and "existing indexes unknown" in suggestion["reason"], suggestion
+
+    # A full scan without any condition cannot be helped by an index
+    plan = {"query_block": {"table": {"table_name": "orders", "access_type": "ALL", "rows_examined_per_scan": 800}}}
+    fake = fake_mysql.install(explain_plan=plan, indexes={"orders": {}})
+    client = make_client(server)
+    suggestion, = client.advise_indexes("SELECT * FROM orders", [])["suggestions"]
+    assert "statement" not in suggestion and "no filter or join condition" in suggestion["reason"], suggestion
+
+
+def check_export_preview(server):
+    # The preview of an export gets the same large value handles as a query result,
+    # while the file keeps the full values
+    shape = fake_mysql.ResultShape(rows=20, columns=2, types=("int", "blob"), blob_size=100000)
+    fake_mysql.install(shape)
+    with tempfile.TemporaryDirectory() as directory:
+        store = server.BlobStore(Path(directory) / "values", threshold=1024)
+        client = make_client(server, options={"blob_store": store})
+        previous = server.config.EXPORT_DIR, server.config.MAX_RESULT_BYTES
+        server.config.EXPORT_DIR = Path(directory) / "exports"
+        try:
+            server.config.MAX_RESULT_BYTES = 0
+            result = client.execute_export("SELECT * FROM files", export_format="ndjson", timeout=0)
+            assert result["row_count"] == 20 and len(result["preview"]) == server.config.EXPORT_PREVIEW_ROWS, result
+            value = result["preview"][0]["col_1_blob"]
+            assert value["truncated"] and value["bytes"] == 100000 and value["encoding"] == "base64", value
+            assert len(server.to_json(result)) < 10000
+            first = json.loads(Path(result["path"]).read_text().splitlines()[0])
+            assert isinstance(first["col_1_blob"], str) and len(first["col_1_blob"]) > 50000, "the file holds the full value"
+
+            # Without a store, the result byte cap keeps large rows out of the preview
+            client = make_client(server)
+            server.config.MAX_RESULT_BYTES = 300000  # binary values count twice their size
+            result = client.execute_export("SELECT * FROM files", export_format="csv", timeout=0)
+            assert result["row_count"] == 20 and len(result["preview"]) == 1, result["row_count"]
+        finally:
+            server.config.EXPORT_DIR, server.config.MAX_RESULT_BYTES = previous
+
+
+def check_export_timeout(server):
+    # Exports have their own default timeout (none), so a slow export outlives the query timeout
+    fake_mysql.install(statement_delay=0.5)
+    client = make_client(server)
+    previous = server.config.EXPORT_DIR, server.config.QUERY_TIMEOUT
+    with tempfile.TemporaryDirectory() as directory:
+        server.config.EXPORT_DIR = Path(directory)
+        server.config.QUERY_TIMEOUT = 0.2
+        try:
+            assert server.resolve_timeout("mysql_select") == 0.2
+            assert_timeout(client.execute_select("SELECT * FROM orders", use_cache=False, timeout=0.2), 0.2, 3024)
+            assert server.resolve_timeout("mysql_export") == server.config.EXPORT_TIMEOUT == 0
+            for timeout in (None, server.resolve_timeout("mysql_export")):
+                result = client.execute_export("SELECT * FROM orders", timeout=timeout)
+                assert not result.get("error") and result["row_count"] == 100, result
+            # A per-call timeout still applies
+            assert_timeout(client.execute_export("SELECT * FROM orders", timeout=0.2), 0.2, 3024)
+        finally:
+            server.config.EXPORT_DIR, server.config.QUERY_TIMEOUT = previous
+
+
+def check_cursor_expiry(server):
+    # An abandoned paged result is closed when its TTL runs out, without another paged call,
+    # so its connection and the table's metadata lock are released
+    fake = fake_mysql.install()
+    client = make_client(server, options={"cursor_ttl": 0.3})
+    page = client.execute_select("SELECT * FROM orders", use_cache=False, page_size=10)
+    assert page["has_more"] and client.pool_stats()["in_use"] == 1, page
+    # The server keeps the unread result for at least the TTL instead of its 60s default
+    assert fake.session_statements == [
+        "SET SESSION net_write_timeout = GREATEST(@@SESSION.net_write_timeout, %s)"], fake.session_statements
+    assert server.CursorStore(ttl=300).write_timeout() > 300
+    time.sleep(0.6)
+    pool = client.pool_stats()
+    assert pool["in_use"] == 0 and pool["closed"] == 1, pool  # unread rows: the connection is dropped
+    result = client.fetch_page(page["continuation_token"])
+    assert result["error"] and result["code"] == 404, result
+    assert client.cursors.stats()["expired"] == 1
+
+    # A result that keeps being read does not expire
+    client = make_client(server, options={"cursor_ttl": 0.3})
+    page = client.execute_select("SELECT * FROM orders", use_cache=False, page_size=10)
+    for _ in range(4):
+        time.sleep(0.15)
+        page = client.fetch_page(page["continuation_token"], 10)
+        assert not page.get("error") and page["has_more"], page
+
+
+def check_bulk_templates(server):
+    # Templates the driver could not fill row by row are refused before anything runs
+    fake = fake_mysql.install()
+    client = make_client(server)
+    rows = [[1, "a"], [2, "b"]]
+    with writes_enabled(server):
+        for template in (
+            "INSERT INTO orders (id, status) VALUES (%s, %s) ON DUPLICATE KEY UPDATE status = %s",
+            "INSERT INTO orders (id, status) VALUES (%s, %s), (%s, %s)",
+            "INSERT INTO orders (id, status) VALUES (%s, %s) -- imported by %s",
+            "INSERT INTO orders (id, status) SELECT %s, %s",
+        ):
+            result = client.execute_bulk_insert(template, rows)
+            assert result["error"] and result["code"] == 400, (template, result)
+        assert fake.statements == 0, fake.statements
+
+        # VALUES and parentheses inside literals, identifiers and comments are not the row
+        result = client.execute_bulk_insert(
+            "INSERT INTO orders (`values(`, status) /* VALUES ( */ VALUES (%s, CONCAT(%s, ') x'))"
+            " ON DUPLICATE KEY UPDATE status = VALUES(status)", rows)
+        assert result["affected_rows"] == 2 and result["chunk_count"] == 1, result
+
+
+def check_bulk_packets(server):
+    # Values that escape to twice their size still give statements under max_allowed_packet
+    from mysql.connector.conversion import MySQLConverter
+    converter = MySQLConverter()
+    packet = 64 * 1024
+    fake_mysql.install(max_allowed_packet=packet)
+    client = make_client(server)
+    template = "INSERT INTO files (id, body) VALUES (%s, %s)"
+    for value in (b"'" * 3000, b"\\" * 3000, "quote ' and backslash \\ " * 150):
+        rows = [[index, value] for index in range(100)]
+        with writes_enabled(server):
+            result = client.execute_bulk_insert(template, rows)
+        assert result["affected_rows"] == 100 and result["chunk_count"] > 1, result
+        start = 0
+        for chunk in result["chunks"]:
+            values = [bytes(converter.quote(converter.escape(item))) for row in rows[start:start + chunk["rows"]]
+                      for item in (row[0], value.encode("utf-8") if isinstance(value, str) else value)]
+            statement_bytes = len(template) + sum(len(item) + 4 for item in values)
+            assert statement_bytes <= chunk["estimated_bytes"] < packet, (statement_bytes, chunk)
+            start += chunk["rows"]
+
+
+def check_session_reset(server):
+    # Cached prepared statements survive releases of a connection whose session is unchanged
+    fake = fake_mysql.install()
+    client = make_client(server, pool={"statement_cache_size": 8})
+    for _ in range(3):
+        read(client)
+    assert fake.resets == 0 and client.pool.statement_stats()["hits"] == 2, client.pool.statement_stats()
+
+    # A prepared statement taking a user-level lock resets the session on release,
+    # so the lock is not left held by an idle pooled connection
+    result = client.execute_select("SELECT GET_LOCK(%s, 0)", ["nightly-job"], use_cache=False)
+    assert not (isinstance(result, dict) and result.get("error")), result
+    assert fake.resets == 1, fake.resets
+    assert client.pool.statement_stats()["cleared_by_session_reset"] == 1, client.pool.statement_stats()
+    read(client)
+    assert fake.resets == 1, fake.resets
+
+
+def check_unknown_database(server):
+    # A misspelt database is reported like SHOW TABLES FROM reports it, not as an empty schema
+    fake_mysql.install(indexes={"orders": {"PRIMARY": ["id"]}})
+    client = make_client(server)
+    assert client.list_tables() == [{"table_name": "orders"}]
+    for result in (client.list_tables("shpo"), client.describe_schema("shpo"),
+                   client.describe_table("orders", "shpo")):
+        assert result["error"] and result["code"] == 1049 and "shpo" in result["message"], result
+
+    # An existing database without tables is just empty
+    fake_mysql.install(indexes={})
+    client = make_client(server)
+    assert client.list_tables() == [] and client.describe_schema()["tables"] == {}
+
+
+# Per-status order statistics of each shard: orders (COUNT), total (SUM), largest (MAX), smallest (MIN)
+SHARD_ROWS = {
+    "eu": [{"status": "open", "orders": 3, "total": 70, "largest": 50, "smallest": 5},
+           {"status": "closed", "orders": 1, "total": 10, "largest": 10, "smallest": 10}],
+    "us": [{"status": "open", "orders": 2, "total": 40, "largest": 30, "smallest": 10},
+           {"status": "closed", "orders": 4, "total": 100, "largest": 60, "smallest": None}],
+    "ap": [{"status": "open", "orders": 1, "total": 5, "largest": 5, "smallest": 5}],
+}
+
+
+def fan_out(server, hosts):
+    """A ShardFanOut with one target per fake host"""
+    return server.ShardFanOut({
+        host: server.MySQLClient(replica_config(host), {"max_size": 2, "checkout_timeout": 2}) for host in hosts
+    })
+
+
+def check_fanout(server):
+    fake_mysql.install(host_rows=SHARD_ROWS)
+    shards = fan_out(server, SHARD_ROWS)
+    query = "SELECT status, COUNT(*) AS orders, SUM(amount) AS total, MAX(amount) AS largest, " \
+            "MIN(amount) AS smallest FROM orders GROUP BY status"
+    try:
+        results = shards.select(query, timeout=5)
+
+        # Concatenated rows keep their target; mixed directions sort like ORDER BY, NULLs first
+        merged = server.merge_results(results, order_by=["status", "total DESC"], limit=3)
+        assert [(row["_shard"], row["status"], row["total"]) for row in merged["rows"]] == [
+            ("us", "closed", 100), ("eu", "closed", 10), ("eu", "open", 70)], merged["rows"]
+        assert merged["row_count"] == 3 and merged["truncated"] is True, merged
+        assert merged["targets"] == {name: {"row_count": len(rows), "elapsed_ms": results[name][1], "truncated": False}
+                                     for name, rows in SHARD_ROWS.items()}, merged["targets"]
+        assert merged["failed_targets"] == [] and merged["partial"] is False, merged
+        merged = server.merge_results(results, order_by=["smallest"])
+        assert [row["smallest"] for row in merged["rows"]] == [None, 5, 5, 10, 10], merged["rows"]
+        assert merged["truncated"] is False and merged["row_count"] == 5, merged
+
+        # Re-aggregation: counts and sums add up, MIN and MAX ignore NULLs
+        aggregate = {"orders": "count", "total": "sum", "largest": "max", "smallest": "min"}
+        merged = server.merge_results(results, order_by=["orders DESC"], aggregate=aggregate, group_by=["status"])
+        assert merged["rows"] == [
+            {"status": "open", "orders": 6, "total": 115, "largest": 50, "smallest": 5},
+            {"status": "closed", "orders": 5, "total": 110, "largest": 60, "smallest": 10},
+        ], merged["rows"]
+        merged = server.merge_results(results, aggregate={"orders": "count", "total": "sum"})
+        assert merged["rows"] == [{"orders": 11, "total": 225}], merged["rows"]
+        for bad in ({"aggregate": {"total": "avg"}}, {"group_by": ["status"]}, {"order_by": ["total sideways"]}):
+            try:
+                server.check_merge_options(**bad)
+            except server.FanOutError:
+                continue
+            raise AssertionError(f"{bad} was accepted")
+    finally:
+        shards.close()
+
+    # A target that is down or slower than its timeout is reported; the others still merge
+    fake_mysql.install(host_rows=SHARD_ROWS, down_hosts={"ap"}, host_delays={"us": 2})
+    shards = fan_out(server, SHARD_ROWS)
+    try:
+        started = time.monotonic()
+        merged = server.merge_results(shards.select(query, timeout=0.2), order_by=["total DESC"])
+        assert time.monotonic() - started < 1.5
+    finally:
+        shards.close()
+    assert [(row["_shard"], row["total"]) for row in merged["rows"]] == [("eu", 70), ("eu", 10)], merged["rows"]
+    assert merged["failed_targets"] == ["us", "ap"] and merged["partial"] is True, merged
+    assert merged["targets"]["us"]["timeout"] is True and merged["targets"]["us"]["code"] == 408, merged["targets"]
+    assert merged["targets"]["ap"]["code"] == 2003 and "timeout" not in merged["targets"]["ap"], merged["targets"]
+    assert merged["targets"]["eu"]["row_count"] == 2, merged["targets"]
+
+
+def read_value(client, handle, length):
+    """Read a stored value chunk by chunk; returns (text, number of reads)"""
+    parts, offset, reads = [], 0, 0
+    while offset is not None:
+        chunk = client.fetch_value(handle, offset, length)
+        assert chunk["offset"] == offset and chunk["length"] <= length and chunk["encoding"] == "utf-8", chunk
+        parts.append(chunk["data"])
+        offset, reads = chunk["next_offset"], reads + 1
+    return "".join(parts), reads
+
+
+def check_large_values(server):
+    # Multi-byte TEXT over the threshold: 2, 3 and 4 byte characters, so chunk ends fall mid-character
+    text = "naïve — 東京 😀 " * 400
+    other = "ß" * 5000
+    fake_mysql.install(host_rows={"primary": [
+        {"id": 1, "body": text}, {"id": 2, "body": text}, {"id": 3, "body": "short"}]})
+    with tempfile.TemporaryDirectory() as directory:
+        store = server.BlobStore(Path(directory), threshold=1024, preview_bytes=64, chunk_bytes=1000,
+                                 max_bytes=2 * len(text.encode("utf-8")))
+        client = make_client(server, options={"blob_store": store})
+        rows = client.execute_select("SELECT id, body FROM notes", use_cache=False)["rows"]
+        handle = rows[0]["body"]
+        assert rows[1]["body"] == handle and rows[2]["body"] == "short", rows  # stored once, small values inline
+        assert handle["bytes"] == len(text.encode("utf-8")) and handle["mime_type"] == "text/plain", handle
+        assert handle["encoding"] == "utf-8" and text.startswith(handle["preview"]), handle
+        assert store.stats()["values"] == 1 and store.stats()["stored"] == 1, store.stats()
+
+        # Chunks never split a character: reassembling them gives the value back exactly
+        chunk = client.fetch_value(handle["handle"], 0, 3)  # "na" and the first byte of "ï"
+        assert chunk["data"] == "na" and chunk["length"] == 2 and chunk["next_offset"] == 2, chunk
+        value, reads = read_value(client, handle["handle"], 999)
+        assert value == text and reads > handle["bytes"] // 999, reads
+        # The chunk size is capped at chunk_bytes; a raw byte range can be read as base64
+        assert client.fetch_value(handle["handle"], 0, 10 ** 6)["length"] <= 1000
+        chunk = client.fetch_value(handle["handle"], 7, 3, "base64")
+        assert base64.b64decode(chunk["data"]) == text.encode("utf-8")[7:10], chunk
+        for offset, encoding in ((-1, None), (handle["bytes"] + 1, None), (0, "latin-1")):
+            result = client.fetch_value(handle["handle"], offset, 10, encoding)
+            assert result["error"] and result["code"] == 400, result
+
+        # Storing more than max_bytes evicts the least recently used value; its handle is then stale
+        fake_mysql.install(host_rows={"primary": [{"id": 4, "body": other}, {"id": 5, "body": other + "!"},
+                                                  {"id": 6, "body": other + "?"}]})
+        client = make_client(server, options={"blob_store": store})
+        newest = client.execute_select("SELECT id, body FROM notes", use_cache=False)["rows"][-1]["body"]
+        assert store.stats()["evictions"] >= 1 and not (Path(directory) / handle["handle"][7:]).exists()
+        result = client.fetch_value(handle["handle"])
+        assert result["error"] and result["code"] == 404 and "evicted" in result["message"], result
+        assert read_value(client, newest["handle"], 1000)[0] == other + "?"
+
+
+def check_analyzer(server):
+    # A CTE whose string ends at a different quote when backslashes are not escapes
+    # (sql_mode NO_BACKSLASH_ESCAPES) is classified by the reading that needs a write permission
+    query = "WITH a AS (SELECT '\\') DELETE FROM t -- ') SELECT 1"
+    assert server.analyze(query).operation == "DELETE" and server.detect_operation_type(query) == "DELETE"
+    fake = fake_mysql.install()
+    client = make_client(server)
+    previous = server.config.ENABLE_DELETE
+    server.config.ENABLE_DELETE = False
+    try:
+        result = client.execute_query(query)
+        assert result["error"] and result["code"] == 403, result
+        assert fake.statements == 0, "the statement never reaches the server"
+    finally:
+        server.config.ENABLE_DELETE = previous
+
+    # Backslashes that read the same either way keep the main SELECT
+    for query in ("WITH a AS (SELECT 'a\\\\b') SELECT * FROM a", "WITH a AS (SELECT 'it\\'s') SELECT 1",
+                  "WITH a AS (SELECT '\\\\') SELECT * FROM a -- '"):
+        assert server.analyze(query).operation == "SELECT", query
+
+
+CHECKS = {
+    "replicas": check_replicas,
+    "timeouts": check_timeouts,
+    "explain": check_explain_guard,
+    "export": check_export_preview,
+    "export_timeout": check_export_timeout,
+    "cursors": check_cursor_expiry,
+    "bulk": check_bulk_templates,
+    "bulk_packets": check_bulk_packets,
+    "sessions": check_session_reset,
+    "catalog": check_unknown_database,
+    "fanout": check_fanout,
+    "large_values": check_large_values,
+    "analyzer": check_analyzer,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check MySQL MCP Server failure handling without a database")
+    parser.add_argument("--only", help="Run only the checks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    fake_mysql.install()
+    server = load_server()
+
+    failed = 0
+    for name, check in CHECKS.items():
+        if args.only and args.only not in name:
+            continue
+        try:
+            check(server)
+            print(f"ok      {name}")
+        except Exception:
+            failed += 1
+            print(f"FAILED  {name}")
+            traceback.print_exc()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
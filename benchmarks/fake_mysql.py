@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+"""
+In-process stand-in for mysql.connector used by the benchmarks
+Returns synthetic result sets of a configurable shape without a database or
+network, so only the overhead added by the MCP server is measured
+"""
+import datetime
+import decimal
+import itertools
+import json
+import random
+import re
+import threading
+from collections import Counter
+
+import mysql.connector
+from mysql.connector.constants import FieldType
+
+# Column kinds that can be requested in a result shape, with their MySQL type code
+COLUMN_TYPES = {
+    "int": FieldType.LONGLONG,
+    "varchar": FieldType.VAR_STRING,
+    "decimal": FieldType.NEWDECIMAL,
+    "datetime": FieldType.DATETIME,
+    "date": FieldType.DATE,
+    "time": FieldType.TIME,
+    "double": FieldType.DOUBLE,
+    "blob": FieldType.BLOB,
+}
+
+
+_EXECUTION_TIME_HINT = re.compile(r"MAX_EXECUTION_TIME\((\d+)\)", re.IGNORECASE)
+
+
+class ResultShape:
+    """
+    Shape of the synthetic result returned for every SELECT
+
+    Args:
+        rows: Number of rows
+        columns: Number of columns
+        types: Column kinds from COLUMN_TYPES, repeated to fill all columns
+        blob_size: Size in bytes of every blob value
+        seed: Random seed so runs are comparable
+    """
+    def __init__(self, rows=100, columns=8, types=("int", "varchar", "decimal", "datetime"),
+                 blob_size=256, seed=42):
+        unknown = [kind for kind in types if kind not in COLUMN_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown column types: {', '.join(unknown)}")
+        self.rows = rows
+        self.columns = columns
+        self.types = [types[index % len(types)] for index in range(columns)]
+        self.blob_size = blob_size
+        self.seed = seed
+
+    def description(self):
+        return [
+            (f"col_{index}_{kind}", COLUMN_TYPES[kind], None, None, None, None, 1, 0, 45)
+            for index, kind in enumerate(self.types)
+        ]
+
+    def generate(self):
+        """Build the rows once so generating them is not part of the measurement"""
+        rng = random.Random(self.seed)
+        blob = bytes(rng.getrandbits(8) for _ in range(self.blob_size))
+        base = datetime.datetime(2024, 1, 1)
+        makers = {
+            "int": lambda i: i,
+            "varchar": lambda i: f"value-{i}-{rng.randint(0, 10 ** 6)}",
+            "decimal": lambda i: decimal.Decimal(rng.randint(0, 10 ** 8)) / 100,
+            "datetime": lambda i: base + datetime.timedelta(seconds=i * 37),
+            "date": lambda i: (base + datetime.timedelta(days=i % 3650)).date(),
+            "time": lambda i: datetime.timedelta(seconds=i % 86400),
+            "double": lambda i: rng.random() * 1000,
+            "blob": lambda i: blob,
+        }
+        return [tuple(makers[kind](row) for kind in self.types) for row in range(self.rows)]
+
+
+class FakeCursor:
+    """Unbuffered-style cursor over the precomputed result"""
+    def __init__(self, connection, dictionary=False, **kwargs):
+        self._connection = connection
+        self._dictionary = dictionary
+        self._rows = iter(())
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self._executed = None
+
+    def execute(self, operation, params=None, multi=False):
+        self._executed = operation
+        statement = operation.lstrip().upper()
+        server = self._connection.server
+        server.statements += 1
+        if "@@MAX_ALLOWED_PACKET" in statement:
+            self.description = [("@@max_allowed_packet", FieldType.LONGLONG, None, None, None, None, 0, 0, 63)]
+            self._rows = iter([(server.max_allowed_packet,)])
+            return
+        if statement.startswith(("SHOW REPLICA STATUS", "SHOW SLAVE STATUS")):
+            # Hosts listed in replica_lag report that lag; any other host is not a replica
+            host = self._connection.config.get("host")
+            self.description = [("Seconds_Behind_Source", FieldType.LONGLONG, None, None, None, None, 1, 0, 63)]
+            rows = [(server.replica_lag[host],)] if host in server.replica_lag else []
+            if self._dictionary:
+                rows = [{"Seconds_Behind_Source": row[0]} for row in rows]
+            self._rows = iter(rows)
+            return
+        if statement.startswith("EXPLAIN FORMAT=JSON") and server.explain_plan is not None:
+            server.explains += 1
+            server.explains_by_host[self._connection.config.get("host")] += 1
+            self.description = [("EXPLAIN", FieldType.JSON, None, None, None, None, 0, 0, 63)]
+            self._rows = iter([{"EXPLAIN": json.dumps(server.explain_plan)}] if self._dictionary
+                              else [(json.dumps(server.explain_plan),)])
+            return
+        if "INFORMATION_SCHEMA." in statement and server.indexes is not None:
+            self.description, rows = server.catalog_result(statement, params, self._connection.config.get("database"))
+            if self._dictionary:
+                names = [column[0] for column in self.description]
+                rows = [dict(zip(names, row)) for row in rows]
+            self._rows = iter(rows)
+            return
+        if statement.startswith("SET SESSION"):
+            server.session_statements.append(operation)
+            return
+        if statement.startswith("KILL QUERY"):
+            server.kill(int(statement.split()[2]))
+            return
+        host = self._connection.config.get("host")
+        server.statements_by_host[host] += 1
+        delay = server.host_delays.get(host, server.statement_delay)
+        if delay:
+            self._wait(delay, operation)
+        if statement.startswith(("SELECT", "SHOW", "WITH", "DESCRIBE", "EXPLAIN")):
+            self.description, rows = server.result_for(host)
+            if self._dictionary:
+                names = [column[0] for column in self.description]
+                rows = (dict(zip(names, row)) for row in rows)
+            self._rows = iter(rows)
+            self.rowcount = -1
+            return
+        # Writes report one affected row per VALUES group
+        self.description = None
+        self._rows = iter(())
+        self.rowcount = max(1, operation.count("), (") + 1) if statement.startswith("INSERT") else 1
+        self.lastrowid = next(server.ids) if statement.startswith("INSERT") else None
+        self._connection.in_transaction = True
+
+    def _wait(self, delay, operation):
+        """Take delay seconds like a slow statement, honouring MAX_EXECUTION_TIME hints and KILL QUERY"""
+        hint = _EXECUTION_TIME_HINT.search(operation)
+        limit = int(hint.group(1)) / 1000 if hint else None
+        killed = self._connection.killed
+        if killed.wait(min(delay, limit) if limit is not None else delay):
+            killed.clear()
+            raise mysql.connector.errors.DatabaseError("1317 (70100): Query execution was interrupted", errno=1317)
+        if limit is not None and limit < delay:
+            raise mysql.connector.errors.DatabaseError(
+                "3024 (HY000): Query execution was interrupted, maximum statement execution time exceeded",
+                errno=3024)
+
+    def fetchone(self):
+        row = next(self._rows, None)
+        if row is not None and self.rowcount < 0:
+            self.rowcount = 0
+        return row
+
+    def fetchmany(self, size=1):
+        return list(itertools.islice(self._rows, size))
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        self._rows = iter(())
+
+    @property
+    def column_names(self):
+        return tuple(column[0] for column in self.description or ())
+
+
+class FakeConnection:
+    """Connection object with the subset of the mysql.connector API the server uses"""
+    def __init__(self, server, **config):
+        self.server = server
+        self.config = config
+        self.in_transaction = False
+        self.connection_id = next(server.connection_ids)
+        self.killed = threading.Event()
+        self._closed = False
+        server.live[self.connection_id] = self
+
+    def cursor(self, buffered=None, raw=None, prepared=None, cursor_class=None, dictionary=None, named_tuple=None):
+        return FakeCursor(self, dictionary=bool(dictionary))
+
+    def start_transaction(self, *args, **kwargs):
+        self.in_transaction = True
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if self._closed:
+            raise mysql.connector.errors.InterfaceError("Connection to MySQL is not available")
+
+    def is_connected(self):
+        return not self._closed
+
+    def cmd_reset_connection(self):
+        self.server.resets += 1
+        self.in_transaction = False
+        return True
+
+    def reset_session(self, user_variables=None, session_variables=None):
+        self.cmd_reset_connection()
+
+    def close(self):
+        self._closed = True
+        self.server.live.pop(self.connection_id, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class FakeServer:
+    """Holds the synthetic result and counters shared by all fake connections"""
+    def __init__(self, shape=None, max_allowed_packet=64 * 1024 * 1024, replica_lag=None, down_hosts=(),
+                 statement_delay=0, explain_plan=None, indexes=None, host_delays=None, host_rows=None):
+        self.shape = shape or ResultShape()
+        self.description = self.shape.description()
+        self.rows = self.shape.generate()
+        self.max_allowed_packet = max_allowed_packet
+        # Replication lag in seconds (None: replication stopped) reported per replica host
+        self.replica_lag = dict(replica_lag or {})
+        # Hosts refusing connections, to exercise failover
+        self.down_hosts = set(down_hosts)
+        # Seconds every SELECT and write takes, to exercise statement timeouts
+        self.statement_delay = statement_delay
+        # Host -> seconds overriding statement_delay, to slow down one shard target
+        self.host_delays = dict(host_delays or {})
+        # Host -> list of row dicts returned by that host's SELECTs instead of the shape's rows,
+        # so shard targets return different data
+        self.host_rows = dict(host_rows or {})
+        self.live = {}  # connection id -> FakeConnection, for KILL QUERY
+        # Document returned by EXPLAIN FORMAT=JSON, to exercise the cost guard
+        self.explain_plan = explain_plan
+        self.explains = 0
+        self.explains_by_host = Counter()
+        # Table name -> {index name: [columns]} answering the schema catalog queries, for index advice
+        self.indexes = indexes
+        self.kills = 0
+        self.resets = 0  # COM_RESET_CONNECTION calls
+        self.session_statements = []  # SET SESSION statements, in order
+        self.connections = 0
+        self.statements = 0
+        self.statements_by_host = Counter()
+        self.ids = itertools.count(1)
+        self.connection_ids = itertools.count(1)
+
+    def result_for(self, host):
+        """Description and rows a SELECT returns on host"""
+        rows = self.host_rows.get(host)
+        if rows is None:
+            return self.description, self.rows
+        names = list(rows[0]) if rows else []
+        description = [
+            (name, FieldType.LONGLONG if all(isinstance(row[name], (int, type(None))) for row in rows)
+             else FieldType.VAR_STRING, None, None, None, None, 1, 0, 63)
+            for name in names
+        ]
+        return description, [tuple(row[name] for name in names) for row in rows]
+
+    def catalog_result(self, statement, params, database):
+        """Description and rows of an information_schema query of the schema catalog
+
+        The fake server has one database: the one the connection was opened with.
+        """
+        def result(names, rows):
+            if not params or params[0] != database:
+                rows = []
+            return [(name, FieldType.VAR_STRING, None, None, None, None, 1, 0, 45) for name in names], rows
+
+        if "INFORMATION_SCHEMA.TABLES" in statement:
+            return result(
+                ("table_name", "table_type", "engine", "row_estimate", "data_length", "index_length", "comment"),
+                [(table, "BASE TABLE", "InnoDB", len(self.rows), 0, 0, "") for table in sorted(self.indexes)])
+        if "INFORMATION_SCHEMA.STATISTICS" in statement:
+            return result(
+                ("table_name", "index_name", "non_unique", "column_name", "index_type", "cardinality"),
+                [(table, name, 1, column, "BTREE", None)
+                 for table in sorted(self.indexes) for name in sorted(self.indexes[table])
+                 for column in self.indexes[table][name]])
+        if "INFORMATION_SCHEMA.SCHEMATA" in statement:
+            return result(("schema_name",), [(database,)])
+        return result(("table_name",), [])
+
+    def kill(self, connection_id):
+        self.kills += 1
+        target = self.live.get(connection_id)
+        if target is not None:
+            target.killed.set()
+
+    def connect(self, **config):
+        if config.get("host") in self.down_hosts:
+            raise mysql.connector.errors.DatabaseError(
+                f"2003 (HY000): Can't connect to MySQL server on '{config.get('host')}'", errno=2003)
+        self.connections += 1
+        return FakeConnection(self, **config)
+
+
+def install(shape=None, **kwargs):
+    """
+    Replace mysql.connector.connect with a fake server returning results of the given shape
+
+    Returns:
+        The FakeServer, whose counters show how many connections and statements were made
+    """
+    server = FakeServer(shape, **kwargs)
+    mysql.connector.connect = server.connect
+    return server
@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+"""
+Large column values for MySQL MCP Server
+Replaces BLOB/TEXT values over a size threshold in query results with a handle
+(size, SHA-256, MIME type guess and a short preview) and keeps the value on disk
+under its hash, so it can be read back later in bounded chunks
+"""
+import os
+import re
+import base64
+import codecs
+import hashlib
+import secrets
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from mysql.connector.constants import FieldType
+
+# Column types whose values can be large
+LARGE_VALUE_TYPES = {
+    FieldType.TINY_BLOB, FieldType.MEDIUM_BLOB, FieldType.LONG_BLOB, FieldType.BLOB,
+    FieldType.STRING, FieldType.VAR_STRING, FieldType.VARCHAR, FieldType.JSON, FieldType.GEOMETRY,
+}
+
+HANDLE_PREFIX = "sha256:"
+
+# Leading bytes of common binary formats
+_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"OggS", "audio/ogg"),
+    (b"ID3", "audio/mpeg"),
+)
+
+# Bytes read from the start of a value to guess its type
+_SNIFF_BYTES = 512
+
+_DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# Suffix of the file next to each value holding its MIME type and read encoding
+_TYPE_SUFFIX = ".type"
+
+
+def _utf8_prefix(data, final=False):
+    """Decode data as UTF-8; returns (text, bytes consumed), leaving out a character cut off at the end"""
+    decoder = codecs.getincrementaldecoder("utf-8")("replace")
+    text = decoder.decode(data, final=final)
+    return text, len(data) - len(decoder.getstate()[0])
+
+
+def guess_type(head, text=False):
+    """
+    Guess the MIME type of a value from its first bytes
+
+    Args:
+        head: Leading bytes of the value
+        text: The value is known to be text (a TEXT or JSON column)
+
+    Returns:
+        (mime_type, encoding), where encoding is "utf-8" for text and "base64" for binary data
+    """
+    if not text:
+        for signature, mime_type in _SIGNATURES:
+            if head.startswith(signature):
+                return mime_type, "base64"
+        if b"\x00" in head:
+            return "application/octet-stream", "base64"
+        decoded, consumed = _utf8_prefix(head)
+        # Only a character cut off by the end of head may be left over
+        if "\ufffd" in decoded or len(head) - consumed > 3:
+            return "application/octet-stream", "base64"
+    start = head.lstrip()[:15].lower()
+    if start.startswith((b"{", b"[")):
+        return "application/json", "utf-8"
+    if start.startswith((b"<!doctype html", b"<html")):
+        return "text/html", "utf-8"
+    if start.startswith(b"<?xml"):
+        return "application/xml", "utf-8"
+    return "text/plain", "utf-8"
+
+
+def _too_large(value, threshold):
+    if isinstance(value, (bytes, bytearray)):
+        return len(value) > threshold
+    if isinstance(value, str):
+        # A character takes 1 to 4 bytes in UTF-8; only encode when the length can't tell
+        return len(value) > threshold or (len(value) * 4 > threshold and len(value.encode("utf-8")) > threshold)
+    return False
+
+
+class BlobStore:
+    """
+    Content-addressed store of large column values on disk
+
+    Each value is written once to a file named by its SHA-256, so the same value
+    returned by many rows or queries is stored once. The MIME type and encoding
+    guessed when a value is first stored are kept with it, so reads report the same
+    type as its handles. Values stored by an earlier run stay readable. Beyond
+    max_bytes, the least recently used values are deleted.
+
+    Values are database contents persisted to disk: the directory is created readable
+    by the owner only (0700) and every file is written with mode 0600.
+
+    Args:
+        directory: Directory holding the values
+        threshold: Values larger than this many bytes are replaced by handles (0 disables)
+        preview_bytes: Leading bytes of a value included in its handle
+        chunk_bytes: Maximum bytes returned by one read
+        max_bytes: Maximum total size of the stored values
+    """
+    def __init__(self, directory, threshold, preview_bytes=256, chunk_bytes=1024 * 1024, max_bytes=1024 ** 3):
+        self.directory = Path(directory)
+        self.threshold = threshold
+        self.preview_bytes = preview_bytes
+        self.chunk_bytes = chunk_bytes
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._values = OrderedDict()  # digest -> (size, mime_type, encoding), least recently used first
+        self._total = 0
+        self.stored = 0
+        self.reads = 0
+        self.evictions = 0
+        if threshold:
+            self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # Also restrict a directory that already existed (created by an older version or by hand)
+            self.directory.chmod(0o700)
+            for path in self.directory.iterdir():
+                if _DIGEST_PATTERN.match(path.name):
+                    path.chmod(0o600)
+            files = [path for path in self.directory.iterdir() if _DIGEST_PATTERN.fullmatch(path.name)]
+            for path in sorted(files, key=lambda path: path.stat().st_mtime):
+                size = path.stat().st_size
+                self._values[path.name] = (size, *self._stored_type(path))
+                self._total += size
+            with self._lock:
+                self._evict()
+
+    @staticmethod
+    def _stored_type(path):
+        """MIME type and encoding recorded with a value file of an earlier run"""
+        try:
+            mime_type, encoding = path.with_name(path.name + _TYPE_SUFFIX).read_text("ascii").split()
+            if encoding in ("utf-8", "base64"):
+                return mime_type, encoding
+        except (OSError, ValueError):
+            pass
+        # Stored without its type: guess from the bytes alone
+        with open(path, "rb") as value_file:
+            return guess_type(value_file.read(_SNIFF_BYTES))
+
+    def _evict(self):
+        """Delete the least recently used values beyond max_bytes (the newest one is always kept)"""
+        while self.max_bytes and self._total > self.max_bytes and len(self._values) > 1:
+            digest, (size, _, _) = self._values.popitem(last=False)
+            self._total -= size
+            self.evictions += 1
+            (self.directory / digest).unlink(missing_ok=True)
+            (self.directory / (digest + _TYPE_SUFFIX)).unlink(missing_ok=True)
+
+    def _write(self, path, data):
+        # Unique temporary name: another thread may be storing the same value
+        partial = path.with_name(f"{path.name}.{secrets.token_hex(4)}.part")
+        try:
+            descriptor = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+            with open(descriptor, "wb") as partial_file:
+                partial_file.write(data)
+            os.replace(partial, path)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+    def _store(self, data, mime_type, encoding):
+        """
+        Store a value with its type unless it is already stored
+
+        Returns:
+            (digest, mime_type, encoding); the type recorded when the value was first
+            stored wins, so the same bytes always read back the same way
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._values:
+                self._values.move_to_end(digest)
+                return (digest, *self._values[digest][1:])
+
+        path = self.directory / digest
+        # The type is written first: a value file without one is from an older version
+        self._write(path.with_name(digest + _TYPE_SUFFIX), f"{mime_type} {encoding}".encode("ascii"))
+        self._write(path, data)
+
+        with self._lock:
+            if digest not in self._values:
+                self._values[digest] = (len(data), mime_type, encoding)
+                self._total += len(data)
+                self.stored += 1
+                self._evict()
+            stored = self._values.get(digest)
+        return (digest, *stored[1:]) if stored is not None else (digest, mime_type, encoding)
+
+    def make_handle(self, value):
+        """
+        Store a value and build the handle that replaces it in a result
+
+        Returns:
+            Dict with the handle, size in bytes, MIME type guess, the encoding reads use
+            and a preview of the first preview_bytes bytes (text, or base64 for binary data)
+        """
+        data = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+        mime_type, encoding = guess_type(data[:_SNIFF_BYTES], text=isinstance(value, str))
+        digest = message = None
+        try:
+            digest, mime_type, encoding = self._store(data, mime_type, encoding)
+        except OSError as err:
+            # The preview is still returned; only reading the full value is unavailable
+            message = f"Value could not be stored for mysql_fetch_value: {err}"
+        head = data[:self.preview_bytes]
+        if encoding == "utf-8":
+            preview = _utf8_prefix(head)[0]
+        else:
+            preview = base64.b64encode(head).decode("ascii")
+        handle = {
+            "handle": HANDLE_PREFIX + digest if digest is not None else None,
+            "bytes": len(data),
+            "mime_type": mime_type,
+            "encoding": encoding,
+            "preview": preview,
+            "truncated": True,
+        }
+        if message is not None:
+            handle["message"] = message
+        return handle
+
+    def replacer(self, description, dictionary=True):
+        """
+        Build the function that replaces large values in fetched rows by handles
+
+        Args:
+            description: cursor.description of the result
+            dictionary: Rows are dicts (otherwise tuples in description order)
+
+        Returns:
+            Callable(rows) -> rows, copying only the rows that change, or None when the
+            store is disabled or no column of the result can hold large values
+        """
+        if not self.threshold:
+            return None
+        keys = [column[0] if dictionary else index
+                for index, column in enumerate(description) if column[1] in LARGE_VALUE_TYPES]
+        if not keys:
+            return None
+        threshold = self.threshold
+
+        def replace(rows):
+            result = rows
+            for position, row in enumerate(rows):
+                changed = None
+                for key in keys:
+                    value = row[key]
+                    if _too_large(value, threshold):
+                        if changed is None:
+                            changed = dict(row) if dictionary else list(row)
+                        changed[key] = self.make_handle(value)
+                if changed is not None:
+                    if result is rows:
+                        result = list(rows)
+                    result[position] = changed if dictionary else tuple(changed)
+            return result
+        return replace
+
+    def read(self, handle, offset=0, length=None, encoding=None):
+        """
+        Read a byte range of a stored value, at most chunk_bytes at a time
+
+        Args:
+            handle: Handle of the value ("sha256:<hex digest>")
+            offset: First byte to read
+            length: Bytes to read (chunk_bytes when omitted or larger)
+            encoding: "utf-8" or "base64" (default: the encoding given in the value's handle)
+
+        Returns:
+            Dict with the data and the range it covers. UTF-8 chunks end on a character
+            boundary, so pass next_offset as the following offset.
+
+        Raises:
+            KeyError: If the handle is unknown or its value was evicted
+            ValueError: If the range or encoding is invalid
+        """
+        digest = handle[len(HANDLE_PREFIX):] if handle.startswith(HANDLE_PREFIX) else handle
+        with self._lock:
+            stored = self._values.get(digest)
+            if stored is None:
+                raise KeyError(handle)
+            size, mime_type, stored_encoding = stored
+            self._values.move_to_end(digest)
+        if offset < 0 or offset > size:
+            raise ValueError(f"offset must be between 0 and {size}")
+        if encoding not in (None, "utf-8", "base64"):
+            raise ValueError("encoding must be 'utf-8' or 'base64'")
+        length = min(length, self.chunk_bytes) if length and length > 0 else self.chunk_bytes
+
+        try:
+            with open(self.directory / digest, "rb") as handle_file:
+                handle_file.seek(offset)
+                data = handle_file.read(length)
+        except FileNotFoundError:
+            with self._lock:
+                if self._values.pop(digest, None) is not None:
+                    self._total -= size
+            raise KeyError(handle)
+        self.reads += 1
+
+        encoding = encoding or stored_encoding
+        if encoding == "utf-8":
+            last = offset + len(data) >= size
+            text, consumed = _utf8_prefix(data, final=last)
+            if not consumed and data:
+                # The range is shorter than the character at its start
+                text, consumed = _utf8_prefix(data, final=True)
+        else:
+            text, consumed = base64.b64encode(data).decode("ascii"), len(data)
+        next_offset = offset + consumed
+        return {
+            "handle": HANDLE_PREFIX + digest,
+            "bytes": size,
+            "mime_type": mime_type,
+            "encoding": encoding,
+            "offset": offset,
+            "length": consumed,
+            "data": text,
+            "has_more": next_offset < size,
+            "next_offset": next_offset if next_offset < size else None,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold": self.threshold,
+                "values": len(self._values),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "stored": self.stored,
+                "reads": self.reads,
+                "evictions": self.evictions,
+                "directory": str(self.directory),
+            }
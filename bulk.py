@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Bulk insert support for MySQL MCP Server
+Rewrites a single-row parameterized INSERT into multi-row VALUES batches that
+stay under max_allowed_packet and runs them in one transaction
+"""
+import re
+import time
+import datetime
+import decimal
+
+from analyzer import tokenize
+
+# Bytes of max_allowed_packet kept free for the packet header and command byte;
+# the size estimate itself already counts escaping
+PACKET_HEADROOM = 1024
+
+# Characters the driver escapes with a backslash when it inlines a string
+_ESCAPED_CHARACTERS = re.compile(r"[\\'\"\0\n\r\x1a]")
+
+
+class BulkInsertError(ValueError):
+    """Raised when the INSERT template or the row payload is not usable"""
+
+
+def split_insert_template(query):
+    """
+    Split a single-row INSERT template into the parts around its VALUES row
+
+    The query is tokenized like any other statement, so VALUES and parentheses inside
+    string literals, quoted identifiers and comments are ignored.
+
+    Args:
+        query: INSERT statement with one row of placeholders, e.g.
+               "INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE b = VALUES(b)"
+
+    Returns:
+        Tuple of (prefix, row_template, suffix) where prefix ends with "VALUES ",
+        row_template is the parenthesized row and suffix is whatever follows it
+
+    Raises:
+        BulkInsertError: If there is no VALUES row, more than one row, or a %s
+                         placeholder outside the row (it would get no value per row)
+    """
+    tokens = tokenize(query)
+    depth = 0
+    opening = None
+    for index, (kind, value, _, _, _) in enumerate(tokens):
+        if kind == "punct" and value in ("(", ")"):
+            depth += 1 if value == "(" else -1
+        elif depth == 0 and kind == "word" and value in ("VALUES", "VALUE") \
+                and index + 1 < len(tokens) and tokens[index + 1][:2] == ("punct", "("):
+            opening = index + 1
+            break
+    if opening is None:
+        raise BulkInsertError("Bulk insert requires an INSERT ... VALUES (...) template")
+
+    # Find the parenthesis closing the row template
+    depth = 0
+    for closing in range(opening, len(tokens)):
+        kind, value = tokens[closing][:2]
+        if kind == "punct" and value in ("(", ")"):
+            depth += 1 if value == "(" else -1
+            if depth == 0:
+                break
+    else:
+        raise BulkInsertError("Unbalanced parentheses in the VALUES row template")
+
+    following = tokens[closing + 1:closing + 3]
+    if [token[:2] for token in following] == [("punct", ","), ("punct", "(")]:
+        raise BulkInsertError("The template must have exactly one VALUES row; rows are passed as parameters")
+    start, end = tokens[opening][2], tokens[closing][3]
+    row_template = query[start:end]
+    if "%s" not in row_template:
+        raise BulkInsertError("The VALUES row template must contain %s placeholders")
+    # The driver substitutes every %s, even in literals and comments, so check the raw text
+    if "%s" in query[:start] or "%s" in query[end:]:
+        raise BulkInsertError("%s placeholders are only allowed inside the VALUES row template, "
+                              "which is repeated once per row")
+    return query[:tokens[opening - 1][2]] + "VALUES ", row_template, query[end:]
+
+
+def columns_to_rows(columns):
+    """
+    Convert a columnar payload {"col_a": [...], "col_b": [...]} into row tuples
+
+    Values are taken in the order the columns are given, which must match the
+    order of the placeholders in the template.
+    """
+    if not columns:
+        return []
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) != 1:
+        raise BulkInsertError("All columns of a columnar payload must have the same number of values")
+    return list(zip(*columns.values()))
+
+
+def estimate_value_size(value):
+    """
+    Upper bound of the size of a value once escaped and inlined into the statement text
+
+    Escaping doubles at most every byte, so binary values count twice their length,
+    and so do strings that contain any character that needs escaping.
+    """
+    if value is None:
+        return 4
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 3
+    if isinstance(value, str):
+        size = len(value.encode("utf-8"))
+        return (2 * size if _ESCAPED_CHARACTERS.search(value) else size) + 2
+    if isinstance(value, (int, float, decimal.Decimal)):
+        return 24
+    if isinstance(value, (datetime.date, datetime.time, datetime.timedelta)):
+        return 28
+    return len(str(value)) + 2
+
+
+def plan_chunks(rows, row_template, fixed_size, max_statement_bytes, max_rows):
+    """
+    Group rows into chunks whose statements fit within max_statement_bytes
+
+    Returns:
+        List of (start, end, estimated_bytes) slices into rows
+    """
+    template_overhead = len(row_template) - 2 * row_template.count("%s") + 2  # ", " separator
+    chunks = []
+    start = 0
+    size = fixed_size
+    for index, row in enumerate(rows):
+        row_size = template_overhead + sum(estimate_value_size(value) for value in row)
+        if index > start and (size + row_size > max_statement_bytes or index - start >= max_rows):
+            chunks.append((start, index, size))
+            start = index
+            size = fixed_size
+        size += row_size
+    if start < len(rows):
+        chunks.append((start, len(rows), size))
+    return chunks
+
+
+def run_bulk_insert(conn, query, rows, chunk_rows=1000, commit_per_chunk=False):
+    """
+    Insert rows in multi-row batches on one connection
+
+    Args:
+        conn: Open MySQL connection
+        query: Single-row INSERT template with %s placeholders
+        rows: List of row sequences, one value per placeholder
+        chunk_rows: Maximum number of rows per INSERT statement
+        commit_per_chunk: Commit after every chunk instead of once at the end
+
+    Returns:
+        Dict with affected_rows, per-chunk timings and totals
+
+    Raises:
+        BulkInsertError: If the template or rows are malformed
+        mysql.connector.Error: If a statement fails (the open transaction is rolled back)
+    """
+    prefix, row_template, suffix = split_insert_template(query)
+    placeholders = row_template.count("%s")
+    for index, row in enumerate(rows):
+        if not isinstance(row, (list, tuple)) or len(row) != placeholders:
+            raise BulkInsertError(
+                f"Row {index} has {len(row) if isinstance(row, (list, tuple)) else 'no'} values, "
+                f"expected {placeholders}"
+            )
+
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT @@max_allowed_packet")
+        max_allowed_packet = int(cursor.fetchone()[0])
+        chunks = plan_chunks(
+            rows,
+            row_template,
+            len(prefix) + len(suffix),
+            max_allowed_packet - PACKET_HEADROOM,
+            max(1, chunk_rows),
+        )
+
+        total_affected = 0
+        chunk_results = []
+        committed_rows = 0
+        conn.start_transaction()
+        try:
+            for start, end, estimated_bytes in chunks:
+                chunk_started = time.perf_counter()
+                statement = prefix + ", ".join([row_template] * (end - start)) + suffix
+                flat_params = [value for row in rows[start:end] for value in row]
+                cursor.execute(statement, flat_params)
+                if commit_per_chunk:
+                    conn.commit()
+                    committed_rows = end
+                    conn.start_transaction()
+                total_affected += cursor.rowcount
+                chunk_results.append({
+                    "rows": end - start,
+                    "affected_rows": cursor.rowcount,
+                    "estimated_bytes": estimated_bytes,
+                    "elapsed_ms": round((time.perf_counter() - chunk_started) * 1000, 3),
+                })
+            conn.commit()
+        except Exception as err:
+            conn.rollback()
+            # Let the caller report how far a chunk-committed load got
+            err.committed_rows = committed_rows
+            raise
+    finally:
+        cursor.close()
+
+    return {
+        "affected_rows": total_affected,
+        "rows": len(rows),
+        "chunk_count": len(chunk_results),
+        "max_allowed_packet": max_allowed_packet,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        "chunks": chunk_results,
+    }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+"""
+Result cache for MySQL MCP Server
+In-process TTL/LRU cache for SELECT results with table-level invalidation,
+so repeated lookups within a session skip the round trip to MySQL
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Collapse whitespace so formatting differences map to the same cache entry"""
+    return " ".join(query.split())
+
+
+class _CacheEntry:
+    def __init__(self, value, tables, expires_at):
+        self.value = value
+        self.tables = tables
+        self.expires_at = expires_at
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and invalidation by table name
+
+    Args:
+        max_entries: Maximum number of cached results; least recently used entries are evicted
+        ttl: Seconds a cached result stays valid
+    """
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_table = {}  # table name -> set of cache keys
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        # Bumped on every invalidation so results read before a concurrent write
+        # are not stored after the write already invalidated their tables
+        self.generation = 0
+
+    @staticmethod
+    def make_key(query, params, row_limit=None, result_format="rows"):
+        return normalize_query(query), repr(params), row_limit, result_format
+
+    def _remove(self, key):
+        """Drop an entry and its table index references (lock must be held)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get(self, key):
+        """Return the cached value or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key, value, tables, generation=None):
+        """Store a result under key, tagged with the tables it was read from
+        
+        When generation is given (the value of self.generation before the query ran),
+        the result is skipped if an invalidation happened in the meantime.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._remove(key)
+            self._entries[key] = _CacheEntry(value, frozenset(tables), time.monotonic() + self.ttl)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_tables(self, tables):
+        """Drop every entry that read from any of the given tables"""
+        with self._lock:
+            keys = set()
+            for table in tables:
+                keys.update(self._by_table.get(table.lower(), ()))
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            self.generation += 1
+
+    def clear(self):
+        """Drop all entries (used when a write touches unknown tables, e.g. DDL)"""
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+"""
+Schema catalog for MySQL MCP Server
+Loads tables, columns, indexes and foreign keys of a database from
+information_schema in a handful of bulk queries and caches them with a TTL
+"""
+import time
+import threading
+
+_TABLES_QUERY = """
+    SELECT TABLE_NAME AS table_name, TABLE_TYPE AS table_type, ENGINE AS engine,
+           TABLE_ROWS AS row_estimate, DATA_LENGTH AS data_length,
+           INDEX_LENGTH AS index_length, TABLE_COMMENT AS comment
+    FROM information_schema.TABLES
+    WHERE TABLE_SCHEMA = %s
+    ORDER BY TABLE_NAME
+"""
+
+_COLUMNS_QUERY = """
+    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, COLUMN_TYPE AS column_type,
+           IS_NULLABLE AS is_nullable, COLUMN_KEY AS column_key, COLUMN_DEFAULT AS column_default,
+           EXTRA AS extra, COLUMN_COMMENT AS comment
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = %s
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+_INDEXES_QUERY = """
+    SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name, NON_UNIQUE AS non_unique,
+           COLUMN_NAME AS column_name, INDEX_TYPE AS index_type, CARDINALITY AS cardinality
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = %s
+    ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+"""
+
+_SCHEMA_QUERY = """
+    SELECT SCHEMA_NAME AS schema_name
+    FROM information_schema.SCHEMATA
+    WHERE SCHEMA_NAME = %s
+"""
+
+_FOREIGN_KEYS_QUERY = """
+    SELECT k.TABLE_NAME AS table_name, k.CONSTRAINT_NAME AS constraint_name,
+           k.COLUMN_NAME AS column_name, k.REFERENCED_TABLE_SCHEMA AS referenced_database,
+           k.REFERENCED_TABLE_NAME AS referenced_table, k.REFERENCED_COLUMN_NAME AS referenced_column,
+           r.UPDATE_RULE AS on_update, r.DELETE_RULE AS on_delete
+    FROM information_schema.KEY_COLUMN_USAGE k
+    JOIN information_schema.REFERENTIAL_CONSTRAINTS r
+      ON r.CONSTRAINT_SCHEMA = k.CONSTRAINT_SCHEMA AND r.CONSTRAINT_NAME = k.CONSTRAINT_NAME
+    WHERE k.TABLE_SCHEMA = %s AND k.REFERENCED_TABLE_NAME IS NOT NULL
+    ORDER BY k.TABLE_NAME, k.CONSTRAINT_NAME, k.ORDINAL_POSITION
+"""
+
+
+class SchemaError(Exception):
+    """Raised when the catalog could not be loaded; carries the structured error result"""
+    def __init__(self, result):
+        super().__init__(result.get("message"))
+        self.result = result
+
+
+class SchemaCatalog:
+    """
+    Cached description of the tables of one or more databases
+
+    Args:
+        run_query: Callable (query, params) -> list of row dicts or an error dict
+        default_database: Database used when none is given
+        ttl: Seconds a loaded schema stays valid before it is loaded again
+        miss_reload_interval: find_table reloads a schema to look for a new table only when
+                              it is older than this many seconds
+    """
+    def __init__(self, run_query, default_database=None, ttl=300, miss_reload_interval=10):
+        self.run_query = run_query
+        self.default_database = default_database
+        self.ttl = ttl
+        self.miss_reload_interval = miss_reload_interval
+        self._schemas = {}  # database -> (loaded_at monotonic, loaded_at wall clock, tables)
+        self._load_locks = {}  # database -> lock held while that database is loaded
+        self._generation = 0  # Bumped by invalidate() so loads that started before it are dropped
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._hits = 0
+        self._miss_reloads = 0
+
+    def _query(self, query, database):
+        result = self.run_query(query, [database])
+        if isinstance(result, dict) and result.get("error"):
+            raise SchemaError(result)
+        return result
+
+    def _load(self, database):
+        """Read the whole schema of a database with one query per object kind"""
+        tables = {}
+        for row in self._query(_TABLES_QUERY, database):
+            tables[row["table_name"]] = {
+                "type": row["table_type"],
+                "engine": row["engine"],
+                "row_estimate": row["row_estimate"],
+                "data_length": row["data_length"],
+                "index_length": row["index_length"],
+                "comment": row["comment"] or None,
+                "columns": [],
+                "indexes": [],
+                "foreign_keys": [],
+            }
+        if not tables and not self._query(_SCHEMA_QUERY, database):
+            # information_schema has no error for a missing database, unlike SHOW TABLES FROM
+            raise SchemaError({"error": True, "message": f"Unknown database '{database}'", "code": 1049})
+
+        for row in self._query(_COLUMNS_QUERY, database):
+            table = tables.get(row["table_name"])
+            if table is not None:
+                table["columns"].append({
+                    "name": row["column_name"],
+                    "type": row["column_type"],
+                    "nullable": row["is_nullable"] == "YES",
+                    "key": row["column_key"] or None,
+                    "default": row["column_default"],
+                    "extra": row["extra"] or None,
+                    "comment": row["comment"] or None,
+                })
+
+        for row in self._query(_INDEXES_QUERY, database):
+            table = tables.get(row["table_name"])
+            if table is None:
+                continue
+            indexes = table["indexes"]
+            # Rows come ordered by index then column position, so group consecutive rows
+            if not indexes or indexes[-1]["name"] != row["index_name"]:
+                indexes.append({
+                    "name": row["index_name"],
+                    "unique": not int(row["non_unique"]),
+                    "type": row["index_type"],
+                    "columns": [],
+                    "cardinality": row["cardinality"],
+                })
+            indexes[-1]["columns"].append(row["column_name"])
+
+        for row in self._query(_FOREIGN_KEYS_QUERY, database):
+            table = tables.get(row["table_name"])
+            if table is None:
+                continue
+            foreign_keys = table["foreign_keys"]
+            if not foreign_keys or foreign_keys[-1]["name"] != row["constraint_name"]:
+                foreign_keys.append({
+                    "name": row["constraint_name"],
+                    "columns": [],
+                    "referenced_database": row["referenced_database"],
+                    "referenced_table": row["referenced_table"],
+                    "referenced_columns": [],
+                    "on_update": row["on_update"],
+                    "on_delete": row["on_delete"],
+                })
+            foreign_keys[-1]["columns"].append(row["column_name"])
+            foreign_keys[-1]["referenced_columns"].append(row["referenced_column"])
+
+        return tables
+
+    def _cached(self, database, max_age):
+        """The cached schema of a database if it is younger than max_age seconds, else None"""
+        with self._lock:
+            cached = self._schemas.get(database)
+            if cached is None or time.monotonic() - cached[0] >= max_age:
+                return None
+            self._hits += 1
+            return {"database": database, "loaded_at": cached[1], "tables": cached[2]}
+
+    def _database_lock(self, database):
+        with self._lock:
+            lock = self._load_locks.get(database)
+            if lock is None:
+                lock = self._load_locks[database] = threading.Lock()
+            return lock
+
+    def get(self, database=None, refresh=False, max_age=None):
+        """
+        Return the cached schema of a database, loading it if missing, expired or refresh is set
+
+        Args:
+            max_age: Reload a cached schema older than this many seconds (capped at the TTL)
+
+        Returns:
+            Dict with "database", "loaded_at" (unix time) and "tables" (name -> table description)
+
+        Raises:
+            SchemaError: If one of the information_schema queries failed, or with code 1049
+                         if the database does not exist
+        """
+        database = database or self.default_database
+        max_age = 0 if refresh else self.ttl if max_age is None else min(max_age, self.ttl)
+        schema = self._cached(database, max_age)
+        if schema is not None:
+            return schema
+
+        # One load per database at a time, so concurrent callers don't all hit
+        # information_schema; cached reads and loads of other databases go on meanwhile
+        with self._database_lock(database):
+            # A concurrent caller may have loaded it while we waited
+            schema = self._cached(database, max_age)
+            if schema is not None:
+                return schema
+            with self._lock:
+                generation = self._generation
+            tables = self._load(database)
+            loaded_at = time.time()
+            with self._lock:
+                if generation == self._generation:
+                    self._schemas[database] = (time.monotonic(), loaded_at, tables)
+                self._loads += 1
+            return {"database": database, "loaded_at": loaded_at, "tables": tables}
+
+    def find_table(self, table_name, database=None, refresh=False):
+        """
+        Look up one table, reloading the schema if it is not found (it may be new)
+
+        The reload on a miss only happens when the schema is older than
+        miss_reload_interval, so repeated lookups of names that are not tables (CTEs,
+        derived tables, typos) do not reload the schema every time.
+
+        Returns:
+            Table description dict, or None if the table doesn't exist
+        """
+        schema = self.get(database, refresh)
+        table = lookup_table(schema["tables"], table_name)
+        if table is None and not refresh:
+            reloaded = self.get(database, max_age=self.miss_reload_interval)
+            if reloaded["loaded_at"] != schema["loaded_at"]:
+                with self._lock:
+                    self._miss_reloads += 1
+                table = lookup_table(reloaded["tables"], table_name)
+        return table
+
+    def invalidate(self, database=None):
+        """Forget a cached schema (all databases when database is None), e.g. after DDL"""
+        with self._lock:
+            self._generation += 1
+            if database is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(database, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "databases": len(self._schemas),
+                "loads": self._loads,
+                "hits": self._hits,
+                "miss_reloads": self._miss_reloads,
+                "ttl_seconds": self.ttl,
+            }
+
+
+def lookup_table(tables, table_name):
+    """Exact match first, then case-insensitive (lower_case_table_names servers)"""
+    table = tables.get(table_name)
+    if table is None:
+        lowered = table_name.lower()
+        for name, candidate in tables.items():
+            if name.lower() == lowered:
+                return candidate
+    return table
@@ -7,6 +7,8 @@ and utility classes like the DateTimeEncoder
 import os
 import json
 import datetime
+import decimal
+import tempfile
 from pathlib import Path
 
 # Operation permissions (can be enabled/disabled via environment variables)
@@ -24,9 +26,153 @@ DB_CONFIG = {
     "password": os.environ.get("MYSQL_PASSWORD", "")
 }
 
+# Read replicas: comma separated host[:port] list. SELECTs from mysql_select and
+# mysql_execute_query are spread over them; everything else runs on the primary above
+def _replica_config(endpoint):
+    host, _, port = endpoint.strip().partition(":")
+    return {
+        **DB_CONFIG,
+        "host": host,
+        "port": int(port) if port else DB_CONFIG["port"],
+        "user": os.environ.get("MYSQL_REPLICA_USER", DB_CONFIG["user"]),
+        "password": os.environ.get("MYSQL_REPLICA_PASSWORD", DB_CONFIG["password"]),
+    }
+
+REPLICA_CONFIGS = [_replica_config(endpoint) for endpoint in os.environ.get("MYSQL_REPLICAS", "").split(",")
+                   if endpoint.strip()]
+REPLICA_ROUTING = {
+    "max_lag": float(os.environ.get("MYSQL_REPLICA_MAX_LAG", "30")),  # seconds behind the primary (0 = don't check)
+    "lag_check_interval": float(os.environ.get("MYSQL_REPLICA_LAG_CHECK_INTERVAL", "5")),  # seconds
+    "error_threshold": int(os.environ.get("MYSQL_REPLICA_ERROR_THRESHOLD", "3")),  # consecutive errors before ejection
+    "eject_seconds": float(os.environ.get("MYSQL_REPLICA_EJECT_SECONDS", "30")),
+}
+
+# Shards: comma separated name=host[:port][/database] targets for mysql_fanout_select,
+# e.g. "eu=db-eu:3306/shop,us=db-us/shop". Omitted parts default to the primary's settings.
+def _shard_config(entry):
+    name, _, target = entry.partition("=")
+    endpoint, _, database = target.strip().partition("/")
+    host, _, port = endpoint.partition(":")
+    return name.strip(), {
+        **DB_CONFIG,
+        "host": host or DB_CONFIG["host"],
+        "port": int(port) if port else DB_CONFIG["port"],
+        "database": database or DB_CONFIG["database"],
+        "user": os.environ.get("MYSQL_SHARD_USER", DB_CONFIG["user"]),
+        "password": os.environ.get("MYSQL_SHARD_PASSWORD", DB_CONFIG["password"]),
+    }
+
+SHARD_CONFIGS = dict(_shard_config(entry) for entry in os.environ.get("MYSQL_SHARDS", "").split(",") if entry.strip())
+
+# Connection pool settings
+POOL_CONFIG = {
+    "min_size": int(os.environ.get("MYSQL_POOL_MIN_SIZE", "0")),
+    "max_size": int(os.environ.get("MYSQL_POOL_MAX_SIZE", "10")),
+    "idle_timeout": float(os.environ.get("MYSQL_POOL_IDLE_TIMEOUT", "300")),  # seconds
+    "checkout_timeout": float(os.environ.get("MYSQL_POOL_CHECKOUT_TIMEOUT", "10")),  # seconds
+    "health_check_interval": float(os.environ.get("MYSQL_POOL_HEALTH_CHECK_INTERVAL", "5")),  # seconds
+    "reset_session": os.environ.get("MYSQL_POOL_RESET_SESSION", "true").lower() == "true",
+    # Prepared statements cached per pooled connection (0 = disabled). Session resets
+    # deallocate prepared statements, so with the cache enabled a connection is only reset
+    # after statements that may have changed its session state.
+    "statement_cache_size": int(os.environ.get("MYSQL_STATEMENT_CACHE_SIZE", "0")),
+}
+
+# Distinct query texts whose analysis (statement type, tables, IN placeholders) is memoized
+QUERY_ANALYSIS_CACHE_SIZE = int(os.environ.get("MYSQL_QUERY_ANALYSIS_CACHE_SIZE", "1024"))
+
+# Pad IN (%s) list expansions to power-of-two sizes to limit distinct statement shapes
+IN_LIST_BUCKETING = os.environ.get("MYSQL_IN_LIST_BUCKETING", "false").lower() == "true"
+
+# Result size limits
+MAX_ROWS = int(os.environ.get("MYSQL_MAX_ROWS", "1000"))  # Row cap for unpaged results (0 = unlimited)
+DEFAULT_PAGE_SIZE = int(os.environ.get("MYSQL_DEFAULT_PAGE_SIZE", "100"))
+MAX_RESULT_BYTES = int(os.environ.get("MYSQL_MAX_RESULT_BYTES", "0"))  # Size cap for unpaged results (0 = unlimited)
+CURSOR_TTL = float(os.environ.get("MYSQL_CURSOR_TTL", "300"))  # seconds an idle paged result stays open
+MAX_OPEN_CURSORS = int(os.environ.get("MYSQL_MAX_OPEN_CURSORS", "5"))  # each open cursor holds a pooled connection
+
+# Statement timeouts in seconds (0 = no timeout). MYSQL_TOOL_TIMEOUTS overrides the
+# default per tool, e.g. "mysql_select=10,mysql_bulk_insert=600"
+QUERY_TIMEOUT = float(os.environ.get("MYSQL_QUERY_TIMEOUT", "30"))
+# Exports stream large results to disk, and the statement stays open while the file is
+# written, so they get their own default instead of MYSQL_QUERY_TIMEOUT
+EXPORT_TIMEOUT = float(os.environ.get("MYSQL_EXPORT_TIMEOUT", "0"))
+TOOL_TIMEOUTS = {
+    "mysql_export": EXPORT_TIMEOUT,
+    **{
+        tool.strip(): float(seconds)
+        for tool, _, seconds in (entry.partition("=") for entry in os.environ.get("MYSQL_TOOL_TIMEOUTS", "").split(","))
+        if tool.strip() and seconds.strip()
+    },
+}
+
+# EXPLAIN cost guard for SELECT, UPDATE and DELETE: "off", "warn" (run and attach warnings)
+# or "reject" (refuse statements over the limits). 0 disables a limit.
+EXPLAIN_GUARD = os.environ.get("MYSQL_EXPLAIN_GUARD", "off").lower()
+EXPLAIN_MAX_ROWS = int(os.environ.get("MYSQL_EXPLAIN_MAX_ROWS", "1000000"))  # estimated rows examined
+EXPLAIN_MAX_FULL_SCAN_ROWS = int(os.environ.get("MYSQL_EXPLAIN_MAX_FULL_SCAN_ROWS", "10000"))  # rows per full scan
+EXPLAIN_CACHE_SIZE = int(os.environ.get("MYSQL_EXPLAIN_CACHE_SIZE", "512"))  # plans cached by query fingerprint
+EXPLAIN_CACHE_TTL = float(os.environ.get("MYSQL_EXPLAIN_CACHE_TTL", "300"))  # seconds
+
+# SELECT result cache (opt-in)
+RESULT_CACHE_ENABLED = os.environ.get("MYSQL_RESULT_CACHE_ENABLED", "false").lower() == "true"
+RESULT_CACHE_SIZE = int(os.environ.get("MYSQL_RESULT_CACHE_SIZE", "256"))  # max cached results
+RESULT_CACHE_TTL = float(os.environ.get("MYSQL_RESULT_CACHE_TTL", "60"))  # seconds
+
+# Schema catalog cache (tables, columns, indexes, foreign keys)
+SCHEMA_CACHE_TTL = float(os.environ.get("MYSQL_SCHEMA_CACHE_TTL", "300"))  # seconds
+
+# Result export (mysql_export) settings
+EXPORT_DIR = Path(os.environ.get("MYSQL_EXPORT_DIR", Path(tempfile.gettempdir()) / "mysql-mcp-exports"))
+EXPORT_PREVIEW_ROWS = int(os.environ.get("MYSQL_EXPORT_PREVIEW_ROWS", "5"))  # rows echoed back in the response
+
+# Large column values: BLOB/TEXT values over the threshold are replaced in results by a
+# handle with a short preview and stored by content hash; mysql_fetch_value reads them back
+LARGE_VALUE_THRESHOLD = int(os.environ.get("MYSQL_LARGE_VALUE_THRESHOLD", "0"))  # bytes, 0 disables
+LARGE_VALUE_PREVIEW_BYTES = int(os.environ.get("MYSQL_LARGE_VALUE_PREVIEW_BYTES", "256"))
+LARGE_VALUE_CHUNK_BYTES = int(os.environ.get("MYSQL_LARGE_VALUE_CHUNK_BYTES", str(1024 * 1024)))  # max per fetch
+LARGE_VALUE_STORE_BYTES = int(os.environ.get("MYSQL_LARGE_VALUE_STORE_BYTES", str(1024 ** 3)))  # oldest evicted
+LARGE_VALUE_DIR = Path(os.environ.get("MYSQL_LARGE_VALUE_DIR", Path(tempfile.gettempdir()) / "mysql-mcp-values"))
+
+# Bulk insert settings
+BULK_INSERT_CHUNK_ROWS = int(os.environ.get("MYSQL_BULK_INSERT_CHUNK_ROWS", "1000"))  # max rows per INSERT statement
+
+# Maximum number of tool calls executing against MySQL concurrently
+# (defaults to the pool size so workers never queue for a connection)
+MAX_CONCURRENCY = int(os.environ.get("MYSQL_MAX_CONCURRENCY", str(POOL_CONFIG["max_size"])))
+
+# MCP transport settings
+MCP_TRANSPORT = os.environ.get("MCP_TRANSPORT", "stdio").lower()  # "stdio" or "sse"
+MCP_HOST = os.environ.get("MCP_HOST", "0.0.0.0")
+MCP_PORT = int(os.environ.get("MCP_PORT", "8051"))
+
+# JSON serialization backend for tool responses: "json" (standard library), "orjson"
+# (requires the orjson package) or "auto" (orjson when installed)
+JSON_BACKEND = os.environ.get("MYSQL_JSON_BACKEND", "json").lower()
+
+# Metrics (exposed as the metrics:// resource and, under SSE, at /metrics)
+METRICS_ENABLED = os.environ.get("MYSQL_METRICS_ENABLED", "true").lower() == "true"
+METRICS_MAX_FINGERPRINTS = int(os.environ.get("MYSQL_METRICS_MAX_FINGERPRINTS", "500"))  # distinct queries tracked
+METRICS_FINGERPRINT_LENGTH = int(os.environ.get("MYSQL_METRICS_FINGERPRINT_LENGTH", "200"))  # chars kept per fingerprint
+METRICS_PATH = os.environ.get("MCP_METRICS_PATH", "/metrics")  # Prometheus endpoint under SSE
+
 # Resource loading
 RESOURCES_DIR = Path(__file__).parent / "resources"
 
+def format_timedelta(value):
+    """Format a timedelta (how MySQL TIME columns are returned) as [-]HH:MM:SS[.ffffff]"""
+    total = value.days * 86400 + value.seconds
+    sign = "-" if total < 0 or (total == 0 and value.microseconds < 0) else ""
+    if sign:
+        value = -value
+        total = value.days * 86400 + value.seconds
+    hours, remainder = divmod(total, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    text = f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}"
+    if value.microseconds:
+        text += f".{value.microseconds:06d}"
+    return text
+
 # Custom JSON encoder to handle datetime objects and bytes
 class DateTimeEncoder(json.JSONEncoder):
     """JSON Encoder that properly serializes datetime objects to ISO format strings and bytes to strings"""
@@ -37,8 +183,14 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         elif isinstance(obj, datetime.time):
             return obj.isoformat()
-        elif isinstance(obj, bytes):
+        elif isinstance(obj, datetime.timedelta):
+            return format_timedelta(obj)  # MySQL TIME columns
+        elif isinstance(obj, decimal.Decimal):
+            return str(obj)  # Keep the exact DECIMAL value
+        elif isinstance(obj, (bytes, bytearray)):
             return obj.decode('utf-8', errors='replace')  # Convert bytes to string
+        elif isinstance(obj, (set, frozenset)):
+            return sorted(obj)  # MySQL SET columns
         return super().default(obj)
 
 # Print configuration information on startup
@@ -46,6 +198,21 @@ def print_config():
     """Print the current configuration settings"""
     print(f"MySQL MCP Server Configuration:")
     print(f"- Database: {DB_CONFIG['database']} on {DB_CONFIG['host']}:{DB_CONFIG['port']}")
+    print(f"- Connection pool: {POOL_CONFIG['min_size']}-{POOL_CONFIG['max_size']} connections")
+    if REPLICA_CONFIGS:
+        endpoints = ", ".join(f"{replica['host']}:{replica['port']}" for replica in REPLICA_CONFIGS)
+        print(f"- Read replicas: {endpoints}")
+    if SHARD_CONFIGS:
+        targets = ", ".join(f"{name} ({shard['host']}:{shard['port']}/{shard['database']})"
+                            for name, shard in SHARD_CONFIGS.items())
+        print(f"- Shards: {targets}")
+    print(f"- Row limit: {MAX_ROWS if MAX_ROWS else 'Unlimited'}")
+    print(f"- Query timeout: {f'{QUERY_TIMEOUT:g}s' if QUERY_TIMEOUT else 'None'}")
+    print(f"- EXPLAIN guard: {EXPLAIN_GUARD.capitalize()}")
+    print(f"- Large values: {f'Handles over {LARGE_VALUE_THRESHOLD} bytes' if LARGE_VALUE_THRESHOLD else 'Inline'}")
+    print(f"- Result cache: {'Enabled' if RESULT_CACHE_ENABLED else 'Disabled'}")
+    print(f"- Max concurrent queries: {MAX_CONCURRENCY}")
+    print(f"- Metrics: {'Enabled' if METRICS_ENABLED else 'Disabled'}")
     print(f"- SELECT operations: {'Enabled' if ENABLE_SELECT else 'Disabled'}")
     print(f"- INSERT operations: {'Enabled' if ENABLE_INSERT else 'Disabled'}")
     print(f"- UPDATE operations: {'Enabled' if ENABLE_UPDATE else 'Disabled'}")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+Server-side result cursors for MySQL MCP Server
+Keeps unbuffered cursors open between tool calls so large SELECT results can be
+returned page by page and redeemed with an opaque continuation token
+"""
+import math
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+
+def close_cursor_quietly(cursor):
+    """Close a cursor that may still have unread rows (the driver raises in that case)"""
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+def _rows_only(rows):
+    return {"rows": rows}
+
+
+class _OpenCursor:
+    """An unbuffered cursor and the pooled connection it is reading from"""
+    def __init__(self, conn, cursor, ttl, shape=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.shape = shape or _rows_only
+        self.ttl = ttl
+        self.expires_at = time.monotonic() + ttl
+        self.rows_returned = 0
+        self.pending = []  # Rows read ahead to find out whether more rows exist
+        self.exhausted = False
+        self.lock = threading.Lock()
+
+    def read_page(self, page_size):
+        """Return up to page_size rows and whether more rows are left"""
+        rows = self.pending
+        self.pending = []
+        if len(rows) < page_size + 1 and not self.exhausted:
+            # Read one extra row so we know whether another page exists
+            fetched = self.cursor.fetchmany(page_size + 1 - len(rows))
+            if len(fetched) < page_size + 1 - len(rows):
+                self.exhausted = True
+            rows.extend(fetched)
+        page, self.pending = rows[:page_size], rows[page_size:]
+        self.rows_returned += len(page)
+        self.expires_at = time.monotonic() + self.ttl
+        return page, bool(self.pending)
+
+    def close(self):
+        if not self.exhausted:
+            # Unread rows are still on the wire; the connection cannot be reused
+            self.conn.invalidate()
+        close_cursor_quietly(self.cursor)
+        self.conn.close()
+
+
+class CursorStore:
+    """
+    Registry of open result cursors keyed by continuation token
+
+    Expired cursors are closed by a background thread that runs while any cursor is
+    open, so an abandoned result does not keep its pooled connection (and the metadata
+    lock of the tables it reads) until the next paged call.
+
+    Args:
+        ttl: Seconds an idle cursor stays open before it is closed
+        max_open: Maximum number of cursors kept open; each one holds a pooled
+                  connection, so the least recently used cursor is closed when full
+    """
+    def __init__(self, ttl=300, max_open=5):
+        self.ttl = ttl
+        self.max_open = max(1, max_open)
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._expired = 0
+        self._evicted = 0
+        self._reaper = None  # Thread closing expired cursors, running while any is open
+
+    def _pop_stale(self, make_room=False):
+        """Remove expired cursors, and with make_room the least recently used ones
+        needed to stay below max_open. Must be called with the lock held; returns
+        the cursors to close."""
+        now = time.monotonic()
+        stale = [token for token, cur in self._cursors.items() if cur.expires_at <= now]
+        closing = [self._cursors.pop(token) for token in stale]
+        self._expired += len(closing)
+        while make_room and len(self._cursors) >= self.max_open:
+            closing.append(self._cursors.popitem(last=False)[1])
+            self._evicted += 1
+        return closing
+
+    def _reap(self):
+        """Close cursors as they expire; exits once no cursor is left open"""
+        while True:
+            with self._lock:
+                closing = self._pop_stale()
+                if self._cursors:
+                    delay = min(cur.expires_at for cur in self._cursors.values()) - time.monotonic()
+                else:
+                    self._reaper = None
+                    delay = None
+            for stale in closing:
+                with stale.lock:
+                    stale.close()
+            if delay is None:
+                return
+            time.sleep(max(delay, 0.01))
+
+    def write_timeout(self):
+        """
+        Session net_write_timeout needed to keep an unread result open for the TTL
+
+        While a page sits unread, the server is blocked writing the rest of the result;
+        past net_write_timeout (60s by default) it drops the connection.
+        """
+        return math.ceil(self.ttl) + 1
+
+    def prepare_session(self, conn):
+        """Raise the session's net_write_timeout of a connection about to run a paged query"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SET SESSION net_write_timeout = GREATEST(@@SESSION.net_write_timeout, %s)",
+                           [self.write_timeout()])
+        finally:
+            close_cursor_quietly(cursor)
+
+    def open(self, conn, cursor, page_size, shape=None):
+        """
+        Take ownership of an executed cursor and return its first page
+
+        Args:
+            shape: Callable turning a list of fetched rows into the page dict
+                   (defaults to {"rows": rows})
+
+        Returns:
+            Tuple of (page, continuation_token); the token is None when the result
+            fitted in a single page, in which case the connection is released right away
+        """
+        cur = _OpenCursor(conn, cursor, self.ttl, shape)
+        try:
+            rows, has_more = cur.read_page(page_size)
+        except Exception:
+            cur.close()
+            raise
+        if not has_more:
+            cur.close()
+            return cur.shape(rows), None
+
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            closing = self._pop_stale(make_room=True)
+            self._cursors[token] = cur
+            self._opened += 1
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name="mysql-cursor-reaper", daemon=True)
+                self._reaper.start()
+        for stale in closing:
+            stale.close()
+        return cur.shape(rows), token
+
+    def fetch(self, token, page_size):
+        """
+        Return the next page for a continuation token
+
+        Returns:
+            Tuple of (page, has_more, rows_returned_so_far)
+
+        Raises:
+            KeyError: If the token is unknown or has expired
+        """
+        with self._lock:
+            closing = self._pop_stale()
+            cur = self._cursors.get(token)
+            if cur is not None:
+                self._cursors.move_to_end(token)
+                # Not reaped while this page is being read
+                cur.expires_at = time.monotonic() + cur.ttl
+        for stale in closing:
+            stale.close()
+        if cur is None:
+            raise KeyError(token)
+
+        with cur.lock:
+            try:
+                rows, has_more = cur.read_page(page_size)
+            except Exception:
+                self.close(token)
+                raise
+        if not has_more:
+            self.close(token)
+        return cur.shape(rows), has_more, cur.rows_returned
+
+    def close(self, token):
+        """Close a cursor early; returns False if the token was unknown"""
+        with self._lock:
+            cur = self._cursors.pop(token, None)
+        if cur is None:
+            return False
+        cur.close()
+        return True
+
+    def stats(self):
+        with self._lock:
+            closing = self._pop_stale()
+            open_count = len(self._cursors)
+            result = {
+                "open": open_count,
+                "max_open": self.max_open,
+                "opened": self._opened,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "ttl_seconds": self.ttl,
+            }
+        for stale in closing:
+            stale.close()
+        return result
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""
+Query plan inspection for MySQL MCP Server
+Summarizes EXPLAIN FORMAT=JSON output (estimated rows examined, full table scans),
+checks it against the configured cost limits and derives index suggestions from
+the columns each table is filtered or joined on
+"""
+import re
+
+# Statements EXPLAIN can show a plan for, and that the cost guard checks
+EXPLAINABLE_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+# Access types that read every row of the table or of an index
+_SCAN_ACCESS_TYPES = ("ALL", "index")
+
+# `db`.`table`.`column` (or `table`.`column`) references in an attached condition
+_COLUMN_PATTERN = re.compile(r"(?:`(?:[^`]|``)+`\.)?`((?:[^`]|``)+)`\.`((?:[^`]|``)+)`")
+
+# MySQL identifiers are limited to 64 characters
+_MAX_IDENTIFIER_LENGTH = 64
+
+
+def _number(value, default=0.0):
+    """EXPLAIN reports some numbers as strings ("100.00")"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _record_access(table, accesses, prefix):
+    """Append one table access of the plan; returns the rows produced by the join so far"""
+    rows = _number(table.get("rows_examined_per_scan"))
+    accesses.append({
+        "table": table.get("table_name"),
+        "access_type": table.get("access_type"),
+        "key": table.get("key"),
+        "possible_keys": table.get("possible_keys"),
+        "rows_examined_per_scan": int(rows),
+        # Every row produced by the preceding tables of a nested loop scans this table once
+        "rows_examined": int(prefix * rows),
+        "filtered": _number(table.get("filtered"), None),
+        "condition": table.get("attached_condition"),
+    })
+    return _number(table.get("rows_produced_per_join"), prefix * rows)
+
+
+def _walk(node, accesses):
+    """Collect the table accesses of a plan node and everything below it, in join order"""
+    if isinstance(node, list):
+        for item in node:
+            _walk(item, accesses)
+        return
+    if not isinstance(node, dict):
+        return
+    for key, value in node.items():
+        if key == "nested_loop" and isinstance(value, list):
+            prefix = 1.0
+            for item in value:
+                table = item.get("table") if isinstance(item, dict) else None
+                if isinstance(table, dict):
+                    prefix = _record_access(table, accesses, prefix)
+                    _walk(table, accesses)  # subqueries materialized for this table
+                else:
+                    _walk(item, accesses)
+        elif key == "table" and isinstance(value, dict):
+            _record_access(value, accesses, 1.0)
+            _walk(value, accesses)
+        elif isinstance(value, (dict, list)):
+            _walk(value, accesses)
+
+
+def summarize_plan(plan):
+    """
+    Reduce an EXPLAIN FORMAT=JSON document to the figures the cost guard needs
+
+    Rows examined are estimated per nested loop (rows produced so far times rows
+    examined per scan); dependent subqueries are counted once, so the total is a
+    lower bound for them.
+
+    Returns:
+        Dict with query_cost, rows_examined, full_scans and the per-table accesses
+    """
+    accesses = []
+    _walk(plan, accesses)
+    cost_info = plan.get("query_block", {}).get("cost_info", {}) if isinstance(plan, dict) else {}
+    return {
+        "query_cost": _number(cost_info.get("query_cost"), None),
+        "rows_examined": sum(access["rows_examined"] for access in accesses),
+        "full_scans": [
+            {"table": access["table"], "rows": access["rows_examined_per_scan"]}
+            for access in accesses if access["access_type"] == "ALL"
+        ],
+        "tables": accesses,
+    }
+
+
+def check_plan(summary, max_rows_examined=0, max_full_scan_rows=0):
+    """
+    Compare a plan summary with the cost limits (0 disables a limit)
+
+    Returns:
+        List of messages, one per exceeded limit; empty when the plan is within limits
+    """
+    violations = []
+    if max_rows_examined and summary["rows_examined"] > max_rows_examined:
+        violations.append(f"an estimated {summary['rows_examined']} rows are examined "
+                          f"(limit {max_rows_examined})")
+    if max_full_scan_rows:
+        for scan in summary["full_scans"]:
+            if scan["rows"] > max_full_scan_rows:
+                violations.append(f"full table scan of {scan['table']} over an estimated {scan['rows']} rows "
+                                  f"(limit {max_full_scan_rows})")
+    return violations
+
+
+def attach_warnings(result, warnings):
+    """Add cost guard warnings to a tool result, wrapping a plain row list in {"rows": [...]}"""
+    if isinstance(result, list):
+        return {"rows": result, "row_count": len(result), "warnings": warnings}
+    return {**result, "warnings": warnings}
+
+
+def condition_columns(condition, table):
+    """
+    Columns of one table referenced in an attached condition, in order of appearance
+
+    Returns:
+        List of (column, equality) pairs; equality is True for "=", "<=>" and IN
+        comparisons, which can use any position of an index, and False for ranges
+        and other predicates, which end the usable index prefix
+    """
+    columns = {}
+    lowered = table.lower()
+    for match in _COLUMN_PATTERN.finditer(condition or ""):
+        if match.group(1).replace("``", "`").lower() != lowered:
+            continue
+        column = match.group(2).replace("``", "`")
+        after = condition[match.end():].lstrip().lower()
+        before = condition[:match.start()].rstrip()
+        equality = (after.startswith(("= ", "<=>", "in (")) and not after.startswith("= (select")) \
+            or (before.endswith("=") and not before.endswith(("<=", ">=", "!=")))
+        columns[column] = columns.get(column, False) or equality
+    return list(columns.items())
+
+
+def _index_name(table, columns):
+    return f"idx_{table}_{'_'.join(columns)}"[:_MAX_IDENTIFIER_LENGTH]
+
+
+def suggest_indexes(summary, aliases, table_indexes):
+    """
+    Candidate indexes for the tables a plan reads without a usable index
+
+    For every table scanned in full (or through a full index scan), the columns it is
+    filtered or joined on are ordered equality columns first, then the first range
+    column. When an existing index already starts with those columns, it is reported
+    instead, since the optimizer chose not to use it.
+
+    Args:
+        summary: Result of summarize_plan
+        aliases: Alias -> table name mapping of the query (QueryInfo.aliases)
+        table_indexes: Callable returning the index list of a table from the schema
+                       catalog, or None when the table is unknown
+
+    Returns:
+        List of suggestion dicts, the most expensive scans first
+    """
+    suggestions = []
+    seen = set()
+    for access in sorted(summary["tables"], key=lambda access: access["rows_examined"], reverse=True):
+        if access["access_type"] not in _SCAN_ACCESS_TYPES or not access["table"]:
+            continue
+        columns = condition_columns(access["condition"], access["table"])
+        table = aliases.get(access["table"].lower(), access["table"])
+        if not columns:
+            suggestions.append({
+                "table": table,
+                "rows_examined": access["rows_examined"],
+                "reason": "The table is read in full and no filter or join condition applies to it; "
+                          "an index cannot help until the query restricts it",
+            })
+            continue
+        equality = [column for column, is_equality in columns if is_equality]
+        ranges = [column for column, is_equality in columns if not is_equality]
+        candidate = equality + ranges[:1]
+        if (table, tuple(candidate)) in seen:
+            continue
+        seen.add((table, tuple(candidate)))
+
+        suggestion = {"table": table, "columns": candidate, "rows_examined": access["rows_examined"]}
+        indexes = table_indexes(table)
+        existing = None
+        for index in indexes or ():
+            leading = [column.lower() for column in index["columns"][:len(candidate)] if column]
+            if leading == [column.lower() for column in candidate]:
+                existing = index["name"]
+                break
+        if existing is not None:
+            suggestion["existing_index"] = existing
+            suggestion["reason"] = (f"Index {existing} already covers these columns but the optimizer did not "
+                                    f"use it; its statistics may be stale (ANALYZE TABLE `{table}`) or the "
+                                    "condition may match most rows")
+        else:
+            column_list = ", ".join(f"`{column}`" for column in candidate)
+            suggestion["statement"] = f"CREATE INDEX `{_index_name(table, candidate)}` ON `{table}` ({column_list})"
+            scan = "Full table scan" if access["access_type"] == "ALL" else "Full index scan"
+            suggestion["reason"] = f"{scan} filtered on {', '.join(candidate)}"
+            if indexes is None:
+                suggestion["reason"] += "; existing indexes unknown (table not found in the schema catalog)"
+        suggestions.append(suggestion)
+    return suggestions
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+Result export for MySQL MCP Server
+Streams the rows of an executed SELECT from an unbuffered cursor to a CSV or
+NDJSON file, optionally gzip-compressed, holding only one batch of rows in memory
+"""
+import io
+import os
+import re
+import csv
+import gzip
+import time
+import secrets
+from pathlib import Path
+
+import config
+from bulk import estimate_value_size
+
+EXPORT_FORMATS = ("csv", "ndjson")
+
+# Rows read from the cursor per round trip
+FETCH_BATCH_ROWS = 1000
+
+_FILENAME_PATTERN = re.compile(r"[\w-][\w.-]*")
+
+# One encoder instance serves every row: values are converted exactly like tool responses
+_encoder = config.DateTimeEncoder()
+
+
+class ExportError(Exception):
+    """Raised when an export request is invalid"""
+
+
+def csv_value(value):
+    """Convert a value for a CSV field the way DateTimeEncoder converts it for JSON"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    converted = _encoder.default(value)
+    if isinstance(converted, list):
+        # MySQL SET columns, in their comma separated text form
+        return ",".join(converted)
+    return converted
+
+
+def export_path(directory, filename, export_format, compress):
+    """
+    Path of a new export file inside directory
+
+    Args:
+        filename: Requested file name, or None for a generated unique one. The format's
+                  extension (and .gz when compressing) is appended when missing.
+
+    Raises:
+        ExportError: If filename is not a plain file name
+    """
+    suffix = f".{export_format}.gz" if compress else f".{export_format}"
+    if filename is None:
+        filename = f"export-{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(4)}{suffix}"
+    elif not _FILENAME_PATTERN.fullmatch(filename):
+        raise ExportError("filename may only contain letters, digits, '_', '-' and '.', and cannot start with '.'")
+    elif not filename.endswith(suffix):
+        filename += suffix
+    directory = Path(directory)
+    # Exports are full copies of database contents: readable by the server's user only
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    directory.chmod(0o700)
+    return directory / filename
+
+
+def write_export(cursor, path, export_format="csv", compress=False, max_rows=0, preview_rows=5,
+                 replace_large=None, preview_bytes=0):
+    """
+    Stream the rows of an executed cursor to a file
+
+    Rows go to a ".part" file that is renamed to path once complete, so a failed
+    export never leaves a partial file behind under the final name. The file is
+    created with mode 0600.
+
+    Args:
+        cursor: Executed, non-dictionary cursor of a SELECT
+        path: Destination path (from export_path)
+        export_format: "csv" (with a header row) or "ndjson" (one JSON object per line)
+        compress: Write the file gzip-compressed
+        max_rows: Stop after this many rows (0 for all)
+        preview_rows: Number of leading rows returned in the result
+        replace_large: Callable(rows) -> rows replacing large values by handles in the
+                       preview, as in query results (BlobStore.replacer for tuple rows);
+                       the file always holds the full values
+        preview_bytes: Stop the preview before it exceeds about this many bytes of row
+                       data (0 for no limit), measured after replace_large
+
+    Returns:
+        Dict with the path and file URI, row count, size on disk, columns, a preview of
+        the first rows and whether max_rows cut the export short (in which case unread
+        rows are left on the connection)
+    """
+    columns = list(cursor.column_names)
+    # Unique temporary name: another export may be writing to the same file name
+    partial = path.with_name(f"{path.name}.{secrets.token_hex(4)}.part")
+    started = time.perf_counter()
+    row_count = 0
+    preview = []
+    preview_size = 0
+    truncated = False
+    try:
+        descriptor = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o600)
+        with open(descriptor, "wb") as raw, \
+                io.TextIOWrapper(gzip.GzipFile(fileobj=raw, mode="wb") if compress else raw,
+                                 encoding="utf-8", newline="") as handle:
+            if export_format == "csv":
+                writer = csv.writer(handle)
+                writer.writerow(columns)
+            while not truncated:
+                # With max_rows, read one row past it to tell whether the result was cut short
+                batch_size = min(FETCH_BATCH_ROWS, max_rows - row_count + 1) if max_rows else FETCH_BATCH_ROWS
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                if max_rows and row_count + len(batch) > max_rows:
+                    batch = batch[:max_rows - row_count]
+                    truncated = True
+                if len(preview) < preview_rows:
+                    rows = batch[:preview_rows - len(preview)]
+                    if replace_large is not None:
+                        rows = replace_large(rows)
+                    for row in rows:
+                        preview_size += sum(estimate_value_size(value) for value in row)
+                        if preview_bytes and preview_size > preview_bytes:
+                            # No later row may join the preview either
+                            preview_rows = len(preview)
+                            break
+                        preview.append(dict(zip(columns, row)))
+                if export_format == "csv":
+                    writer.writerows([csv_value(value) for value in row] for row in batch)
+                else:
+                    handle.writelines(_encoder.encode(dict(zip(columns, row))) + "\n" for row in batch)
+                row_count += len(batch)
+        os.replace(partial, path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    path = path.resolve()
+    return {
+        "path": str(path),
+        "uri": path.as_uri(),
+        "format": export_format,
+        "compressed": compress,
+        "row_count": row_count,
+        "bytes": path.stat().st_size,
+        "truncated": truncated,
+        "columns": columns,
+        "preview": preview,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
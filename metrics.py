@@ -0,0 +1,422 @@
+#!/usr/bin/env python
+"""
+Metrics for MySQL MCP Server
+Phase-level latency histograms (checkout, execute, fetch, serialize) per tool and
+per normalized query fingerprint, plus row, byte and error counters, exported as
+a JSON snapshot or in the Prometheus text format
+"""
+import time
+import datetime
+import functools
+import threading
+import contextvars
+from collections import OrderedDict
+
+import config
+from analyzer import analyze
+
+# Phases of a tool call, in the order they happen
+PHASES = ("checkout", "explain", "execute", "fetch", "serialize")
+
+# Histogram bucket upper bounds in seconds (an implicit +Inf bucket follows)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Tool name used for work done outside an instrumented tool call
+NO_TOOL = "none"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (values in seconds)"""
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating inside the bucket that contains it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+    def summary(self):
+        """Count plus sum, mean, percentiles and max in milliseconds"""
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum * 1000, 3),
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50) * 1000, 3),
+            "p95_ms": round(self.quantile(0.95) * 1000, 3),
+            "p99_ms": round(self.quantile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class _Series:
+    """Counters and phase histograms for one tool or one query fingerprint"""
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = {}  # errno -> count
+        self.hosts = {}  # host:port -> statements routed there
+        self.duration = Histogram()
+        self.phases = {}  # phase -> Histogram
+
+    def observe(self, phase, seconds):
+        histogram = self.phases.get(phase)
+        if histogram is None:
+            histogram = self.phases[phase] = Histogram()
+        histogram.observe(seconds)
+
+    def snapshot(self):
+        return {
+            "calls": self.calls,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "errors": {str(errno): count for errno, count in self.errors.items()},
+            "hosts": dict(self.hosts),
+            "duration": self.duration.summary(),
+            "phases": {phase: self.phases[phase].summary() for phase in PHASES if phase in self.phases},
+        }
+
+
+class _Call:
+    """State of the tool call running in the current context"""
+    __slots__ = ("tool", "fingerprint")
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.fingerprint = None
+
+
+_current_call = contextvars.ContextVar("mysql_mcp_current_call", default=None)
+
+
+class _PhaseTimer:
+    __slots__ = ("registry", "phase", "started")
+
+    def __init__(self, registry, phase):
+        self.registry = registry
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.registry.observe(self.phase, time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of tool and query metrics
+
+    Args:
+        enabled: Record anything at all; when False every method is a no-op
+        max_fingerprints: Distinct query fingerprints tracked; the least recently
+                          seen fingerprint is dropped when the limit is reached
+    """
+    def __init__(self, enabled=True, max_fingerprints=500):
+        self.enabled = enabled
+        self.max_fingerprints = max(1, max_fingerprints)
+        self._tools = {}  # tool name -> _Series
+        self._queries = OrderedDict()  # fingerprint -> _Series, least recently seen first
+        self._collectors = []  # callables returning {name: value} gauges
+        self._lock = threading.Lock()
+        self._fingerprints_evicted = 0
+        self._started_at = time.time()
+
+    def _tool_series(self, call):
+        name = call.tool if call is not None else NO_TOOL
+        series = self._tools.get(name)
+        if series is None:
+            series = self._tools[name] = _Series()
+        return series
+
+    def _query_series(self, call):
+        """Series of the current fingerprint, or None (lock must be held)"""
+        if call is None or call.fingerprint is None:
+            return None
+        return self._queries.get(call.fingerprint)
+
+    def instrument(self, func):
+        """Decorator recording call count and total duration of a tool under its function name"""
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return func(*args, **kwargs)
+            call = _Call(name)
+            token = _current_call.set(call)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                _current_call.reset(token)
+                with self._lock:
+                    series = self._tool_series(call)
+                    series.calls += 1
+                    series.duration.observe(elapsed)
+        return wrapper
+
+    def phase(self, name):
+        """Context manager timing one phase of the current tool call"""
+        return _PhaseTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, phase, seconds):
+        """Record the duration of a phase for the current tool and query fingerprint"""
+        if not self.enabled:
+            return
+        call = _current_call.get()
+        with self._lock:
+            self._tool_series(call).observe(phase, seconds)
+            query_series = self._query_series(call)
+            if query_series is not None:
+                query_series.observe(phase, seconds)
+
+    def set_query(self, query):
+        """Attribute the following phases, rows and errors of the current call to query's fingerprint"""
+        if not self.enabled:
+            return
+        call = _current_call.get()
+        if call is None:
+            call = _Call(NO_TOOL)
+            _current_call.set(call)
+        call.fingerprint = analyze(query).fingerprint[:config.METRICS_FINGERPRINT_LENGTH]
+        with self._lock:
+            series = self._queries.get(call.fingerprint)
+            if series is None:
+                series = self._queries[call.fingerprint] = _Series()
+                while len(self._queries) > self.max_fingerprints:
+                    self._queries.popitem(last=False)
+                    self._fingerprints_evicted += 1
+            else:
+                self._queries.move_to_end(call.fingerprint)
+            series.calls += 1
+
+    def record_rows(self, count):
+        """Count rows returned by the current call"""
+        if not self.enabled or not count:
+            return
+        call = _current_call.get()
+        with self._lock:
+            self._tool_series(call).rows += count
+            query_series = self._query_series(call)
+            if query_series is not None:
+                query_series.rows += count
+
+    def record_bytes(self, count):
+        """Count response bytes produced by the current call"""
+        if not self.enabled:
+            return
+        call = _current_call.get()
+        with self._lock:
+            self._tool_series(call).bytes += count
+            query_series = self._query_series(call)
+            if query_series is not None:
+                query_series.bytes += count
+
+    def record_error(self, errno):
+        """Count an error of the current call by MySQL errno (or a short reason when there is none)"""
+        if not self.enabled:
+            return
+        call = _current_call.get()
+        errno = errno if errno is not None else "unknown"
+        with self._lock:
+            series = self._tool_series(call)
+            series.errors[errno] = series.errors.get(errno, 0) + 1
+            query_series = self._query_series(call)
+            if query_series is not None:
+                query_series.errors[errno] = query_series.errors.get(errno, 0) + 1
+
+    def record_route(self, host):
+        """Count a statement of the current call sent to host (primary or replica)"""
+        if not self.enabled:
+            return
+        call = _current_call.get()
+        with self._lock:
+            series = self._tool_series(call)
+            series.hosts[host] = series.hosts.get(host, 0) + 1
+            query_series = self._query_series(call)
+            if query_series is not None:
+                query_series.hosts[host] = query_series.hosts.get(host, 0) + 1
+
+    def add_collector(self, collector):
+        """Register a callable returning {name: number} gauges included in every export"""
+        self._collectors.append(collector)
+
+    def _collect_gauges(self):
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                gauges.update(collector())
+            except Exception:
+                continue
+        return gauges
+
+    def snapshot(self, top_queries=50):
+        """
+        Metrics as a JSON-ready dict
+
+        Args:
+            top_queries: Number of query fingerprints to include, by total time spent
+        """
+        with self._lock:
+            tools = {name: series.snapshot() for name, series in sorted(self._tools.items())}
+            ranked = sorted(self._queries.items(),
+                            key=lambda item: sum(h.sum for h in item[1].phases.values()), reverse=True)
+            queries = [{"fingerprint": key, **series.snapshot()} for key, series in ranked[:top_queries]]
+            tracked = len(self._queries)
+            evicted = self._fingerprints_evicted
+        return {
+            "enabled": self.enabled,
+            "started_at": datetime.datetime.fromtimestamp(self._started_at).isoformat(timespec="seconds"),
+            "uptime_seconds": round(time.time() - self._started_at, 1),
+            "tools": tools,
+            "queries": queries,
+            "fingerprints_tracked": tracked,
+            "fingerprints_evicted": evicted,
+            "gauges": self._collect_gauges(),
+        }
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, hist, **labels):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), hist.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{_labels(**labels, le=_format_number(bound))}}} {cumulative}')
+            lines.append(f"{name}_sum{{{_labels(**labels)}}} {_format_number(hist.sum)}")
+            lines.append(f"{name}_count{{{_labels(**labels)}}} {hist.count}")
+
+        with self._lock:
+            tools = sorted(self._tools.items())
+            queries = list(self._queries.items())
+
+            header("mysql_mcp_tool_calls_total", "counter", "Tool calls")
+            for name, series in tools:
+                lines.append(f"mysql_mcp_tool_calls_total{{{_labels(tool=name)}}} {series.calls}")
+            header("mysql_mcp_tool_duration_seconds", "histogram", "Total tool call duration")
+            for name, series in tools:
+                histogram("mysql_mcp_tool_duration_seconds", series.duration, tool=name)
+            header("mysql_mcp_tool_phase_seconds", "histogram", "Tool call time spent per phase")
+            for name, series in tools:
+                for phase in PHASES:
+                    if phase in series.phases:
+                        histogram("mysql_mcp_tool_phase_seconds", series.phases[phase], tool=name, phase=phase)
+            header("mysql_mcp_tool_rows_total", "counter", "Rows returned by tool calls")
+            for name, series in tools:
+                lines.append(f"mysql_mcp_tool_rows_total{{{_labels(tool=name)}}} {series.rows}")
+            header("mysql_mcp_tool_response_bytes_total", "counter", "Response bytes produced by tool calls")
+            for name, series in tools:
+                lines.append(f"mysql_mcp_tool_response_bytes_total{{{_labels(tool=name)}}} {series.bytes}")
+            header("mysql_mcp_tool_errors_total", "counter", "Tool errors by MySQL errno")
+            for name, series in tools:
+                for errno, count in sorted(series.errors.items(), key=lambda item: str(item[0])):
+                    lines.append(f"mysql_mcp_tool_errors_total{{{_labels(tool=name, errno=errno)}}} {count}")
+
+            header("mysql_mcp_tool_routed_total", "counter", "Statements sent to each MySQL host")
+            for name, series in tools:
+                for host, count in sorted(series.hosts.items()):
+                    lines.append(f"mysql_mcp_tool_routed_total{{{_labels(tool=name, host=host)}}} {count}")
+
+            header("mysql_mcp_query_executions_total", "counter", "Statement executions per query fingerprint")
+            for key, series in queries:
+                lines.append(f"mysql_mcp_query_executions_total{{{_labels(fingerprint=key)}}} {series.calls}")
+            header("mysql_mcp_query_phase_seconds", "histogram", "Time spent per phase per query fingerprint")
+            for key, series in queries:
+                for phase in PHASES:
+                    if phase in series.phases:
+                        histogram("mysql_mcp_query_phase_seconds", series.phases[phase], fingerprint=key, phase=phase)
+            header("mysql_mcp_query_rows_total", "counter", "Rows returned per query fingerprint")
+            for key, series in queries:
+                lines.append(f"mysql_mcp_query_rows_total{{{_labels(fingerprint=key)}}} {series.rows}")
+            header("mysql_mcp_query_errors_total", "counter", "Errors per query fingerprint and MySQL errno")
+            for key, series in queries:
+                for errno, count in sorted(series.errors.items(), key=lambda item: str(item[0])):
+                    lines.append(f"mysql_mcp_query_errors_total{{{_labels(fingerprint=key, errno=errno)}}} {count}")
+
+        for name, value in sorted(self._collect_gauges().items()):
+            metric = f"mysql_mcp_{name}"
+            header(metric, "gauge", name.replace("_", " ").capitalize())
+            lines.append(f"{metric} {_format_number(value)}")
+
+        header("mysql_mcp_uptime_seconds", "gauge", "Seconds since metrics collection started")
+        lines.append(f"mysql_mcp_uptime_seconds {_format_number(round(time.time() - self._started_at, 3))}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded metrics"""
+        with self._lock:
+            self._tools.clear()
+            self._queries.clear()
+            self._fingerprints_evicted = 0
+            self._started_at = time.time()
+
+
+# Process-wide registry used by the server
+registry = MetricsRegistry(enabled=config.METRICS_ENABLED, max_fingerprints=config.METRICS_MAX_FINGERPRINTS)
+
+instrument = registry.instrument
+phase = registry.phase
+set_query = registry.set_query
+record_rows = registry.record_rows
+record_bytes = registry.record_bytes
+record_error = registry.record_error
+record_route = registry.record_route
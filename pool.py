@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+"""
+Connection pool for MySQL MCP Server
+Keeps a bounded set of open MySQL connections so tool calls can reuse them
+instead of paying a full TCP + authentication handshake on every query
+"""
+import time
+import threading
+from collections import OrderedDict
+import mysql.connector
+
+from analyzer import analyze
+
+
+class PoolTimeoutError(mysql.connector.errors.PoolError):
+    """Raised when no connection could be checked out before the checkout timeout"""
+
+
+class _PoolEntry:
+    """Bookkeeping for a single physical connection owned by the pool"""
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        # Prepared statement cursors keyed by (query text, dictionary), least recently used first
+        self.statements = OrderedDict()
+
+
+class PooledConnection:
+    """
+    Proxy around a pooled MySQL connection
+
+    Behaves like the underlying connection (attribute access is delegated) but
+    returns the connection to the pool instead of closing it when used as a
+    context manager or when close() is called.
+
+    The proxy also tracks whether the session state may have changed: any plain
+    cursor can run SET, CREATE TEMPORARY TABLE and the like, while cached prepared
+    statements (unless they assign user variables or take locks) and read_cursor()
+    statements cannot. Only a changed session needs
+    the full reset that also deallocates the cached prepared statements.
+    """
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+        self._discard = False
+        self._session_changed = False
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise mysql.connector.errors.OperationalError("Pooled connection has been returned to the pool")
+        return getattr(self._entry.conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # A connection that raised a driver-level error (lost connection, protocol
+        # error, ...) may be in an unknown state, so never hand it to someone else
+        if exc_type is not None and issubclass(exc_type, (mysql.connector.errors.InterfaceError,
+                                                          mysql.connector.errors.OperationalError)):
+            self._discard = True
+        self.close()
+
+    def invalidate(self):
+        """Mark the connection as unusable so it is closed instead of being reused"""
+        self._discard = True
+
+    def cursor(self, *args, **kwargs):
+        """Plain cursor of the connection; the session is reset when the connection is returned"""
+        self._session_changed = True
+        return self.__getattr__("cursor")(*args, **kwargs)
+
+    def read_cursor(self, **kwargs):
+        """Cursor for statements that leave the session state alone (EXPLAIN, SHOW)"""
+        return self.__getattr__("cursor")(**kwargs)
+
+    def statement_cursor(self, query, dictionary=True):
+        """
+        Return a prepared statement cursor for query, cached on this physical connection
+
+        Args:
+            query: Final query text
+            dictionary: Whether the cursor returns rows as dicts (True) or tuples (False)
+
+        Returns:
+            Tuple of (cursor, query); execute the cursor with the returned query object,
+            since the driver only reuses a prepared statement for the identical string
+        """
+        if "@" in query or analyze(query).locking:
+            # The statement may assign user variables (SELECT @total := ...) or take a
+            # user-level lock (GET_LOCK) that must not stay held on an idle connection
+            self._session_changed = True
+        return self._pool._statement_cursor(self._entry, query, dictionary)
+
+    def drop_statement(self, query, dictionary=True):
+        """Remove a statement from the cache, e.g. when the server cannot prepare it"""
+        cached = self._entry.statements.pop((query, dictionary), None)
+        if cached is not None:
+            _close_quietly(cached[0])
+
+    def close(self):
+        """Return the connection to the pool"""
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry, discard=self._discard, session_changed=self._session_changed)
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe MySQL connection pool
+
+    Args:
+        db_config: Keyword arguments passed to mysql.connector.connect()
+        min_size: Number of connections opened in the background on the first checkout
+                  and kept open afterwards even when unused
+        max_size: Maximum number of connections open at the same time
+        idle_timeout: Seconds an idle connection may sit in the pool before being closed
+        checkout_timeout: Seconds to wait for a free connection before giving up
+        health_check_interval: Connections idle for longer than this many seconds are
+                               pinged before being handed out (0 pings on every checkout)
+        reset_session: Whether to reset session state (variables, temporary tables,
+                       open transactions) when a connection is returned. Resetting also
+                       deallocates prepared statements, so with the statement cache enabled
+                       the reset only runs after a checkout that may have changed the
+                       session (see PooledConnection); otherwise open transactions are
+                       rolled back.
+        statement_cache_size: Prepared statements kept per connection (0 disables the cache)
+    """
+    def __init__(self, db_config, min_size=0, max_size=10, idle_timeout=300,
+                 checkout_timeout=10, health_check_interval=5, reset_session=True,
+                 statement_cache_size=0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_config = db_config
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.reset_session = reset_session
+        self.statement_cache_size = statement_cache_size
+
+        self._idle = []  # LIFO stack of _PoolEntry, most recently used last
+        self._size = 0  # Connections currently open (idle + checked out)
+        self._cond = threading.Condition()
+        self._prefill_started = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._reused = 0
+        self._created = 0
+        self._closed = 0
+        self._evicted_idle = 0
+        self._failed_health_checks = 0
+        self._timeouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._statement_hits = 0
+        self._statement_misses = 0
+        self._statement_evictions = 0
+        self._statement_resets = 0
+
+    @property
+    def name(self):
+        """host:port of the server this pool connects to"""
+        return f"{self.db_config.get('host', 'localhost')}:{self.db_config.get('port', 3306)}"
+
+    def _connect(self):
+        return mysql.connector.connect(**self.db_config)
+
+    def _close_entry(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        """Remove idle connections past idle_timeout, keeping at least min_size open.
+        Must be called with the lock held; returns the entries to close."""
+        if not self.idle_timeout or self.idle_timeout <= 0:
+            return []
+        expired = []
+        # Oldest idle connections sit at the bottom of the stack
+        while self._idle and self._size - len(expired) > self.min_size:
+            entry = self._idle[0]
+            if now - entry.last_used < self.idle_timeout:
+                break
+            expired.append(self._idle.pop(0))
+        self._size -= len(expired)
+        self._evicted_idle += len(expired)
+        self._closed += len(expired)
+        return expired
+
+    def _prefill(self):
+        """Open connections until min_size are open (runs once, after the first checkout)"""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception:
+                # The next checkouts connect on demand and report the error
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                return
+            with self._cond:
+                self._created += 1
+                # Bottom of the stack: recently used connections are handed out first
+                self._idle.insert(0, entry)
+                self._cond.notify()
+
+    def _is_healthy(self, entry, now):
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            entry.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def connection(self):
+        """
+        Check out a connection from the pool
+
+        Returns:
+            PooledConnection usable as a context manager; the connection goes back
+            to the pool when the block exits
+
+        Raises:
+            PoolTimeoutError: If no connection became available within checkout_timeout
+        """
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout if self.checkout_timeout else None
+        waited = False
+
+        with self._cond:
+            prefill = self.min_size > 0 and not self._prefill_started
+            self._prefill_started = True
+        if prefill:
+            # Not opened in __init__, so the server can start while MySQL is unreachable
+            threading.Thread(target=self._prefill, name="mysql-pool-prefill", daemon=True).start()
+
+        while True:
+            with self._cond:
+                expired = self._evict_idle(time.monotonic())
+                entry = None
+                create = False
+                while entry is None and not create:
+                    if self._idle:
+                        entry = self._idle.pop()
+                    elif self._size < self.max_size:
+                        # Reserve the slot before connecting outside the lock
+                        self._size += 1
+                        create = True
+                    else:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self._timeouts += 1
+                            raise PoolTimeoutError(
+                                f"Timed out after {self.checkout_timeout}s waiting for a connection "
+                                f"(pool max_size={self.max_size})"
+                            )
+                        waited = True
+                        self._cond.wait(remaining)
+
+            for stale in expired:
+                self._close_entry(stale)
+
+            if create:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._is_healthy(entry, time.monotonic()):
+                # Dead connection: drop it and try again with the next one
+                self._close_entry(entry)
+                with self._cond:
+                    self._size -= 1
+                    self._closed += 1
+                    self._failed_health_checks += 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                if entry.uses:
+                    self._reused += 1
+                if waited:
+                    wait_time = time.monotonic() - started
+                    self._waits += 1
+                    self._wait_time_total += wait_time
+                    self._wait_time_max = max(self._wait_time_max, wait_time)
+            entry.uses += 1
+            return PooledConnection(self, entry)
+
+    def _statement_cursor(self, entry, query, dictionary=True):
+        """Look up or create the prepared cursor for query on a checked out entry"""
+        # The entry is checked out by the calling thread, so its statements need no lock
+        statements = entry.statements
+        key = (query, dictionary)
+        cached = statements.get(key)
+        hit = cached is not None
+        evicted = []
+        if hit:
+            statements.move_to_end(key)
+        else:
+            cached = (entry.conn.cursor(prepared=True, dictionary=dictionary), query)
+            statements[key] = cached
+            while len(statements) > self.statement_cache_size:
+                evicted.append(statements.popitem(last=False)[1][0])
+        # Closing an evicted cursor deallocates its statement on the server
+        for cursor in evicted:
+            _close_quietly(cursor)
+
+        with self._cond:
+            if hit:
+                self._statement_hits += 1
+            else:
+                self._statement_misses += 1
+            self._statement_evictions += len(evicted)
+        return cached
+
+    def _release(self, entry, discard=False, session_changed=True):
+        """Return a connection to the pool, resetting its session state first"""
+        if not discard:
+            try:
+                if self.reset_session and (session_changed or not self.statement_cache_size):
+                    # COM_RESET_CONNECTION rolls back open transactions and clears
+                    # session variables and temporary tables without re-authenticating
+                    if not entry.conn.cmd_reset_connection():
+                        entry.conn.reset_session()
+                    if entry.statements:
+                        # The reset deallocated the server-side statements
+                        entry.statements.clear()
+                        with self._cond:
+                            self._statement_resets += 1
+                elif entry.conn.in_transaction:
+                    entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._close_entry(entry)
+
+        with self._cond:
+            if discard:
+                self._size -= 1
+                self._closed += 1
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self):
+        """Close all idle connections (checked out connections are closed when returned)"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._closed += len(idle)
+        for entry in idle:
+            self._close_entry(entry)
+
+    def stats(self):
+        """Return pool sizing and usage counters"""
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "checkouts": self._checkouts,
+                "reused": self._reused,
+                "reuse_rate": round(self._reused / self._checkouts, 4) if self._checkouts else 0.0,
+                "created": self._created,
+                "closed": self._closed,
+                "evicted_idle": self._evicted_idle,
+                "failed_health_checks": self._failed_health_checks,
+                "checkout_timeouts": self._timeouts,
+                "waits": self._waits,
+                "wait_time_avg_ms": round(self._wait_time_total / self._waits * 1000, 3) if self._waits else 0.0,
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+            }
+
+    def statement_stats(self):
+        """Return prepared statement cache counters"""
+        with self._cond:
+            lookups = self._statement_hits + self._statement_misses
+            return {
+                "enabled": self.statement_cache_size > 0,
+                "size_per_connection": self.statement_cache_size,
+                "cached": sum(len(entry.statements) for entry in self._idle),
+                "hits": self._statement_hits,
+                "misses": self._statement_misses,
+                "hit_rate": round(self._statement_hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._statement_evictions,
+                "cleared_by_session_reset": self._statement_resets,
+            }
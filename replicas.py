@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Read replica routing for MySQL MCP Server
+Spreads read-only statements over a set of replica connection pools, ejecting
+replicas that fall too far behind the primary or keep failing
+"""
+import time
+import threading
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from pool import ConnectionPool
+
+# Client-side error codes meaning the server could not be reached or the connection broke
+# (CR_CONNECTION_ERROR, CR_CONN_HOST_ERROR, CR_SERVER_GONE_ERROR, CR_SERVER_LOST, ...),
+# plus 503 for a pool checkout timeout
+FAILOVER_CODES = {2002, 2003, 2005, 2006, 2013, 2055, 503}
+
+
+class Replica:
+    """One replica endpoint with its own connection pool and health state"""
+    def __init__(self, pool):
+        self.pool = pool
+        self.name = pool.name
+        self.lag = None  # Seconds behind the primary at the last check (None: unknown or replication stopped)
+        self.lag_checked_at = None
+        self.lag_error = None
+        self.consecutive_errors = 0
+        self.ejected_until = 0.0
+        self.checking = False
+        # Counters exposed through stats()
+        self.routed = 0
+        self.errors = 0
+        self.ejections = 0
+
+
+class ReplicaRouter:
+    """
+    Round-robin router over replica pools with lag and error based ejection
+
+    Args:
+        replica_configs: List of keyword argument dicts for mysql.connector.connect(), one per replica
+        pool_config: Keyword arguments for each replica's ConnectionPool
+        max_lag: Replicas more than this many seconds behind the primary are not used
+                 (0 disables lag checks)
+        lag_check_interval: Seconds between replication lag checks of a replica
+        error_threshold: Consecutive connection errors after which a replica is ejected
+        eject_seconds: Seconds an ejected replica is left alone before being tried again
+    """
+    def __init__(self, replica_configs, pool_config=None, max_lag=30, lag_check_interval=5,
+                 error_threshold=3, eject_seconds=30):
+        self.replicas = [Replica(ConnectionPool(db_config, **(pool_config or {}))) for db_config in replica_configs]
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.error_threshold = max(1, error_threshold)
+        self.eject_seconds = eject_seconds
+        self._next = 0
+        self._lock = threading.Lock()
+        self._fallbacks = 0  # reads sent to the primary because no replica was available
+
+    def choose(self):
+        """
+        Pick the replica for the next read
+
+        Returns:
+            A Replica, or None when no replica is available (the read goes to the primary)
+        """
+        if not self.replicas:
+            return None
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas)
+        order = self.replicas[start:] + self.replicas[:start]
+
+        for replica in order:
+            now = time.monotonic()
+            if replica.ejected_until > now:
+                continue
+            if self.max_lag and self._lag_check_due(replica, now):
+                self._check_lag(replica)
+            if self.max_lag and (replica.lag is None or replica.lag > self.max_lag) and replica.lag_error is None:
+                continue
+            if replica.ejected_until > time.monotonic():
+                continue
+            with self._lock:
+                replica.routed += 1
+            return replica
+
+        with self._lock:
+            self._fallbacks += 1
+        return None
+
+    def _lag_check_due(self, replica, now):
+        """Claim the next lag check of a replica; only one thread checks at a time"""
+        with self._lock:
+            if replica.checking:
+                return False
+            if replica.lag_checked_at is not None and now - replica.lag_checked_at < self.lag_check_interval:
+                return False
+            replica.checking = True
+            return True
+
+    def _check_lag(self, replica):
+        """Read Seconds_Behind_Source from the replica's replication status"""
+        lag = None
+        lag_error = None
+        try:
+            with replica.pool.connection() as conn:
+                cursor = conn.read_cursor(dictionary=True)
+                try:
+                    try:
+                        cursor.execute("SHOW REPLICA STATUS")
+                    except mysql.connector.Error as err:
+                        if err.errno != errorcode.ER_PARSE_ERROR:
+                            raise
+                        # MySQL before 8.0.22
+                        cursor.execute("SHOW SLAVE STATUS")
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+            if not rows:
+                # Not replicating from anything: always in sync with itself
+                lag = 0
+            else:
+                status = rows[0]
+                lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+        except mysql.connector.Error as err:
+            if err.errno in (errorcode.ER_SPECIFIC_ACCESS_DENIED_ERROR, errorcode.ER_ACCESS_DENIED_ERROR):
+                # Missing REPLICATION CLIENT privilege: route without lag information
+                lag_error = str(err)
+            else:
+                self.record_failure(replica)
+        except Exception as err:
+            lag_error = str(err)
+        finally:
+            with self._lock:
+                replica.lag = lag
+                replica.lag_error = lag_error
+                replica.lag_checked_at = time.monotonic()
+                replica.checking = False
+
+    def record_success(self, replica):
+        with self._lock:
+            replica.consecutive_errors = 0
+
+    def record_failure(self, replica):
+        """Count a connection-level failure, ejecting the replica at the error threshold"""
+        with self._lock:
+            replica.errors += 1
+            replica.consecutive_errors += 1
+            if replica.consecutive_errors >= self.error_threshold:
+                replica.ejected_until = time.monotonic() + self.eject_seconds
+                replica.consecutive_errors = 0
+                replica.ejections += 1
+
+    def close(self):
+        for replica in self.replicas:
+            replica.pool.close()
+
+    def stats(self):
+        """Health, lag and routing counters of every replica"""
+        now = time.monotonic()
+        with self._lock:
+            replicas = []
+            for replica in self.replicas:
+                lagging = bool(self.max_lag) and replica.lag_error is None \
+                    and replica.lag_checked_at is not None and (replica.lag is None or replica.lag > self.max_lag)
+                replicas.append({
+                    "host": replica.name,
+                    "available": replica.ejected_until <= now and not lagging,
+                    "lag_seconds": replica.lag,
+                    "lag_checked_seconds_ago": round(now - replica.lag_checked_at, 1)
+                    if replica.lag_checked_at is not None else None,
+                    "lag_error": replica.lag_error,
+                    "ejected_for_seconds": round(replica.ejected_until - now, 1) if replica.ejected_until > now else 0,
+                    "routed": replica.routed,
+                    "errors": replica.errors,
+                    "ejections": replica.ejections,
+                })
+            fallbacks = self._fallbacks
+        for entry, replica in zip(replicas, self.replicas):
+            pool = replica.pool.stats()
+            entry["pool"] = {"size": pool["size"], "in_use": pool["in_use"], "idle": pool["idle"]}
+        return {
+            "max_lag_seconds": self.max_lag,
+            "available": sum(1 for entry in replicas if entry["available"]),
+            "primary_fallbacks": fallbacks,
+            "replicas": replicas,
+        }
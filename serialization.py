@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+Result serialization for MySQL MCP Server
+Builds the compact columnar result format and encodes tool responses to JSON,
+using orjson when it is available
+"""
+import json
+import datetime
+import decimal
+
+from mysql.connector.constants import FieldType
+
+import config
+import metrics
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional dependency
+    orjson = None
+
+if config.JSON_BACKEND == "orjson" and orjson is None:
+    raise ImportError("MYSQL_JSON_BACKEND=orjson requires the orjson package (pip install orjson)")
+
+USE_ORJSON = orjson is not None and config.JSON_BACKEND in ("auto", "orjson")
+
+RESULT_FORMATS = ("rows", "columnar")
+
+_DECIMAL_TYPES = {FieldType.DECIMAL, FieldType.NEWDECIMAL}
+_DATETIME_TYPES = {FieldType.DATE, FieldType.NEWDATE, FieldType.DATETIME, FieldType.TIMESTAMP}
+_BINARY_TYPES = {
+    FieldType.TINY_BLOB, FieldType.MEDIUM_BLOB, FieldType.LONG_BLOB, FieldType.BLOB,
+    FieldType.STRING, FieldType.VAR_STRING, FieldType.VARCHAR, FieldType.GEOMETRY,
+}
+
+
+def _orjson_default(obj):
+    """Fallback for the types orjson does not serialize natively"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return config.format_timedelta(obj)
+    if isinstance(obj, (bytes, bytearray)):
+        return obj.decode("utf-8", errors="replace")
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json(result):
+    """Serialize a tool result to a JSON string with the configured backend"""
+    with metrics.phase("serialize"):
+        if USE_ORJSON:
+            encoded = orjson.dumps(result, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+            metrics.record_bytes(len(encoded))
+            return encoded.decode("utf-8")
+        text = json.dumps(result, cls=config.DateTimeEncoder)
+    # json.dumps escapes non-ASCII characters, so the length is the size in bytes
+    metrics.record_bytes(len(text))
+    return text
+
+
+def _decode_bytes(value):
+    return value.decode("utf-8", errors="replace") if isinstance(value, (bytes, bytearray)) else value
+
+
+def _converter(type_code):
+    """Pick the conversion for a column once, from its type in the cursor description"""
+    if type_code in _DECIMAL_TYPES:
+        return str
+    if type_code in _DATETIME_TYPES:
+        # orjson writes dates natively and faster than isoformat() in Python
+        return None if USE_ORJSON else _isoformat
+    if type_code == FieldType.TIME:
+        return _format_time
+    if type_code == FieldType.SET:
+        return sorted
+    if type_code in _BINARY_TYPES:
+        return _decode_bytes
+    return None
+
+
+def _isoformat(value):
+    return value.isoformat() if isinstance(value, (datetime.date, datetime.time)) else value
+
+
+def _format_time(value):
+    return config.format_timedelta(value) if isinstance(value, datetime.timedelta) else value
+
+
+def column_types(description):
+    """MySQL type names of the columns in a cursor description"""
+    return [FieldType.get_info(column[1]) or str(column[1]) for column in description]
+
+
+def columnar_rows(description, rows):
+    """
+    Convert tuple rows to JSON-ready lists, converting only the columns whose type needs it
+
+    Args:
+        description: cursor.description of the result
+        rows: Sequence of row tuples in description order
+    """
+    converters = [(index, convert) for index, convert in
+                  ((index, _converter(column[1])) for index, column in enumerate(description))
+                  if convert is not None]
+    if not converters:
+        return [list(row) for row in rows]
+
+    result = []
+    for row in rows:
+        values = list(row)
+        for index, convert in converters:
+            value = values[index]
+            if value is not None:
+                values[index] = convert(value)
+        result.append(values)
+    return result
+
+
+def make_shaper(description, result_format):
+    """
+    Build the function that turns fetched rows into the "rows" part of a response
+
+    Returns:
+        Callable(rows) -> dict; for the columnar format the dict also carries
+        the column names and types
+    """
+    if result_format != "columnar":
+        return lambda rows: {"rows": rows}
+    columns = [column[0] for column in description]
+    types = column_types(description)
+    return lambda rows: {"columns": columns, "types": types, "rows": columnar_rows(description, rows)}
@@ -1,13 +1,29 @@
 #!/usr/bin/env python
 import os
 import json
-import re
 import datetime
+import time
 import mysql.connector
+from mysql.connector import errorcode
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 from pathlib import Path
 import config  # Import the config module
+from pool import ConnectionPool, PoolTimeoutError
+from replicas import ReplicaRouter, FAILOVER_CODES
+from workers import offload
+from cursors import CursorStore, close_cursor_quietly
+from cache import ResultCache
+from analyzer import analyze, cache_stats as analysis_cache_stats
+from catalog import SchemaCatalog, SchemaError, lookup_table
+from bulk import BulkInsertError, run_bulk_insert, columns_to_rows, estimate_value_size
+from serialization import RESULT_FORMATS, make_shaper, to_json
+from export import EXPORT_FORMATS, ExportError, export_path, write_export
+from blobs import BlobStore
+from shards import ShardFanOut, FanOutError, check_merge_options, merge_results
+from explain import EXPLAINABLE_STATEMENTS, summarize_plan, check_plan, attach_warnings, suggest_indexes
+import metrics
+from timeouts import ER_QUERY_TIMEOUT, Watchdog, add_execution_time_hint, resolve_timeout, timeout_error
 
 # Load environment variables from .env file if present
 load_dotenv(override=True)  # override=True ensures .env variables take precedence
@@ -15,8 +31,8 @@ load_dotenv(override=True)  # override=True ensures .env variables take preceden
 # Create an MCP server
 mcp = FastMCP(
     name="MySQL MCP Server",
-    host="0.0.0.0",  # only used for SSE transport
-    port=8051,  # only used for SSE transport (set this to any port)
+    host=config.MCP_HOST,  # only used for SSE transport
+    port=config.MCP_PORT,  # only used for SSE transport (set via MCP_PORT)
 )
 
 # Display configuration information
@@ -36,129 +52,837 @@ def get_parameterized_query_examples():
     
 print("Registered resource: examples://parameterized_query_examples")
 
+@mcp.resource("metrics://server")
+def get_server_metrics():
+    """Per-tool and per-query latency histograms by phase, row, byte and error counts"""
+    return metrics.registry.snapshot()
+
+print("Registered resource: metrics://server")
+
 class MySQLClient:
-    def __init__(self, config):
+    def __init__(self, config, pool_config=None, cursor_ttl=300, max_open_cursors=5, result_cache=None,
+                 schema_cache_ttl=300, replica_configs=None, replica_routing=None, explain_cache=None,
+                 blob_store=None):
         self.config = config
+        self.pool = ConnectionPool(config, **(pool_config or {}))
+        # Optional read replicas for SELECTs; None when all traffic goes to the primary
+        self.replicas = ReplicaRouter(replica_configs, pool_config, **(replica_routing or {})) if replica_configs else None
+        self.cursors = CursorStore(ttl=cursor_ttl, max_open=max_open_cursors)
+        self.result_cache = result_cache  # Optional ResultCache for SELECT results
+        self.explain_cache = explain_cache  # Optional ResultCache for EXPLAIN plans, keyed by query fingerprint
+        self.blob_store = blob_store  # Optional BlobStore replacing large column values by handles
+        self.catalog = SchemaCatalog(
+            lambda query, params: self.execute_select(query, params, max_rows=0, use_cache=False, use_replica=False,
+                                                      max_bytes=0, guard=False),
+            default_database=config.get("database"),
+            ttl=schema_cache_ttl,
+        )
     
     def get_connection(self):
-        return mysql.connector.connect(**self.config)
+        """Check out a pooled connection (returned to the pool when the with-block exits)"""
+        return self.pool.connection()
     
-    def _execute(self, query, params=None, operation_type=None):
-        """Internal method to execute queries with permission checking"""
+    def pool_stats(self):
+        return self.pool.stats()
+    
+    def _execute(self, query, params=None, operation_type=None, page_size=None, max_rows=None, use_cache=True,
+                 result_format="rows", use_replica=False, timeout=None, max_bytes=None, guard=True):
+        """Internal method to execute queries with permission checking
+        
+        Result sets are capped at max_rows (config.MAX_ROWS by default, 0 for no cap)
+        and at max_bytes (config.MAX_RESULT_BYTES by default, 0 for no cap). With either
+        cap, rows come in a {"rows", "row_count", "truncated", ...} envelope; without
+        any cap, "rows" results are a plain list of row dicts.
+        Statements running longer than timeout seconds (config.QUERY_TIMEOUT by default,
+        0 for none) are cancelled and reported as a timeout error.
+        With page_size, the first page is returned together with a continuation
+        token that fetch_page() redeems for the following pages.
+        SELECT results are served from the result cache when it is enabled and use_cache is set.
+        result_format "columnar" returns {"columns", "types", "rows"} with rows as arrays.
+        With use_replica, plain (non-locking) SELECTs run on a read replica when one is available.
+        With guard set, SELECT, UPDATE and DELETE statements are checked by the EXPLAIN cost
+        guard first when config.EXPLAIN_GUARD is "warn" or "reject".
+        """
         # Check permission based on operation type
-        if operation_type == "SELECT" and not config.ENABLE_SELECT:
-            return {"error": True, "message": "SELECT operations are disabled", "code": 403}
-        elif operation_type == "INSERT" and not config.ENABLE_INSERT:
-            return {"error": True, "message": "INSERT operations are disabled", "code": 403}
-        elif operation_type == "UPDATE" and not config.ENABLE_UPDATE:
-            return {"error": True, "message": "UPDATE operations are disabled", "code": 403}
-        elif operation_type == "DELETE" and not config.ENABLE_DELETE:
-            return {"error": True, "message": "DELETE operations are disabled", "code": 403}
+        error = check_permission(operation_type)
+        if error:
+            return error
+        
+        # Tables and IN placeholders come from the memoized analysis of the query text
+        info = analyze(query)
         
         # Process IN parameters if params contains lists
         try:
-            if params is not None and isinstance(params, list) and any(isinstance(p, list) for p in params):
-                # Expand any IN clauses with list parameters
-                expanded_query, expanded_params = expand_in_params(query, params)
-                query = expanded_query
-                params = expanded_params
+            query, params = prepare_params(query, params)
         except Exception as e:
             return {"error": True, "message": f"Error processing IN parameters: {str(e)}", "code": 400}
+        
+        # Plain (non-locking) SELECTs may be routed to a read replica
+        routable = use_replica and self.replicas is not None and info.statement == "SELECT" and not info.locking
+        replica = None
+        
+        warnings = None
+        if guard and config.EXPLAIN_GUARD in ("warn", "reject") and info.statement in EXPLAINABLE_STATEMENTS:
+            if routable:
+                # Pick the replica now so the EXPLAIN runs where the read will, not on the primary
+                replica = self.replicas.choose()
+            explained = self.explain(query, params, info, replica=replica)
+            if replica is not None and explained.get("error") and explained.get("code") in FAILOVER_CODES:
+                # The replica is unreachable: EXPLAIN and read on the primary instead
+                self.replicas.record_failure(replica)
+                replica = None
+                routable = False
+                explained = self.explain(query, params, info)
+            # A statement EXPLAIN fails on is left to fail (or not) on its own
+            if not explained.get("error"):
+                violations = check_plan(explained["summary"], config.EXPLAIN_MAX_ROWS,
+                                        config.EXPLAIN_MAX_FULL_SCAN_ROWS)
+                if violations and config.EXPLAIN_GUARD == "reject":
+                    metrics.record_error("explain_guard")
+                    return {
+                        "error": True,
+                        "message": f"Query rejected by the EXPLAIN cost guard: {'; '.join(violations)}. "
+                                   "Use mysql_explain for the plan and index suggestions.",
+                        "code": 400,
+                        "violations": violations,
+                        "plan": explained["summary"],
+                    }
+                warnings = violations or None
+        
+        row_limit = config.MAX_ROWS if max_rows is None else max_rows
+        byte_limit = config.MAX_RESULT_BYTES if max_bytes is None else max_bytes
+        if timeout is None:
+            timeout = config.QUERY_TIMEOUT
+        
+        # Serve repeated reads from the result cache (paged results are never cached)
+        cache_key = None
+        if self.result_cache is not None and use_cache and operation_type == "SELECT" and not page_size:
+            tables = info.tables
+            if tables and info.cacheable:
+                cache_key = self.result_cache.make_key(query, params, row_limit, result_format)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return attach_warnings(cached, warnings) if warnings else cached
+                cache_generation = self.result_cache.generation
+        
+        if routable and replica is None:
+            replica = self.replicas.choose()
+        
+        prepared = operation_type in ("SELECT", "INSERT", "UPDATE", "DELETE")
+        result = self._run(query, params, page_size, row_limit, prepared=prepared, result_format=result_format,
+                           replica=replica, timeout=timeout, byte_limit=byte_limit)
+        if replica is not None:
+            if isinstance(result, dict) and result.get("error") and result.get("code") in FAILOVER_CODES:
+                # The replica is unreachable; reads are safe to retry on the primary
+                self.replicas.record_failure(replica)
+                result = self._run(query, params, page_size, row_limit, prepared=prepared,
+                                   result_format=result_format, timeout=timeout, byte_limit=byte_limit)
+            else:
+                self.replicas.record_success(replica)
+        
+        if isinstance(result, dict) and "affected_rows" in result:
+            self._invalidate_after_write(info.tables, operation_type)
+        elif cache_key is not None and (isinstance(result, list) or "rows" in result and not result.get("truncated")):
+            self.result_cache.put(cache_key, result, tables, generation=cache_generation)
+        
+        if warnings and not (isinstance(result, dict) and result.get("error")):
+            return attach_warnings(result, warnings)
+        return result
+    
+    def _invalidate_after_write(self, written, operation_type):
+        """Drop cached reads and schema information made stale by a statement writing to the given tables"""
+        if operation_type is None:
+            # DDL may have changed table definitions and indexes
+            self.catalog.invalidate()
+            if self.explain_cache is not None:
+                self.explain_cache.clear()
+        
+        if self.result_cache is not None:
+            # A write went through: drop cached reads of the tables it touched
+            if operation_type in ("INSERT", "UPDATE", "DELETE") and written:
+                self.result_cache.invalidate_tables(written)
+            else:
+                # DDL or unrecognized statement: we can't tell what changed
+                self.result_cache.clear()
+    
+    def _run(self, query, params, page_size, row_limit, prepared=False, result_format="rows", replica=None,
+             timeout=0, byte_limit=0):
+        """Run a statement on a pooled connection and shape its result
+        
+        With prepared set (and the statement cache enabled), the statement runs as a
+        server-side prepared statement cached on the pooled connection.
+        With replica set, the statement runs on that replica instead of the primary.
+        With timeout set, an unpaged SELECT carries a MAX_EXECUTION_TIME hint so the server
+        stops it; any other statement is cancelled with KILL QUERY by a Watchdog. Paged
+        results are only watched until their first page is read.
+        """
+        pool = replica.pool if replica is not None else self.pool
+        hinted = False
+        if timeout and not page_size:
+            info = analyze(query)
+            if info.statement == "SELECT":
+                query = add_execution_time_hint(query, info, timeout)
+                hinted = True
+        metrics.set_query(query)
+        metrics.record_route(pool.name)
+        try:
+            with metrics.phase("checkout"):
+                conn = pool.connection()
+        except PoolTimeoutError as err:
+            metrics.record_error("pool_timeout")
+            return {"error": True, "message": str(err), "code": 503}
+        except mysql.connector.Error as err:
+            # Could not open a new connection to the server
+            metrics.record_error(err.errno)
+            return {"error": True, "message": str(err), "code": err.errno}
             
-        with self.get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            try:
-                # Ensure params is a list or tuple, even if None is provided
-                params_list = params if params is not None else []
-                
-                cursor.execute(query, params_list)
+        cursor = None
+        keep_open = False
+        # Paged results hand their cursor to the cursor store, so they never use a cached statement
+        use_prepared = prepared and not page_size and pool.statement_cache_size > 0
+        watchdog = Watchdog(conn, pool.db_config, 0 if hinted else timeout)
+        started = time.perf_counter()
+        try:
+            # Ensure params is a list or tuple, even if None is provided
+            params_list = params if params is not None else []
+            
+            dictionary = result_format != "columnar"
+            with watchdog:
+                with metrics.phase("execute"):
+                    if use_prepared:
+                        cursor, query = conn.statement_cursor(query, dictionary)
+                        try:
+                            cursor.execute(query, params_list)
+                        except mysql.connector.Error as err:
+                            if err.errno != errorcode.ER_UNSUPPORTED_PS:
+                                raise
+                            # This statement type can't be prepared: fall back to the text protocol
+                            conn.drop_statement(query, dictionary)
+                            use_prepared = False
+                            cursor = conn.cursor(dictionary=dictionary)
+                            cursor.execute(query, params_list)
+                    else:
+                        if page_size:
+                            # Pages are read minutes apart; the server must not drop the result meanwhile
+                            self.cursors.prepare_session(conn)
+                        cursor = conn.cursor(dictionary=dictionary)
+                        cursor.execute(query, params_list)
                 
                 # Check if this is a SELECT query that returns data
                 if cursor.description:
-                    results = cursor.fetchall()
-                    return results
+                    # A paged result's cursor store owns the connection from here on
+                    keep_open = bool(page_size)
+                    with metrics.phase("fetch"):
+                        return self._fetch_result(conn, cursor, page_size, row_limit, result_format, byte_limit)
                 else:
                     # For non-SELECT queries, return affected row count
-                    conn.commit()  # Ensure changes are committed
+                    with metrics.phase("execute"):
+                        conn.commit()  # Ensure changes are committed
                     return {"affected_rows": cursor.rowcount}
-            except mysql.connector.Error as err:
-                # Return error information in a structured way
-                return {"error": True, "message": str(err), "code": err.errno}
-            finally:
-                cursor.close()
+        except mysql.connector.Error as err:
+            if watchdog.fired or err.errno == ER_QUERY_TIMEOUT:
+                metrics.record_error("timeout")
+                return timeout_error(timeout, started, err.errno)
+            metrics.record_error(err.errno)
+            # Return error information in a structured way
+            return {"error": True, "message": str(err), "code": err.errno}
+        finally:
+            if not keep_open:
+                # Cached statement cursors stay open for the next checkout of this connection
+                if cursor is not None and not use_prepared:
+                    close_cursor_quietly(cursor)
+                conn.close()
     
-    def execute_query(self, query, params=None):
+    def _fetch_result(self, conn, cursor, page_size, row_limit, result_format, byte_limit=0):
+        """Read and shape the rows of an executed SELECT (the fetch phase of _run)"""
+        dictionary = result_format != "columnar"
+        shape = make_shaper(cursor.description, result_format)
+        # Large BLOB/TEXT values are swapped for handles as soon as rows are read
+        replace_large = self.blob_store.replacer(cursor.description, dictionary) if self.blob_store is not None else None
+        if page_size:
+            page_shape = (lambda rows: shape(replace_large(rows))) if replace_large is not None else shape
+            # The cursor store now owns the connection and releases it
+            # once the result is exhausted, closed or expired
+            page, token = self.cursors.open(conn, cursor, clamp_page_size(page_size), page_shape)
+            metrics.record_rows(len(page["rows"]))
+            return {
+                **page,
+                "row_count": len(page["rows"]),
+                "has_more": token is not None,
+                "continuation_token": token,
+            }
+        
+        if byte_limit:
+            return self._fetch_within_budget(conn, cursor, row_limit, byte_limit, shape, dictionary, replace_large)
+        
+        if not row_limit:
+            results = cursor.fetchall()
+            if replace_large is not None:
+                results = replace_large(results)
+            metrics.record_rows(len(results))
+            return results if dictionary else shape(results)
+        
+        # Read one row past the limit to detect truncation
+        results = cursor.fetchmany(row_limit + 1)
+        if len(results) <= row_limit:
+            if replace_large is not None:
+                results = replace_large(results)
+            metrics.record_rows(len(results))
+            # Capped results always come in the envelope, truncated or not
+            return {**shape(results), "row_count": len(results), "truncated": False}
+        
+        # Drop the rest of the result instead of reading it off the wire
+        conn.invalidate()
+        results = results[:row_limit]
+        if replace_large is not None:
+            results = replace_large(results)
+        metrics.record_rows(row_limit)
+        return {
+            **shape(results),
+            "row_count": row_limit,
+            "truncated": True,
+            "truncated_by": "rows",
+            "row_limit": row_limit,
+            "message": f"Result truncated to {row_limit} rows. Pass page_size to page through the full result.",
+        }
+    
+    def _fetch_within_budget(self, conn, cursor, row_limit, byte_limit, shape, dictionary, replace_large=None):
+        """Fetch rows in batches until the result ends or exceeds row_limit rows or byte_limit bytes
+        
+        With replace_large, rows are measured after large values were replaced by handles.
+        """
+        results = []
+        size = 0
+        truncated_by = None
+        batch_size = min(row_limit + 1, 1000) if row_limit else 1000
+        while truncated_by is None:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            if replace_large is not None:
+                batch = replace_large(batch)
+            for row in batch:
+                if row_limit and len(results) == row_limit:
+                    truncated_by = "rows"
+                    break
+                row_size = sum(estimate_value_size(value) for value in (row.values() if dictionary else row))
+                if size + row_size > byte_limit:
+                    truncated_by = "bytes"
+                    break
+                results.append(row)
+                size += row_size
+        
+        metrics.record_rows(len(results))
+        if truncated_by is None:
+            return {**shape(results), "row_count": len(results), "truncated": False}
+        
+        # Drop the rest of the result instead of reading it off the wire
+        conn.invalidate()
+        limit = f"{row_limit} rows" if truncated_by == "rows" else f"about {byte_limit} bytes"
+        return {
+            **shape(results),
+            "row_count": len(results),
+            "truncated": True,
+            "truncated_by": truncated_by,
+            "row_limit": row_limit,
+            "byte_limit": byte_limit,
+            "message": f"Result truncated to {len(results)} rows ({limit}). "
+                       "Pass page_size to page through the full result.",
+        }
+    
+    def fetch_page(self, token, page_size=None):
+        """Fetch the next page of a result opened with page_size"""
+        try:
+            with metrics.phase("fetch"):
+                page, has_more, rows_returned = self.cursors.fetch(token, clamp_page_size(page_size))
+        except KeyError:
+            return {"error": True, "message": "Unknown or expired continuation token", "code": 404}
+        except mysql.connector.Error as err:
+            metrics.record_error(err.errno)
+            return {"error": True, "message": str(err), "code": err.errno}
+        metrics.record_rows(len(page["rows"]))
+        return {
+            **page,
+            "row_count": len(page["rows"]),
+            "rows_returned": rows_returned,
+            "has_more": has_more,
+            "continuation_token": token if has_more else None,
+        }
+    
+    def close_cursor(self, token):
+        """Close a paged result before it is exhausted"""
+        return {"closed": self.cursors.close(token)}
+    
+    def fetch_value(self, handle, offset=0, length=None, encoding=None):
+        """Read a chunk of a large column value replaced by a handle in an earlier result"""
+        if self.blob_store is None or not self.blob_store.threshold:
+            return {"error": True, "message": "Large value handles are disabled (set MYSQL_LARGE_VALUE_THRESHOLD)",
+                    "code": 400}
+        try:
+            with metrics.phase("fetch"):
+                return self.blob_store.read(handle, offset, length, encoding)
+        except KeyError:
+            return {"error": True, "message": "Unknown or evicted handle; run the query again "
+                                              "(with use_cache=false) for a new one", "code": 404}
+        except ValueError as err:
+            return {"error": True, "message": str(err), "code": 400}
+    
+    def execute_query(self, query, params=None, page_size=None, use_cache=True, result_format="rows",
+                      use_replica=True, timeout=None):
         """Execute a query with auto-detection of operation type"""
-        # Simple operation type detection (not foolproof but works for most cases)
-        query_upper = query.strip().upper()
-        
-        if query_upper.startswith("SELECT") or query_upper.startswith("SHOW") or query_upper.startswith("DESCRIBE"):
-            operation_type = "SELECT"
-        elif query_upper.startswith("INSERT"):
-            operation_type = "INSERT"
-        elif query_upper.startswith("UPDATE"):
-            operation_type = "UPDATE"
-        elif query_upper.startswith("DELETE"):
-            operation_type = "DELETE"
-        else:
-            # For other operations like CREATE, ALTER, etc. - allow execution without specific permission check
-            operation_type = None
-            
-        return self._execute(query, params, operation_type)
+        operation_type = detect_operation_type(query)
+        return self._execute(query, params, operation_type, page_size=page_size, use_cache=use_cache,
+                             result_format=result_format, use_replica=use_replica, timeout=timeout)
     
-    def execute_select(self, query, params=None):
-        """Execute a SELECT query"""
-        return self._execute(query, params, "SELECT")
+    def execute_select(self, query, params=None, page_size=None, max_rows=None, use_cache=True, result_format="rows",
+                       use_replica=True, timeout=None, max_bytes=None, guard=True):
+        """Execute a SELECT query (on a read replica when replicas are configured)"""
+        return self._execute(query, params, "SELECT", page_size=page_size, max_rows=max_rows, use_cache=use_cache,
+                             result_format=result_format, use_replica=use_replica, timeout=timeout,
+                             max_bytes=max_bytes, guard=guard)
     
-    def execute_insert(self, query, params=None):
+    def execute_insert(self, query, params=None, timeout=None):
         """Execute an INSERT query"""
-        return self._execute(query, params, "INSERT")
+        return self._execute(query, params, "INSERT", timeout=timeout)
     
-    def execute_update(self, query, params=None):
+    def execute_update(self, query, params=None, timeout=None):
         """Execute an UPDATE query"""
-        return self._execute(query, params, "UPDATE")
+        return self._execute(query, params, "UPDATE", timeout=timeout)
     
-    def execute_delete(self, query, params=None):
+    def execute_delete(self, query, params=None, timeout=None):
         """Execute a DELETE query"""
-        return self._execute(query, params, "DELETE")
+        return self._execute(query, params, "DELETE", timeout=timeout)
+    
+    def execute_transaction(self, steps, timeout=None):
+        """
+        Run an ordered list of {"query", "params"} steps in one transaction on one connection
+        
+        Every step is classified and permission checked before anything runs. The
+        transaction is rolled back at the first failing step, or when all steps together
+        run longer than timeout seconds (config.QUERY_TIMEOUT by default, 0 for none).
+        """
+        if not steps:
+            return {"error": True, "message": "At least one step is required", "code": 400}
+        
+        prepared_steps = []
+        for index, step in enumerate(steps):
+            if not isinstance(step, dict) or not isinstance(step.get("query"), str):
+                return {"error": True, "message": f"Step {index} must be an object with a 'query' string",
+                        "code": 400, "failed_step": index}
+            query = step["query"]
+            info = analyze(query)
+            operation_type = info.operation
+            if operation_type is None:
+                # DDL would implicitly commit and break atomicity
+                return {"error": True, "message": f"Step {index}: only SELECT, INSERT, UPDATE and DELETE "
+                        "statements can run in a transaction", "code": 400, "failed_step": index}
+            error = check_permission(operation_type)
+            if error:
+                return {**error, "failed_step": index}
+            try:
+                query, params = prepare_params(query, step.get("params"))
+            except Exception as e:
+                return {"error": True, "message": f"Step {index}: error processing IN parameters: {str(e)}",
+                        "code": 400, "failed_step": index}
+            prepared_steps.append((query, params if params is not None else [], operation_type, info.tables))
+        
+        metrics.record_route(self.pool.name)
+        try:
+            with metrics.phase("checkout"):
+                conn = self.get_connection()
+        except PoolTimeoutError as err:
+            metrics.record_error("pool_timeout")
+            return {"error": True, "message": str(err), "code": 503}
+        
+        results = []
+        started = time.perf_counter()
+        # One watchdog bounds the whole transaction, not each step
+        watchdog = Watchdog(conn, self.pool.db_config, config.QUERY_TIMEOUT if timeout is None else timeout)
+        with conn:
+            try:
+                with watchdog:
+                    conn.start_transaction()
+                    for index, (query, params, operation_type, _) in enumerate(prepared_steps):
+                        step_started = time.perf_counter()
+                        metrics.set_query(query)
+                        cursor = conn.cursor(dictionary=True)
+                        try:
+                            with metrics.phase("execute"):
+                                cursor.execute(query, params)
+                            step_result = {"step": index, "operation": operation_type}
+                            if cursor.description:
+                                with metrics.phase("fetch"):
+                                    rows = cursor.fetchmany(config.MAX_ROWS + 1) if config.MAX_ROWS else cursor.fetchall()
+                                    if config.MAX_ROWS and len(rows) > config.MAX_ROWS:
+                                        # Read past the rest so the connection can run the next step
+                                        while cursor.fetchmany(1000):
+                                            pass
+                                        rows = rows[:config.MAX_ROWS]
+                                        step_result["truncated"] = True
+                                    if self.blob_store is not None:
+                                        replace_large = self.blob_store.replacer(cursor.description)
+                                        if replace_large is not None:
+                                            rows = replace_large(rows)
+                                metrics.record_rows(len(rows))
+                                step_result["rows"] = rows
+                                step_result["row_count"] = len(rows)
+                            else:
+                                step_result["affected_rows"] = cursor.rowcount
+                                if cursor.lastrowid:
+                                    step_result["last_insert_id"] = cursor.lastrowid
+                        finally:
+                            close_cursor_quietly(cursor)
+                        step_result["elapsed_ms"] = round((time.perf_counter() - step_started) * 1000, 3)
+                        results.append(step_result)
+                    with metrics.phase("execute"):
+                        conn.commit()
+            except mysql.connector.Error as err:
+                try:
+                    conn.rollback()
+                except mysql.connector.Error:
+                    conn.invalidate()
+                if watchdog.fired:
+                    metrics.record_error("timeout")
+                    return timeout_error(watchdog.timeout, started, err.errno, failed_step=len(results),
+                                         rolled_back=True, steps=results)
+                metrics.record_error(err.errno)
+                return {
+                    "error": True,
+                    "message": str(err),
+                    "code": err.errno,
+                    "failed_step": len(results),
+                    "rolled_back": True,
+                    "steps": results,
+                }
+        
+        for _, _, operation_type, tables in prepared_steps:
+            if operation_type != "SELECT":
+                self._invalidate_after_write(tables, operation_type)
+        
+        return {
+            "committed": True,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            "steps": results,
+        }
+    
+    def execute_bulk_insert(self, query, rows, chunk_rows=None, commit_per_chunk=False, timeout=None):
+        """Insert many rows with multi-row INSERT batches in one transaction
+        
+        The whole load is cancelled once it runs longer than timeout seconds
+        (config.QUERY_TIMEOUT by default, 0 for none).
+        """
+        if not config.ENABLE_INSERT:
+            return {"error": True, "message": "INSERT operations are disabled", "code": 403}
+        if not rows:
+            return {"affected_rows": 0, "rows": 0, "chunk_count": 0, "chunks": []}
+        
+        metrics.set_query(query)
+        metrics.record_route(self.pool.name)
+        try:
+            with metrics.phase("checkout"):
+                conn = self.get_connection()
+        except PoolTimeoutError as err:
+            metrics.record_error("pool_timeout")
+            return {"error": True, "message": str(err), "code": 503}
+        
+        started = time.perf_counter()
+        watchdog = Watchdog(conn, self.pool.db_config, config.QUERY_TIMEOUT if timeout is None else timeout)
+        try:
+            with conn, watchdog, metrics.phase("execute"):
+                result = run_bulk_insert(
+                    conn,
+                    query,
+                    rows,
+                    chunk_rows=chunk_rows or config.BULK_INSERT_CHUNK_ROWS,
+                    commit_per_chunk=commit_per_chunk,
+                )
+        except BulkInsertError as err:
+            return {"error": True, "message": str(err), "code": 400}
+        except mysql.connector.Error as err:
+            if watchdog.fired:
+                metrics.record_error("timeout")
+                result = timeout_error(watchdog.timeout, started, err.errno)
+            else:
+                metrics.record_error(err.errno)
+                result = {"error": True, "message": str(err), "code": err.errno}
+            committed_rows = getattr(err, "committed_rows", 0)
+            if commit_per_chunk:
+                result["committed_rows"] = committed_rows
+            if not committed_rows:
+                return result
+        
+        if self.result_cache is not None:
+            self.result_cache.invalidate_tables(analyze(query).tables)
+        return result
+    
+    def explain(self, query, params=None, info=None, refresh=False, replica=None):
+        """
+        Run EXPLAIN FORMAT=JSON for a statement whose IN lists are already expanded
+        
+        Plans are cached by the fingerprint of the query (info, the analysis of the
+        query before expansion, defaults to the analysis of query), so statements
+        differing only in their literals or parameters share one EXPLAIN.
+        
+        With replica set, the EXPLAIN runs on that read replica instead of the primary.
+        
+        Returns:
+            Dict with the raw "plan" and its "summary" (see explain.summarize_plan),
+            or an error dict
+        """
+        info = info or analyze(query)
+        cache_key = info.fingerprint
+        if self.explain_cache is not None and not refresh:
+            cached = self.explain_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        metrics.set_query(query)
+        try:
+            pool = replica.pool if replica is not None else self.pool
+            with metrics.phase("explain"), pool.connection() as conn:
+                cursor = conn.read_cursor()
+                try:
+                    cursor.execute(f"EXPLAIN FORMAT=JSON {query}", params if params is not None else [])
+                    rows = cursor.fetchall()
+                finally:
+                    close_cursor_quietly(cursor)
+        except PoolTimeoutError as err:
+            return {"error": True, "message": str(err), "code": 503}
+        except mysql.connector.Error as err:
+            return {"error": True, "message": str(err), "code": err.errno}
+        
+        document = rows[0][0] if rows else "{}"
+        if isinstance(document, (bytes, bytearray)):
+            document = document.decode("utf-8")
+        try:
+            plan = json.loads(document)
+        except (TypeError, ValueError):
+            return {"error": True, "message": "EXPLAIN did not return a JSON plan", "code": 500}
+        result = {"plan": plan, "summary": summarize_plan(plan)}
+        if self.explain_cache is not None:
+            self.explain_cache.put(cache_key, result, info.tables)
+        return result
+    
+    def advise_indexes(self, query, params=None, database=None):
+        """EXPLAIN a statement and suggest indexes for the tables it scans in full"""
+        info = analyze(query)
+        if info.statement not in EXPLAINABLE_STATEMENTS:
+            return {"error": True, "message": "Only SELECT, UPDATE and DELETE statements can be explained",
+                    "code": 400}
+        error = check_permission(info.operation)
+        if error:
+            return error
+        try:
+            expanded, params = prepare_params(query, params)
+        except Exception as e:
+            return {"error": True, "message": f"Error processing IN parameters: {str(e)}", "code": 400}
+        
+        explained = self.explain(expanded, params, info)
+        if explained.get("error"):
+            return explained
+        
+        def table_indexes(table):
+            try:
+                found = self.catalog.find_table(table, database)
+            except SchemaError:
+                return None
+            return found["indexes"] if found is not None else None
+        
+        return {
+            **explained,
+            "suggestions": suggest_indexes(explained["summary"], info.aliases, table_indexes),
+            "violations": check_plan(explained["summary"], config.EXPLAIN_MAX_ROWS,
+                                     config.EXPLAIN_MAX_FULL_SCAN_ROWS),
+        }
+    
+    def execute_export(self, query, params=None, export_format="csv", compress=False, filename=None, max_rows=0,
+                       timeout=None):
+        """
+        Stream a SELECT result to a file in config.EXPORT_DIR
+        
+        Rows are read from an unbuffered cursor and written batch by batch, so memory use
+        does not grow with the result. Plain SELECTs run on a read replica when one is
+        available. The statement is stopped after timeout seconds (the mysql_export entry of
+        config.TOOL_TIMEOUTS, config.EXPORT_TIMEOUT, by default; 0 for none), including the
+        time spent writing the file.
+        """
+        error = check_permission("SELECT")
+        if error:
+            return error
+        
+        locking = analyze(query).locking
+        try:
+            query, params = prepare_params(query, params)
+        except Exception as e:
+            return {"error": True, "message": f"Error processing IN parameters: {str(e)}", "code": 400}
+        try:
+            path = export_path(config.EXPORT_DIR, filename, export_format, compress)
+        except ExportError as err:
+            return {"error": True, "message": str(err), "code": 400}
+        except OSError as err:
+            return {"error": True, "message": f"Cannot create the export directory: {err}", "code": 500}
+        
+        if timeout is None:
+            timeout = resolve_timeout("mysql_export")
+        if timeout:
+            query = add_execution_time_hint(query, analyze(query), timeout)
+        
+        replica = self.replicas.choose() if self.replicas is not None and not locking else None
+        pool = replica.pool if replica is not None else self.pool
+        metrics.set_query(query)
+        metrics.record_route(pool.name)
+        try:
+            with metrics.phase("checkout"):
+                conn = pool.connection()
+        except (PoolTimeoutError, mysql.connector.Error) as err:
+            if replica is not None:
+                self.replicas.record_failure(replica)
+            code = 503 if isinstance(err, PoolTimeoutError) else err.errno
+            metrics.record_error("pool_timeout" if code == 503 else code)
+            return {"error": True, "message": str(err), "code": code}
+        if replica is not None:
+            self.replicas.record_success(replica)
+        
+        cursor = None
+        started = time.perf_counter()
+        try:
+            with metrics.phase("execute"):
+                cursor = conn.cursor()
+                cursor.execute(query, params if params is not None else [])
+            with metrics.phase("fetch"):
+                # The preview is shaped like a query result: large values become handles
+                replace_large = self.blob_store.replacer(cursor.description, dictionary=False) \
+                    if self.blob_store is not None else None
+                result = write_export(cursor, path, export_format, compress, max_rows or 0,
+                                      config.EXPORT_PREVIEW_ROWS, replace_large, config.MAX_RESULT_BYTES)
+            if result["truncated"]:
+                # Drop the rest of the result instead of reading it off the wire
+                conn.invalidate()
+            metrics.record_rows(result["row_count"])
+            return result
+        except mysql.connector.Error as err:
+            conn.invalidate()
+            if err.errno == ER_QUERY_TIMEOUT:
+                metrics.record_error("timeout")
+                return timeout_error(timeout, started, err.errno)
+            metrics.record_error(err.errno)
+            return {"error": True, "message": str(err), "code": err.errno}
+        except OSError as err:
+            conn.invalidate()
+            metrics.record_error("export_write")
+            return {"error": True, "message": f"Could not write the export file: {err}", "code": 500}
+        finally:
+            if cursor is not None:
+                close_cursor_quietly(cursor)
+            conn.close()
     
     def list_tables(self, database=None):
-        if database:
-            query = f"SHOW TABLES FROM `{database}`"
-            results = self.execute_select(query)
-        else:
-            query = "SHOW TABLES"
-            results = self.execute_select(query)
-            
-        # Check if there was an error
-        if isinstance(results, dict) and "error" in results:
-            return results
-            
+        """List tables from the schema catalog"""
+        try:
+            schema = self.catalog.get(database)
+        except SchemaError as err:
+            return err.result
+        
         # Reformat results to match the expected output format
-        tables = []
-        for row in results:
-            # Get first value (table name) from each row
-            tables.append({
-                "table_name": list(row.values())[0]
-            })
-        return tables
+        return [{"table_name": name} for name in schema["tables"]]
     
     def describe_table(self, table_name, database=None):
-        if database:
-            query = f"DESCRIBE `{database}`.`{table_name}`"
-        else:
-            query = f"DESCRIBE `{table_name}`"
-            
-        return self.execute_select(query)
+        """Describe a table from the schema catalog, in the same format as DESCRIBE"""
+        try:
+            table = self.catalog.find_table(table_name, database)
+        except SchemaError as err:
+            return err.result
+        if table is None:
+            database = database or self.catalog.default_database
+            return {"error": True, "message": f"Table '{database}.{table_name}' doesn't exist", "code": 1146}
+        
+        return [
+            {
+                "Field": column["name"],
+                "Type": column["type"],
+                "Null": "YES" if column["nullable"] else "NO",
+                "Key": column["key"] or "",
+                "Default": column["default"],
+                "Extra": column["extra"] or "",
+            }
+            for column in table["columns"]
+        ]
+    
+    def describe_schema(self, database=None, tables=None, refresh=False):
+        """Describe many tables (or a whole database) in one call"""
+        try:
+            schema = self.catalog.get(database, refresh)
+        except SchemaError as err:
+            return err.result
+        
+        if not tables:
+            return schema
+        
+        found = {}
+        missing = []
+        for name in tables:
+            table = lookup_table(schema["tables"], name)
+            if table is None:
+                missing.append(name)
+            else:
+                found[name] = table
+        result = {"database": schema["database"], "loaded_at": schema["loaded_at"], "tables": found}
+        if missing:
+            result["missing"] = missing
+        return result
+
+def detect_operation_type(query):
+    """Detect the operation type of a query (SELECT, INSERT, UPDATE, DELETE or None)
+    
+    Leading comments, parentheses and WITH clauses are looked through, so
+    "WITH recent AS (...) DELETE ..." is a DELETE. SHOW and DESCRIBE count as SELECT,
+    REPLACE as INSERT. Other statements (CREATE, ALTER, ...) return None and run
+    without a specific permission check.
+    """
+    return analyze(query).operation
+
+def check_permission(operation_type):
+    """Return an error result if the operation type is disabled, otherwise None"""
+    if operation_type == "SELECT" and not config.ENABLE_SELECT:
+        return {"error": True, "message": "SELECT operations are disabled", "code": 403}
+    elif operation_type == "INSERT" and not config.ENABLE_INSERT:
+        return {"error": True, "message": "INSERT operations are disabled", "code": 403}
+    elif operation_type == "UPDATE" and not config.ENABLE_UPDATE:
+        return {"error": True, "message": "UPDATE operations are disabled", "code": 403}
+    elif operation_type == "DELETE" and not config.ENABLE_DELETE:
+        return {"error": True, "message": "DELETE operations are disabled", "code": 403}
+    return None
+
+def prepare_params(query, params):
+    """Expand list parameters for IN (%s) clauses; returns the final (query, params)"""
+    if params is not None and isinstance(params, list) and any(isinstance(p, (list, tuple)) for p in params):
+        # Expand any IN clauses with list parameters
+        return expand_in_params(query, params, bucket=config.IN_LIST_BUCKETING)
+    return query, params
+
+def clamp_page_size(page_size):
+    """Bound a requested page size by the default page size and the row cap"""
+    page_size = page_size or config.DEFAULT_PAGE_SIZE
+    if config.MAX_ROWS:
+        page_size = min(page_size, config.MAX_ROWS)
+    return max(1, page_size)
+
+def pad_to_bucket(values):
+    """Pad a list to the next power-of-two length by repeating its last value"""
+    size = 1 << (len(values) - 1).bit_length()
+    return list(values) + [values[-1]] * (size - len(values))
 
 # Helper function to handle IN parameters
-def expand_in_params(query, params):
+def expand_in_params(query, params, bucket=False):
     """
     Helper function to dynamically expand IN clauses in SQL queries
     
     Args:
         query: SQL query string possibly containing IN (%s) patterns
         params: List of parameters that may include nested lists for IN clauses
+        bucket: Pad each expanded list to the next power of two by repeating its last
+                value, so a few statement shapes cover all list lengths (duplicates
+                don't change the result of IN or NOT IN)
         
     Returns:
         Tuple of (modified_query, flattened_params)
@@ -166,52 +890,109 @@ def expand_in_params(query, params):
     if params is None or not isinstance(params, list):
         return query, params
     
-    # Create a copy of the parameters list to avoid modifying the original
-    params_copy = list(params)
-    modified_query = query
-    flat_params = []
-    
-    # Look for potential IN clauses with a single placeholder
-    in_clause_pattern = r'IN\s*\(\s*%s\s*\)'
-    
-    # Find all occurrences of IN (%s)
-    in_clauses = list(re.finditer(in_clause_pattern, modified_query, re.IGNORECASE))
+    # IN (%s) clauses outside comments and literals, by the index of their placeholder
+    in_clauses = {index: (start, end) for start, end, index in analyze(query).in_placeholders}
     
-    # Process the IN clauses in reverse order to prevent position shifts
-    for match in reversed(in_clauses):
-        param_index = len(flat_params)
-        param_value = params_copy[param_index] if param_index < len(params_copy) else None
+    pieces = []
+    flat_params = []
+    position = 0
+    for param_index, param_value in enumerate(params):
+        clause = in_clauses.get(param_index)
         
-        # Only process if the parameter is a list or tuple
-        if isinstance(param_value, (list, tuple)) and param_value:
-            # Create the expanded placeholders (%s, %s, %s, ...)
-            placeholders = ', '.join(['%s'] * len(param_value))
+        # Only expand list parameters that fill an IN (%s) placeholder
+        if clause is not None and isinstance(param_value, (list, tuple)) and param_value:
+            if bucket:
+                param_value = pad_to_bucket(param_value)
             
             # Replace the IN (%s) with IN (expanded placeholders)
-            start, end = match.span()
-            modified_query = modified_query[:start] + f"IN ({placeholders})" + modified_query[end:]
+            start, end = clause
+            pieces.append(query[position:start])
+            pieces.append(f"IN ({', '.join(['%s'] * len(param_value))})")
+            position = end
             
             # Add the individual list items to the flattened params
             flat_params.extend(param_value)
-            
-            # Remove the processed parameter from the original list
-            params_copy.pop(param_index)
         else:
-            # Add the parameter to the flattened list
             flat_params.append(param_value)
-            params_copy.pop(param_index)
     
-    # Add any remaining parameters
-    flat_params.extend(params_copy)
-    
-    return modified_query, flat_params
+    if not pieces:
+        return query, flat_params
+    pieces.append(query[position:])
+    return "".join(pieces), flat_params
+
+# Content-addressed store for large column values, shared by the primary and shard clients
+blob_store = BlobStore(
+    config.LARGE_VALUE_DIR,
+    config.LARGE_VALUE_THRESHOLD,
+    preview_bytes=config.LARGE_VALUE_PREVIEW_BYTES,
+    chunk_bytes=config.LARGE_VALUE_CHUNK_BYTES,
+    max_bytes=config.LARGE_VALUE_STORE_BYTES,
+)
 
 # Initialize the MySQL client with configuration from config module
-mysql_client = MySQLClient(config.DB_CONFIG)
+mysql_client = MySQLClient(
+    config.DB_CONFIG,
+    config.POOL_CONFIG,
+    cursor_ttl=config.CURSOR_TTL,
+    max_open_cursors=config.MAX_OPEN_CURSORS,
+    result_cache=ResultCache(config.RESULT_CACHE_SIZE, config.RESULT_CACHE_TTL) if config.RESULT_CACHE_ENABLED else None,
+    schema_cache_ttl=config.SCHEMA_CACHE_TTL,
+    replica_configs=config.REPLICA_CONFIGS,
+    replica_routing=config.REPLICA_ROUTING,
+    explain_cache=ResultCache(config.EXPLAIN_CACHE_SIZE, config.EXPLAIN_CACHE_TTL) if config.EXPLAIN_CACHE_SIZE else None,
+    blob_store=blob_store,
+)
+
+# Named shard targets for mysql_fanout_select, each with its own client and pool. Every
+# concurrent tool call can reach all targets at once.
+shard_fan_out = ShardFanOut(
+    {
+        name: MySQLClient(
+            shard_config,
+            config.POOL_CONFIG,
+            cursor_ttl=config.CURSOR_TTL,
+            max_open_cursors=config.MAX_OPEN_CURSORS,
+            schema_cache_ttl=config.SCHEMA_CACHE_TTL,
+            explain_cache=ResultCache(config.EXPLAIN_CACHE_SIZE, config.EXPLAIN_CACHE_TTL)
+            if config.EXPLAIN_CACHE_SIZE else None,
+            blob_store=blob_store,
+        )
+        for name, shard_config in config.SHARD_CONFIGS.items()
+    },
+    max_workers=config.MAX_CONCURRENCY * len(config.SHARD_CONFIGS),
+) if config.SHARD_CONFIGS else None
+
+def _stats_gauges():
+    """Numeric pool, cursor and cache statistics exported alongside the metrics"""
+    sources = {
+        "pool": mysql_client.pool_stats(),
+        "statement_cache": mysql_client.pool.statement_stats(),
+        "cursors": mysql_client.cursors.stats(),
+        "result_cache": mysql_client.result_cache.stats() if mysql_client.result_cache is not None else {},
+        "explain_cache": mysql_client.explain_cache.stats() if mysql_client.explain_cache is not None else {},
+        "schema_catalog": mysql_client.catalog.stats(),
+        "query_analysis": analysis_cache_stats(),
+        "replicas": mysql_client.replicas.stats() if mysql_client.replicas is not None else {},
+        "large_values": blob_store.stats(),
+    }
+    return {
+        f"{prefix}_{key}": value
+        for prefix, stats in sources.items()
+        for key, value in stats.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+metrics.registry.add_collector(_stats_gauges)
 
 # Tool implementations
+# Each tool body is blocking (MySQL socket I/O), so @offload runs it on the bounded
+# worker pool and the event loop keeps serving other clients in the meantime.
+# @metrics.instrument records call counts and durations under the tool name.
 @mcp.tool()
-def mysql_execute_query(query: str, params: list = None) -> str:
+@offload
+@metrics.instrument
+def mysql_execute_query(query: str, params: list = None, page_size: int = None, use_cache: bool = True,
+                        format: str = "rows", timeout: float = None) -> str:
     """Execute a SQL query on the MySQL database
     
     Args:
@@ -227,8 +1008,28 @@ def mysql_execute_query(query: str, params: list = None) -> str:
                For IN operations with lists, you can now pass the list directly:
                "SELECT * FROM users WHERE email IN (%s)" with params [["user1@example.com", "user2@example.com"]]
         
+        page_size: Number of rows per page (optional). When set, the first page is returned as
+               {"rows": [...], "has_more": true, "continuation_token": "..."}; pass the token to
+               mysql_fetch_page to get the next page.
+        
+        use_cache: Set to false to bypass the result cache and read fresh data (optional, only
+               relevant when the result cache is enabled with MYSQL_RESULT_CACHE_ENABLED).
+        
+        format: "rows" (default) returns a list of objects, one per row. "columnar" returns
+               {"columns": [...], "types": [...], "rows": [[...], ...]} with each row as an array,
+               which is much smaller for wide or long results.
+        
+        timeout: Seconds after which the statement is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
+        
     Returns:
-        The query results as a JSON string
+        The query results as a JSON string. Results without page_size are capped at
+        MYSQL_MAX_ROWS rows and MYSQL_MAX_RESULT_BYTES bytes and returned as
+        {"rows": [...], "row_count": n, "truncated": false}; a result cut short by a cap has
+        "truncated": true and "truncated_by": "rows" or "bytes". Only when both caps are
+        disabled (0) is the result a plain list of rows. Paged results are returned as
+        {"rows": [...], "has_more": ..., "continuation_token": ...}. A cancelled
+        statement returns {"error": true, "timeout": true, "code": 408, ...}
         
     Notes:
         Refer to the 'parameterized_query_examples' resource for examples of using parameterized queries.
@@ -242,14 +1043,21 @@ def mysql_execute_query(query: str, params: list = None) -> str:
         1. "SELECT * FROM users WHERE id IN (%s, %s, %s)" with params [1, 2, 3]
         2. "SELECT * FROM users WHERE id IN (%s)" with params [[1, 2, 3]]
     """
+    if format not in RESULT_FORMATS:
+        return json.dumps({"error": True, "message": f"format must be one of: {', '.join(RESULT_FORMATS)}", "code": 400})
+    
     # Ensure params is always a list, even if None is provided
     params_list = params if params is not None else []
             
-    result = mysql_client.execute_query(query, params_list)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    result = mysql_client.execute_query(query, params_list, page_size=page_size, use_cache=use_cache,
+                                 result_format=format, timeout=resolve_timeout("mysql_execute_query", timeout))
+    return to_json(result)
 
 @mcp.tool()
-def mysql_select(query: str, params: list = None) -> str:
+@offload
+@metrics.instrument
+def mysql_select(query: str, params: list = None, page_size: int = None, use_cache: bool = True,
+                 format: str = "rows", timeout: float = None) -> str:
     """Execute a SELECT query on the MySQL database
     
     Args:
@@ -265,12 +1073,35 @@ def mysql_select(query: str, params: list = None) -> str:
                For IN operations with lists, you can now pass the list directly:
                "SELECT * FROM users WHERE email IN (%s)" with params [["user1@example.com", "user2@example.com"]]
         
+        page_size: Number of rows per page (optional). When set, the first page is returned as
+               {"rows": [...], "has_more": true, "continuation_token": "..."}; pass the token to
+               mysql_fetch_page to get the next page.
+        
+        use_cache: Set to false to bypass the result cache and read fresh data (optional, only
+               relevant when the result cache is enabled with MYSQL_RESULT_CACHE_ENABLED).
+        
+        format: "rows" (default) returns a list of objects, one per row. "columnar" returns
+               {"columns": [...], "types": [...], "rows": [[...], ...]} with each row as an array,
+               which is much smaller for wide or long results.
+        
+        timeout: Seconds after which the statement is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
+        
     Returns:
-        The query results as a JSON string
+        The query results as a JSON string. Results without page_size are capped at
+        MYSQL_MAX_ROWS rows and MYSQL_MAX_RESULT_BYTES bytes and returned as
+        {"rows": [...], "row_count": n, "truncated": false}; a result cut short by a cap has
+        "truncated": true and "truncated_by": "rows" or "bytes". Only when both caps are
+        disabled (0) is the result a plain list of rows. Paged results are returned as
+        {"rows": [...], "has_more": ..., "continuation_token": ...}. A cancelled
+        statement returns {"error": true, "timeout": true, "code": 408, ...}. BLOB/TEXT values over
+        MYSQL_LARGE_VALUE_THRESHOLD bytes are replaced by a handle with a preview; read them with
+        mysql_fetch_value.
         
     Notes:
         This tool is specifically for SELECT operations. It will refuse to execute other SQL operations
-        like INSERT, UPDATE, or DELETE.
+        like INSERT, UPDATE, or DELETE. Queries starting with a WITH clause (CTE) are accepted when
+        their main statement is a SELECT.
         
         Refer to the 'parameterized_query_examples' resource for examples of using parameterized queries.
         Always use %s as the placeholder regardless of the parameter data type.
@@ -280,17 +1111,89 @@ def mysql_select(query: str, params: list = None) -> str:
         2. "SELECT * FROM users WHERE id IN (%s)" with params [[1, 2, 3]]
     """
     # Validate that this is a SELECT query
-    if not query.strip().upper().startswith("SELECT"):
+    if analyze(query).statement != "SELECT":
         return json.dumps({"error": True, "message": "This tool only accepts SELECT queries", "code": 400})
     
+    if format not in RESULT_FORMATS:
+        return json.dumps({"error": True, "message": f"format must be one of: {', '.join(RESULT_FORMATS)}", "code": 400})
+    
     # Ensure params is always a list, even if None is provided
     params_list = params if params is not None else []
     
-    result = mysql_client.execute_select(query, params_list)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    result = mysql_client.execute_select(query, params_list, page_size=page_size, use_cache=use_cache,
+                                 result_format=format, timeout=resolve_timeout("mysql_select", timeout))
+    return to_json(result)
 
 @mcp.tool()
-def mysql_insert(query: str, params: list = None) -> str:
+@offload
+@metrics.instrument
+def mysql_fetch_page(continuation_token: str, page_size: int = None) -> str:
+    """Fetch the next page of a result started with page_size
+    
+    Args:
+        continuation_token: Token returned by mysql_select or mysql_execute_query (or a previous
+               mysql_fetch_page call) when has_more was true
+        page_size: Number of rows to return (optional, defaults to MYSQL_DEFAULT_PAGE_SIZE)
+        
+    Returns:
+        The next page as a JSON string: {"rows": [...], "has_more": ..., "continuation_token": ...}
+        
+    Notes:
+        Open results expire after MYSQL_CURSOR_TTL seconds without a fetch. Call
+        mysql_close_cursor when you don't need the remaining rows.
+    """
+    result = mysql_client.fetch_page(continuation_token, page_size)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_fetch_value(handle: str, offset: int = 0, length: int = None, encoding: str = None) -> str:
+    """Read a large BLOB/TEXT value that a result replaced by a handle, one chunk at a time
+    
+    Args:
+        handle: The "handle" of the value ("sha256:...") from a query result
+        offset: First byte to read (optional, defaults to 0)
+        length: Number of bytes to read (optional, at most MYSQL_LARGE_VALUE_CHUNK_BYTES,
+               which is also the default)
+        encoding: "utf-8" or "base64" (optional, defaults to the handle's encoding guess)
+        
+    Returns:
+        JSON string with the chunk in "data", its byte range (offset, length), the value's
+        size and MIME type guess, and has_more/next_offset. Pass next_offset as the offset of
+        the next call to read the whole value; UTF-8 chunks never split a character.
+        
+    Notes:
+        Values over MYSQL_LARGE_VALUE_THRESHOLD bytes are replaced in mysql_select,
+        mysql_execute_query, mysql_fetch_page, mysql_transaction and mysql_fanout_select
+        results by {"handle", "bytes", "mime_type", "encoding", "preview", "truncated"}.
+    """
+    error = check_permission("SELECT")
+    if error:
+        return json.dumps(error)
+    
+    result = mysql_client.fetch_value(handle, offset, length, encoding)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_close_cursor(continuation_token: str) -> str:
+    """Close a paged result without fetching the remaining rows
+    
+    Args:
+        continuation_token: Token returned by a paged query
+        
+    Returns:
+        JSON string telling whether an open result was closed
+    """
+    result = mysql_client.close_cursor(continuation_token)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_insert(query: str, params: list = None, timeout: float = None) -> str:
     """Execute an INSERT query on the MySQL database
     
     Args:
@@ -298,6 +1201,8 @@ def mysql_insert(query: str, params: list = None) -> str:
         params: Query parameters (optional). A list of values that correspond to %s placeholders in the query.
                For example, if query is "INSERT INTO users (name, age) VALUES (%s, %s)", 
                then params could be ["John Doe", 30].
+        timeout: Seconds after which the statement is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
         
     Returns:
         The query results as a JSON string with affected row count
@@ -310,16 +1215,91 @@ def mysql_insert(query: str, params: list = None) -> str:
         Always use %s as the placeholder regardless of the parameter data type.
     """
     # Validate that this is an INSERT query
-    if not query.strip().upper().startswith("INSERT"):
+    if analyze(query).statement != "INSERT":
         return json.dumps({"error": True, "message": "This tool only accepts INSERT queries", "code": 400})
     
     # Ensure params is always a list, even if None is provided
     params_list = params if params is not None else []
-    result = mysql_client.execute_insert(query, params_list)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    result = mysql_client.execute_insert(query, params_list, timeout=resolve_timeout("mysql_insert", timeout))
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_bulk_insert(query: str, rows: list = None, columns: dict = None, chunk_size: int = None,
+                      commit_per_chunk: bool = False, timeout: float = None) -> str:
+    """Insert many rows at once using multi-row INSERT batches
+    
+    Args:
+        query: A single-row INSERT template with %s placeholders, for example
+               "INSERT INTO users (name, age) VALUES (%s, %s)". An ON DUPLICATE KEY UPDATE
+               clause after the VALUES row is kept.
+        rows: List of rows, each a list of values matching the placeholders, for example
+               [["John Doe", 30], ["Jane Smith", 25]]
+        columns: Alternative columnar payload, for example {"name": ["John Doe", "Jane Smith"],
+               "age": [30, 25]}. Columns are used in the given order, which must match the placeholders.
+        chunk_size: Maximum rows per INSERT statement (optional, defaults to MYSQL_BULK_INSERT_CHUNK_ROWS).
+               Chunks are also kept under the server's max_allowed_packet.
+        commit_per_chunk: Commit after every chunk instead of once at the end (optional). By default
+               all chunks run in a single transaction and nothing is inserted if any chunk fails.
+        timeout: Seconds after which the whole load is cancelled and rolled back (optional). Can only
+               shorten the server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
+        
+    Returns:
+        JSON string with the total affected row count and the size and timing of every chunk
+        
+    Notes:
+        INSERT operations can be disabled via the MYSQL_ENABLE_INSERT environment variable.
+    """
+    # Validate that this is an INSERT query
+    if analyze(query).statement != "INSERT":
+        return json.dumps({"error": True, "message": "This tool only accepts INSERT queries", "code": 400})
+    if (rows is None) == (columns is None):
+        return json.dumps({"error": True, "message": "Provide exactly one of rows or columns", "code": 400})
+    
+    try:
+        row_list = rows if rows is not None else columns_to_rows(columns)
+    except BulkInsertError as err:
+        return json.dumps({"error": True, "message": str(err), "code": 400})
+    
+    result = mysql_client.execute_bulk_insert(query, row_list, chunk_size, commit_per_chunk,
+                                              timeout=resolve_timeout("mysql_bulk_insert", timeout))
+    return to_json(result)
 
 @mcp.tool()
-def mysql_update(query: str, params: list = None) -> str:
+@offload
+@metrics.instrument
+def mysql_transaction(steps: list, timeout: float = None) -> str:
+    """Execute several SQL statements in a single transaction
+    
+    Args:
+        steps: Ordered list of steps, each an object {"query": "...", "params": [...]}.
+               Use %s placeholders in each query; params is optional and supports the same
+               IN (%s) list expansion as mysql_execute_query. For example:
+               [
+                 {"query": "SELECT balance FROM accounts WHERE id = %s", "params": [1]},
+                 {"query": "UPDATE accounts SET balance = balance - %s WHERE id = %s", "params": [50, 1]},
+                 {"query": "INSERT INTO audit_log (account_id, amount) VALUES (%s, %s)", "params": [1, -50]}
+               ]
+        timeout: Seconds after which the whole transaction is cancelled and rolled back (optional). Can
+               only shorten the server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
+        
+    Returns:
+        JSON string with the result and timing of every step. If a step fails, the whole
+        transaction is rolled back and the response contains the failing step index.
+        
+    Notes:
+        All steps run on one connection, in order. Only SELECT, INSERT, UPDATE and DELETE
+        statements are allowed, and each step must be enabled via the MYSQL_ENABLE_*
+        environment variables; permissions are checked before any step runs.
+    """
+    result = mysql_client.execute_transaction(steps, timeout=resolve_timeout("mysql_transaction", timeout))
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_update(query: str, params: list = None, timeout: float = None) -> str:
     """Execute an UPDATE query on the MySQL database
     
     Args:
@@ -327,6 +1307,8 @@ def mysql_update(query: str, params: list = None) -> str:
         params: Query parameters (optional). A list of values that correspond to %s placeholders in the query.
                For example, if query is "UPDATE users SET name = %s WHERE id = %s", 
                then params could be ["Jane Smith", 123].
+        timeout: Seconds after which the statement is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
         
     Returns:
         The query results as a JSON string with affected row count
@@ -339,16 +1321,18 @@ def mysql_update(query: str, params: list = None) -> str:
         Always use %s as the placeholder regardless of the parameter data type.
     """
     # Validate that this is an UPDATE query
-    if not query.strip().upper().startswith("UPDATE"):
+    if analyze(query).statement != "UPDATE":
         return json.dumps({"error": True, "message": "This tool only accepts UPDATE queries", "code": 400})
     
     # Ensure params is always a list, even if None is provided
     params_list = params if params is not None else []
-    result = mysql_client.execute_update(query, params_list)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    result = mysql_client.execute_update(query, params_list, timeout=resolve_timeout("mysql_update", timeout))
+    return to_json(result)
 
 @mcp.tool()
-def mysql_delete(query: str, params: list = None) -> str:
+@offload
+@metrics.instrument
+def mysql_delete(query: str, params: list = None, timeout: float = None) -> str:
     """Execute a DELETE query on the MySQL database
     
     Args:
@@ -356,6 +1340,8 @@ def mysql_delete(query: str, params: list = None) -> str:
         params: Query parameters (optional). A list of values that correspond to %s placeholders in the query.
                For example, if query is "DELETE FROM users WHERE id = %s", 
                then params could be [123].
+        timeout: Seconds after which the statement is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
         
     Returns:
         The query results as a JSON string with affected row count
@@ -368,15 +1354,117 @@ def mysql_delete(query: str, params: list = None) -> str:
         Always use %s as the placeholder regardless of the parameter data type.
     """
     # Validate that this is a DELETE query
-    if not query.strip().upper().startswith("DELETE"):
+    if analyze(query).statement != "DELETE":
         return json.dumps({"error": True, "message": "This tool only accepts DELETE queries", "code": 400})
     
     # Ensure params is always a list, even if None is provided
     params_list = params if params is not None else []
-    result = mysql_client.execute_delete(query, params_list)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    result = mysql_client.execute_delete(query, params_list, timeout=resolve_timeout("mysql_delete", timeout))
+    return to_json(result)
 
 @mcp.tool()
+@offload
+@metrics.instrument
+def mysql_export(query: str, params: list = None, format: str = "csv", compress: bool = False,
+                 filename: str = None, max_rows: int = None, timeout: float = None) -> str:
+    """Export the full result of a SELECT query to a CSV or NDJSON file
+    
+    Args:
+        query: The SELECT query to export. Use %s as placeholders for parameters; IN (%s)
+               list parameters work as in mysql_select.
+        params: Query parameters (optional)
+        format: "csv" (default, with a header row) or "ndjson" (one JSON object per line)
+        compress: Write a gzip-compressed file (optional)
+        filename: File name inside the export directory (optional, a unique name is generated
+               by default). The extension is added when missing; existing files are overwritten.
+        max_rows: Stop after this many rows (optional, defaults to the whole result)
+        timeout: Seconds after which the export is cancelled (optional). Can only shorten the
+               server's limit (MYSQL_EXPORT_TIMEOUT, none by default, or this tool's entry in
+               MYSQL_TOOL_TIMEOUTS).
+        
+    Returns:
+        JSON string with the file path and file:// URI, the row count, the file size in bytes,
+        the column names and a preview of the first rows. The rows themselves are not returned.
+        
+    Notes:
+        Files are written to MYSQL_EXPORT_DIR and are not deleted by the server. The result is
+        streamed to disk, so exports are not limited by MYSQL_MAX_ROWS. Values are written
+        as in other tool responses: dates as ISO 8601, DECIMAL as exact strings, TIME as
+        HH:MM:SS and binary values as UTF-8 text. NULL is an empty field in CSV.
+    """
+    # Validate that this is a SELECT query
+    if analyze(query).statement != "SELECT":
+        return json.dumps({"error": True, "message": "This tool only accepts SELECT queries", "code": 400})
+    
+    if format not in EXPORT_FORMATS:
+        return json.dumps({"error": True, "message": f"format must be one of: {', '.join(EXPORT_FORMATS)}", "code": 400})
+    
+    # Ensure params is always a list, even if None is provided
+    params_list = params if params is not None else []
+    
+    result = mysql_client.execute_export(query, params_list, format, compress, filename, max_rows,
+                                         timeout=resolve_timeout("mysql_export", timeout))
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_fanout_select(query: str, params: list = None, targets: list = None, order_by: list = None,
+                        limit: int = None, aggregate: dict = None, group_by: list = None,
+                        timeout: float = None) -> str:
+    """Run the same SELECT on several shard databases at once and merge the results
+    
+    Args:
+        query: The SELECT query to run on every target. Use %s as placeholders for parameters;
+               IN (%s) list parameters work as in mysql_select.
+        params: Query parameters (optional), the same for every target
+        targets: Names of the targets to query (optional, defaults to all targets configured
+               in MYSQL_SHARDS)
+        order_by: Sort the merged rows, e.g. ["created_at DESC", "id"] (optional). Each target's
+               rows should already be sorted and limited by the query itself.
+        limit: Maximum number of merged rows to return (optional)
+        aggregate: Re-aggregate the merged rows, e.g. {"orders": "sum", "customers": "count"}
+               (optional). Supported: sum, count (per-target counts are added), min, max.
+               AVG cannot be combined; select SUM and COUNT instead.
+        group_by: Columns to group the re-aggregation by (optional, requires aggregate)
+        timeout: Seconds each target may run (optional). Can only shorten the server's limit
+               (MYSQL_QUERY_TIMEOUT, or this tool's entry in MYSQL_TOOL_TIMEOUTS).
+        
+    Returns:
+        JSON string with the merged rows (each tagged with its target in "_shard", unless
+        re-aggregated), the row count, per-target row counts and latency, and the failed
+        targets. A failing or timed-out target is reported in "targets" and "failed_targets"
+        and the rows of the other targets are still returned ("partial": true).
+        
+    Notes:
+        Each target's rows are capped at MYSQL_MAX_ROWS before merging.
+    """
+    if shard_fan_out is None:
+        return json.dumps({"error": True, "message": "No shard targets configured (set MYSQL_SHARDS)", "code": 400})
+    
+    # Validate that this is a SELECT query
+    if analyze(query).statement != "SELECT":
+        return json.dumps({"error": True, "message": "This tool only accepts SELECT queries", "code": 400})
+    
+    error = check_permission("SELECT")
+    if error:
+        return json.dumps(error)
+    
+    # Ensure params is always a list, even if None is provided
+    params_list = params if params is not None else []
+    
+    try:
+        check_merge_options(order_by, limit, aggregate, group_by)
+        results = shard_fan_out.select(query, params_list, targets,
+                                       timeout=resolve_timeout("mysql_fanout_select", timeout))
+        result = merge_results(results, order_by, limit, aggregate, group_by)
+    except FanOutError as err:
+        result = {"error": True, "message": str(err), "code": 400}
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
 def mysql_list_tables(database: str = None) -> str:
     """List all tables in the MySQL database
     
@@ -387,9 +1475,11 @@ def mysql_list_tables(database: str = None) -> str:
         List of tables as a JSON string
     """
     result = mysql_client.list_tables(database)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    return to_json(result)
 
 @mcp.tool()
+@offload
+@metrics.instrument
 def mysql_describe_table(table_name: str, database: str = None) -> str:
     """Get the structure of a specific table
     
@@ -401,13 +1491,112 @@ def mysql_describe_table(table_name: str, database: str = None) -> str:
         Table structure as a JSON string
     """
     result = mysql_client.describe_table(table_name, database)
-    return json.dumps(result, cls=config.DateTimeEncoder)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_describe_schema(database: str = None, tables: list = None, refresh: bool = False) -> str:
+    """Describe many tables, or a whole database, in one call
+    
+    Args:
+        database: Database name (optional, defaults to the current database)
+        tables: List of table names to describe (optional, defaults to all tables)
+        refresh: Reload the schema from information_schema instead of using the cached copy (optional)
+        
+    Returns:
+        JSON string with, for each table: type, engine, estimated row count, data and index size,
+        columns, indexes and foreign keys
+        
+    Notes:
+        The schema is cached for MYSQL_SCHEMA_CACHE_TTL seconds. Use refresh=true after
+        changing tables outside this server.
+    """
+    result = mysql_client.describe_schema(database, tables, refresh)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_explain(query: str, params: list = None, database: str = None) -> str:
+    """Show the execution plan of a query and suggest indexes for slow table scans
+    
+    Args:
+        query: The SELECT, UPDATE or DELETE statement to explain. It is not executed.
+               Use %s placeholders and params as in mysql_select; IN (%s) lists are supported.
+        params: Query parameters (optional)
+        database: Database whose indexes are checked (optional, defaults to the current database)
+        
+    Returns:
+        JSON string with:
+        - plan: the raw EXPLAIN FORMAT=JSON document
+        - summary: query cost, estimated rows examined, full table scans and the access
+          method, index and condition of every table
+        - suggestions: for each table read in full, the columns it is filtered or joined on
+          (equality columns first), with a CREATE INDEX statement, or the existing index
+          that already covers them
+        - violations: limits of the EXPLAIN cost guard (MYSQL_EXPLAIN_MAX_ROWS,
+          MYSQL_EXPLAIN_MAX_FULL_SCAN_ROWS) the plan exceeds
+        
+    Notes:
+        Plans are cached per query fingerprint for MYSQL_EXPLAIN_CACHE_TTL seconds, and
+        dropped when DDL (such as CREATE INDEX) runs through this server. Suggestions are
+        a starting point: check column selectivity before adding an index to a large table.
+    """
+    # Ensure params is always a list, even if None is provided
+    params_list = params if params is not None else []
+    
+    result = mysql_client.advise_indexes(query, params_list, database)
+    return to_json(result)
+
+@mcp.tool()
+@offload
+@metrics.instrument
+def mysql_server_stats() -> str:
+    """Get runtime statistics of the MySQL MCP server
+    
+    Returns:
+        Server statistics as a JSON string: connection pool (pool size, connections in use,
+        checkout wait times and connection reuse rate), prepared statement cache
+        hit rate, open paged results, result and EXPLAIN cache hits, misses and evictions,
+        and the values held by the large value store
+    """
+    result = {
+        "pool": mysql_client.pool_stats(),
+        "statement_cache": mysql_client.pool.statement_stats(),
+        "cursors": mysql_client.cursors.stats(),
+        "result_cache": mysql_client.result_cache.stats() if mysql_client.result_cache is not None else None,
+        "explain_cache": mysql_client.explain_cache.stats() if mysql_client.explain_cache is not None else None,
+        "schema_catalog": mysql_client.catalog.stats(),
+        "query_analysis": analysis_cache_stats(),
+        "replicas": mysql_client.replicas.stats() if mysql_client.replicas is not None else None,
+        "shards": shard_fan_out.stats() if shard_fan_out is not None else None,
+        "large_values": blob_store.stats(),
+    }
+    return to_json(result)
 
 
 
+def sse_app():
+    """The SSE server app with a Prometheus scrape endpoint added at config.METRICS_PATH"""
+    from starlette.responses import PlainTextResponse
+    
+    async def prometheus_metrics(request):
+        return PlainTextResponse(metrics.registry.prometheus(), media_type="text/plain; version=0.0.4")
+    
+    app = mcp.sse_app()
+    app.add_route(config.METRICS_PATH, prometheus_metrics, methods=["GET"])
+    return app
+
 # Run the server
 if __name__ == "__main__":
     print("Starting MySQL MCP Server...")
     # Run with stdio transport by default (for Docker compatibility)
-    # Can be changed to "sse" for SSE transport
-    mcp.run(transport="stdio")
\ No newline at end of file
+    # Set MCP_TRANSPORT=sse to serve multiple clients over SSE
+    if config.MCP_TRANSPORT == "sse":
+        import uvicorn
+        print(f"Prometheus metrics at http://{config.MCP_HOST}:{config.MCP_PORT}{config.METRICS_PATH}")
+        uvicorn.run(sse_app(), host=config.MCP_HOST, port=config.MCP_PORT,
+                    log_level=mcp.settings.log_level.lower())
+    else:
+        mcp.run(transport=config.MCP_TRANSPORT)
\ No newline at end of file
@@ -0,0 +1,256 @@
+#!/usr/bin/env python
+"""
+Shard fan-out for MySQL MCP Server
+Runs one SELECT on several named database targets concurrently and merges the
+rows, optionally re-aggregating and re-sorting them across targets
+"""
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Functions whose per-target results can be combined into a correct overall result
+AGGREGATES = ("sum", "count", "min", "max")
+
+# Seconds a target may take beyond its statement timeout (connecting, fetching)
+# before the fan-out stops waiting for it
+TIMEOUT_GRACE = 2.0
+
+# Key added to every merged row naming the target it came from
+SHARD_KEY = "_shard"
+
+
+class FanOutError(Exception):
+    """Raised when the merge options of a fan-out are invalid"""
+
+
+class ShardFanOut:
+    """
+    Named database targets queried concurrently
+
+    Args:
+        clients: Dict of target name -> MySQLClient for that database
+        max_workers: Threads running target queries; each in-flight target query holds one
+    """
+    def __init__(self, clients, max_workers=None):
+        self.clients = clients
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or max(1, len(clients)),
+            thread_name_prefix="mysql-shard",
+        )
+
+    def _run_target(self, client, query, params, timeout):
+        started = time.perf_counter()
+        try:
+            result = client.execute_select(query, params, use_cache=False, use_replica=False, timeout=timeout)
+        except Exception as err:
+            result = {"error": True, "message": str(err), "code": 500}
+        return result, round((time.perf_counter() - started) * 1000, 3)
+
+    def select(self, query, params=None, targets=None, timeout=0):
+        """
+        Run a SELECT on the given targets (all of them by default) at the same time
+
+        A target failing or running past its timeout is reported, not raised, so the
+        other targets' rows are still returned.
+
+        Returns:
+            Dict of target name -> (result, elapsed_ms), where result is what
+            MySQLClient.execute_select returned or an error dict
+
+        Raises:
+            FanOutError: If a target name is unknown
+        """
+        names = list(dict.fromkeys(targets)) if targets else list(self.clients)
+        unknown = [name for name in names if name not in self.clients]
+        if unknown:
+            raise FanOutError(f"Unknown targets: {', '.join(unknown)}. Configured targets: "
+                              f"{', '.join(self.clients) or 'none'}")
+
+        started = time.perf_counter()
+        futures = {
+            # Each target runs in a copy of the caller's context, so metrics land on the current tool call
+            name: self._executor.submit(contextvars.copy_context().run, self._run_target,
+                                        self.clients[name], query, params, timeout)
+            for name in names
+        }
+        wait(futures.values(), timeout=timeout + TIMEOUT_GRACE if timeout else None)
+
+        results = {}
+        for name, future in futures.items():
+            if future.done():
+                results[name] = future.result()
+            else:
+                # The statement itself is stopped by its MAX_EXECUTION_TIME hint
+                future.cancel()
+                results[name] = ({
+                    "error": True,
+                    "timeout": True,
+                    "message": f"No response within the {timeout:g}s timeout",
+                    "code": 408,
+                }, round((time.perf_counter() - started) * 1000, 3))
+        return results
+
+    def stats(self):
+        return {name: client.pool_stats() for name, client in self.clients.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for client in self.clients.values():
+            client.pool.close()
+
+
+def result_rows(result):
+    """Rows of a successful execute_select result (plain list or truncated/warned envelope)"""
+    return result if isinstance(result, list) else result.get("rows", [])
+
+
+def aggregate_rows(rows, aggregate, group_by=None):
+    """
+    Combine rows from several targets by group, as one database would have
+
+    Args:
+        rows: Row dicts
+        aggregate: Dict of column -> function in AGGREGATES; counts are summed
+        group_by: Columns identifying a group (optional, one group when omitted)
+
+    Returns:
+        One row per group with the group_by and aggregate columns, in first-seen order
+    """
+    functions = _parse_aggregate(aggregate)
+    group_by = group_by or []
+
+    groups = {}
+    for row in rows:
+        key = tuple(row.get(column) for column in group_by)
+        merged = groups.get(key)
+        if merged is None:
+            merged = groups[key] = {column: row.get(column) for column in group_by}
+            merged.update({column: None for column in functions})
+        for column, function in functions.items():
+            value = row.get(column)
+            if value is None:
+                continue
+            current = merged[column]
+            if current is None:
+                merged[column] = value
+            elif function in ("sum", "count"):
+                merged[column] = current + value
+            elif function == "min":
+                merged[column] = min(current, value)
+            else:
+                merged[column] = max(current, value)
+
+    result = list(groups.values())
+    for row in result:
+        for column, function in functions.items():
+            if function == "count" and row[column] is None:
+                row[column] = 0
+    return result
+
+
+def sort_rows(rows, order_by):
+    """
+    Sort rows in place like ORDER BY does (NULLs first in ascending order)
+
+    Args:
+        order_by: List of "column" or "column DESC" items
+    """
+    keys = _parse_order_by(order_by)
+
+    # Sorting is stable, so sorting by the last key first yields the combined order
+    try:
+        for column, descending in reversed(keys):
+            rows.sort(key=lambda row: (row.get(column) is not None, row.get(column)), reverse=descending)
+    except TypeError as err:
+        raise FanOutError(f"Cannot compare values of {column} across targets: {err}")
+    return rows
+
+
+def _parse_aggregate(aggregate):
+    """Validate an aggregate option; returns column -> lowercase function"""
+    functions = {}
+    for column, function in aggregate.items():
+        function = str(function).lower()
+        if function == "avg":
+            raise FanOutError(f"AVG({column}) cannot be combined across targets; select SUM and COUNT "
+                              "of the column instead and divide")
+        if function not in AGGREGATES:
+            raise FanOutError(f"Unsupported aggregate '{function}' for {column}; use one of: {', '.join(AGGREGATES)}")
+        functions[column] = function
+    return functions
+
+
+def _parse_order_by(order_by):
+    """Validate an order_by option; returns a list of (column, descending)"""
+    keys = []
+    for item in order_by:
+        parts = str(item).split()
+        if not parts or len(parts) > 2 or (len(parts) == 2 and parts[1].upper() not in ("ASC", "DESC")):
+            raise FanOutError(f"Invalid order_by item '{item}'; use 'column' or 'column DESC'")
+        keys.append((parts[0], len(parts) == 2 and parts[1].upper() == "DESC"))
+    return keys
+
+
+def check_merge_options(order_by=None, limit=None, aggregate=None, group_by=None):
+    """
+    Validate the merge options of a fan-out before any target is queried
+
+    Raises:
+        FanOutError: If an option is malformed
+    """
+    if aggregate:
+        _parse_aggregate(aggregate)
+    elif group_by:
+        raise FanOutError("group_by needs aggregate to say how the other columns are combined")
+    if order_by:
+        _parse_order_by(order_by)
+    if limit is not None and limit < 0:
+        raise FanOutError("limit must not be negative")
+
+
+def merge_results(results, order_by=None, limit=None, aggregate=None, group_by=None):
+    """
+    Build the fan-out response from per-target results
+
+    Rows of all successful targets are concatenated, each tagged with its target
+    under SHARD_KEY, then re-aggregated (aggregate, group_by), sorted (order_by)
+    and cut (limit) in that order.
+
+    Args:
+        results: Result of ShardFanOut.select
+
+    Returns:
+        Dict with the merged rows, per-target row counts, latencies and errors, and
+        the names of the failed targets
+    """
+    rows = []
+    targets = {}
+    for name, (result, elapsed_ms) in results.items():
+        if isinstance(result, dict) and result.get("error"):
+            targets[name] = {key: result[key] for key in ("error", "timeout", "message", "code") if key in result}
+            targets[name]["elapsed_ms"] = elapsed_ms
+            continue
+        target_rows = result_rows(result)
+        targets[name] = {"row_count": len(target_rows), "elapsed_ms": elapsed_ms}
+        if isinstance(result, dict):
+            # Truncated by the per-target row cap, or flagged by the EXPLAIN cost guard
+            targets[name].update({key: result[key] for key in ("truncated", "warnings") if key in result})
+        rows.extend({SHARD_KEY: name, **row} for row in target_rows)
+
+    if aggregate:
+        rows = aggregate_rows(rows, aggregate, group_by)
+    if order_by:
+        sort_rows(rows, order_by)
+    truncated = limit is not None and len(rows) > limit
+    if truncated:
+        rows = rows[:limit]
+
+    failed = [name for name, target in targets.items() if target.get("error")]
+    return {
+        "rows": rows,
+        "row_count": len(rows),
+        "truncated": truncated,
+        "targets": targets,
+        "failed_targets": failed,
+        "partial": bool(failed),
+    }
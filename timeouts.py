@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Statement timeouts for MySQL MCP Server
+SELECTs are bounded server-side with a MAX_EXECUTION_TIME optimizer hint; other
+statements are watched by a timer that cancels them with KILL QUERY issued on a
+separate connection
+"""
+import time
+import threading
+
+import mysql.connector
+
+import config
+
+# MySQL error raised in a statement stopped by MAX_EXECUTION_TIME (ER_QUERY_TIMEOUT)
+ER_QUERY_TIMEOUT = 3024
+
+# Response code of a statement cancelled for running too long (like HTTP 408)
+TIMEOUT_CODE = 408
+
+
+def resolve_timeout(tool, requested=None):
+    """
+    Effective timeout in seconds for a tool call (0 for none)
+
+    A per-call timeout can shorten the configured limit of the tool (MYSQL_TOOL_TIMEOUTS,
+    falling back to MYSQL_QUERY_TIMEOUT) but never extend it.
+    """
+    configured = config.TOOL_TIMEOUTS.get(tool, config.QUERY_TIMEOUT)
+    if requested is None or requested <= 0:
+        return configured
+    return min(requested, configured) if configured else requested
+
+
+def add_execution_time_hint(query, info, timeout):
+    """
+    Add a MAX_EXECUTION_TIME optimizer hint to a SELECT
+
+    Args:
+        query: Final query text
+        info: QueryInfo of query
+        timeout: Limit in seconds
+
+    Returns:
+        The query with "/*+ MAX_EXECUTION_TIME(ms) */" after its main SELECT keyword,
+        or unchanged if it already sets MAX_EXECUTION_TIME
+    """
+    if "MAX_EXECUTION_TIME" in query.upper():
+        return query
+    end = info.statement_offset + len("SELECT")
+    return f"{query[:end]} /*+ MAX_EXECUTION_TIME({max(1, int(timeout * 1000))}) */{query[end:]}"
+
+
+def timeout_error(timeout, started, errno=None, **extra):
+    """Structured error returned for a statement cancelled by its timeout"""
+    return {
+        "error": True,
+        "timeout": True,
+        "message": f"Query cancelled after exceeding the {timeout:g}s timeout",
+        "code": TIMEOUT_CODE,
+        "mysql_errno": errno,
+        "timeout_seconds": timeout,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        **extra,
+    }
+
+
+class Watchdog:
+    """
+    Context manager cancelling the statement running on a connection after a timeout
+
+    When the timer fires, KILL QUERY <connection id> is sent over a short-lived side
+    connection. The watched connection is invalidated afterwards, since a KILL that
+    raced with the end of the statement could otherwise interrupt its next one.
+
+    Args:
+        conn: Pooled connection running the statement
+        db_config: Connection settings for the side connection
+        timeout: Seconds before the statement is killed (0 or None disables the watchdog)
+    """
+    def __init__(self, conn, db_config, timeout):
+        self.conn = conn
+        self.db_config = db_config
+        self.timeout = timeout
+        self.fired = False
+        self.kill_error = None
+        self._done = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def __enter__(self):
+        if self.timeout:
+            self._connection_id = self.conn.connection_id
+            self._timer = threading.Timer(self.timeout, self._kill)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stop(self):
+        """Disarm the timer; waits for a KILL already in progress to finish"""
+        if self._timer is None:
+            return
+        self._timer.cancel()
+        with self._lock:
+            self._done = True
+        if self.fired:
+            self.conn.invalidate()
+
+    def _kill(self):
+        with self._lock:
+            if self._done:
+                return
+            self.fired = True
+            try:
+                side = mysql.connector.connect(**{**self.db_config, "connection_timeout": 5})
+                try:
+                    cursor = side.cursor()
+                    cursor.execute(f"KILL QUERY {int(self._connection_id)}")
+                    cursor.close()
+                finally:
+                    side.close()
+            except Exception as err:
+                self.kill_error = str(err)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Worker pool for MySQL MCP Server
+Runs blocking MySQL tool bodies on a bounded thread pool so the asyncio event
+loop used by the MCP transport (stdio or SSE) stays responsive while queries run
+"""
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+# Shared executor; its size is the maximum number of tool calls hitting MySQL at once.
+# Calls beyond the limit wait in the executor queue instead of stalling the event loop.
+_executor = ThreadPoolExecutor(
+    max_workers=config.MAX_CONCURRENCY,
+    thread_name_prefix="mysql-worker",
+)
+
+
+def offload(func):
+    """
+    Decorator turning a blocking function into a coroutine executed on the worker pool
+
+    The wrapper keeps the original name, docstring and signature (via functools.wraps)
+    so FastMCP builds the same tool schema as for the undecorated function.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Propagate context variables into the worker thread
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(_executor, functools.partial(ctx.run, func, *args, **kwargs))
+    return wrapper
+
+
+def shutdown(wait=True):
+    """Stop accepting work and optionally wait for running tool calls to finish"""
+    _executor.shutdown(wait=wait)